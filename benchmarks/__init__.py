@@ -0,0 +1 @@
+"""Benchmarks for NBPy (not included in distribution)."""
@@ -0,0 +1,283 @@
+"""
+Concurrent load test of ``NBPClient``.
+
+Drives shared ``NBPClient`` objects from N threads (or N asyncio tasks)
+with a configurable mix of ``current``, ``date``, ``last`` and
+``date_range`` calls over a currency distribution, and reports throughput,
+latency percentiles, cache hit ratio and peak RSS. Dates are drawn from
+publication days of currencies' tables (see ``nbpy.business_days``), and
+failed calls are counted separately, without affecting throughput and
+latencies. Unless ``--base-uri`` is given, a local API stand-in
+(``tests.mock_api_helpers.MockAPIServer``) is started in background.
+
+``NBPClient`` is blocking, so asyncio tasks await its calls run in a pool
+of N threads (with ``run_in_executor()``, as asyncio applications would
+use it). Compared to threads mode, that measures only the overhead of the
+event loop and executor, not asynchronous I/O.
+
+Usage (from repository root)::
+
+    $ python -m benchmarks.loadtest --workers 16 --duration 10 \\
+        --mix current=1,date=4,last=1,date_range=2 \\
+        --currencies EUR=5,USD=3,CHF=1 --latency 0.02
+    $ python -m benchmarks.loadtest --mode asyncio --workers 64
+"""
+
+import argparse
+import bisect
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from nbpy import NBPClient
+from nbpy.business_days import publication_days
+from nbpy.currencies import currencies
+from nbpy.errors import NBPError
+from nbpy.metrics import Metrics
+from tests.mock_api_helpers import MockAPIServer
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+#: Default mix of calls (name -> weight).
+DEFAULT_MIX = {'current': 1, 'date': 4, 'last': 1, 'date_range': 2}
+
+#: Default currency distribution (code -> weight).
+DEFAULT_CURRENCIES = {'EUR': 5, 'USD': 3, 'CHF': 1, 'GBP': 1}
+
+
+def parse_weights(text):
+    """Parse ``key=weight,key=weight`` into dict."""
+    weights = {}
+    for item in text.split(','):
+        key, _, weight = item.partition('=')
+        weights[key.strip()] = float(weight or 1)
+    return weights
+
+
+class WeightedChoice(object):
+    """Picks keys with probability proportional to their weights."""
+
+    def __init__(self, weights):
+        self.keys = list(weights)
+        self.cumulative = []
+        total = 0.0
+        for key in self.keys:
+            total += weights[key]
+            self.cumulative.append(total)
+
+    def __call__(self, rnd):
+        point = rnd.uniform(0, self.cumulative[-1])
+        return self.keys[bisect.bisect_left(self.cumulative, point)]
+
+
+class LoadTest(object):
+    """Load test state shared by all workers."""
+
+    def __init__(self, base_uri, mix=None, currency_weights=None,
+                 cache_size=128, history_days=365, today=None, seed=0):
+        self.metrics = Metrics()
+        self.clients = {
+            code: NBPClient(code, base_uri=base_uri, cache_size=cache_size,
+                            metrics=self.metrics)
+            for code in (currency_weights or DEFAULT_CURRENCIES)
+        }
+        self.pick_call = WeightedChoice(mix or DEFAULT_MIX)
+        self.pick_currency = WeightedChoice(
+            currency_weights or DEFAULT_CURRENCIES
+        )
+        self.history_days = history_days
+        self.today = today or datetime.today()
+        self.seed = seed
+
+        # Publication days within history (by table)
+        self.days = {}
+        for code in self.clients:
+            table = currencies[code].mid_table
+            if table not in self.days:
+                self.days[table] = [
+                    datetime(day.year, day.month, day.day)
+                    for day in publication_days(
+                        self.today - timedelta(days=history_days),
+                        self.today, table
+                    )
+                ]
+
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _random_date(self, rnd, client):
+        """Return random publication day of ``client``'s table."""
+        table = currencies[client.currency_code].mid_table
+        return rnd.choice(self.days[table])
+
+    def make_call(self, rnd):
+        """Return random call (zero-argument callable)."""
+        client = self.clients[self.pick_currency(rnd)]
+        call = self.pick_call(rnd)
+
+        if call == 'current':
+            return client.current
+        if call == 'last':
+            n = rnd.randint(1, 10)
+            return lambda: client.last(n)
+        if call == 'date':
+            date = self._random_date(rnd, client).strftime('%Y-%m-%d')
+            return lambda: client.date(date)
+
+        start = self._random_date(rnd, client)
+        end = min(start + timedelta(days=rnd.randint(1, 30)), self.today)
+        start, end = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+        return lambda: client.date_range(start, end)
+
+    def timed(self, call):
+        """Run call, record its latency (or error)."""
+        start = time.perf_counter()
+        try:
+            call()
+        except NBPError:
+            with self._lock:
+                self.errors += 1
+            return
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.latencies.append(latency)
+
+    def run_threads(self, workers, duration):
+        """Run ``workers`` threads for ``duration`` seconds."""
+        deadline = time.perf_counter() + duration
+
+        def worker(index):
+            rnd = random.Random(self.seed + index)
+            while time.perf_counter() < deadline:
+                self.timed(self.make_call(rnd))
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def run_asyncio(self, workers, duration):
+        """
+        Run ``workers`` asyncio tasks for ``duration`` seconds.
+
+        Blocking calls are awaited in a pool of ``workers`` threads.
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        deadline = time.perf_counter() + duration
+        loop = asyncio.new_event_loop()
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        async def worker(index):
+            rnd = random.Random(self.seed + index)
+            while time.perf_counter() < deadline:
+                call = self.make_call(rnd)
+                await loop.run_in_executor(executor, self.timed, call)
+
+        async def run():
+            await asyncio.gather(*[worker(index) for index in range(workers)])
+
+        try:
+            loop.run_until_complete(run())
+        finally:
+            executor.shutdown()
+            loop.close()
+
+    def report(self, elapsed):
+        """Return results as dict."""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(int(round(p / 100.0 * len(latencies))) - 1,
+                        len(latencies) - 1)
+            return latencies[max(index, 0)]
+
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'requests_per_second': len(latencies) / elapsed,
+            'latency_p50': percentile(50),
+            'latency_p95': percentile(95),
+            'latency_p99': percentile(99),
+            'cache_hit_ratio': self.metrics.cache_hit_ratio,
+            'api_requests': sum(self.metrics.snapshot()['requests'].values()),
+            'peak_rss_bytes': peak_rss(),
+        }
+
+
+def peak_rss():
+    """Return peak resident set size of current process in bytes."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=('threads', 'asyncio'),
+                        default='threads',
+                        help="run workers as threads, or as asyncio tasks "
+                             "awaiting (blocking) calls in a thread pool")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help="test duration (seconds)")
+    parser.add_argument('--mix', type=parse_weights,
+                        default=DEFAULT_MIX, help="e.g. current=1,date=4")
+    parser.add_argument('--currencies', type=parse_weights,
+                        default=DEFAULT_CURRENCIES, help="e.g. EUR=5,USD=3")
+    parser.add_argument('--cache-size', type=int, default=128)
+    parser.add_argument('--base-uri',
+                        help="API to test against (default: local stand-in)")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="latency of local stand-in (seconds)")
+    parser.add_argument('--output', help="save results to JSON file")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_uri = args.base_uri
+    if base_uri is None:
+        server = MockAPIServer(latency=args.latency).start()
+        base_uri = server.base_uri
+
+    try:
+        test = LoadTest(base_uri, args.mix, args.currencies, args.cache_size)
+        start = time.perf_counter()
+        if args.mode == 'threads':
+            test.run_threads(args.workers, args.duration)
+        else:
+            test.run_asyncio(args.workers, args.duration)
+        results = test.report(time.perf_counter() - start)
+    finally:
+        if server is not None:
+            server.stop()
+
+    results.update(mode=args.mode, workers=args.workers)
+    for key, value in sorted(results.items()):
+        print("{:<22} {}".format(key, value))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Benchmarks of NBPy hot paths.
+
+Measures JSON -> ``NBPExchangeRate`` throughput (``Decimal`` vs ``float``),
+``validate_date`` cost, LRU cache hit latency, bulk conversion throughput,
+memory used by 10k exchange rates, size and round-trip throughput of 10k rates
+pickled vs encoded with ``nbpy.serialization`` and ``import nbpy`` time. All
+API responses are synthetic (see ``tests/mock_api_helpers.py``) and served from
+memory, so results don't depend on network.
+
+Usage (from repository root)::
+
+    $ python -m benchmarks.run --output before.json
+    $ python -m benchmarks.run --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import nbpy
+from nbpy import NBPClient
+from nbpy.currencies import currencies
+from nbpy import serialization
+from nbpy.exchange_rate import NBPExchangeRate
+from nbpy.transport import Transport, TransportResponse
+from nbpy.utils import validate_date
+from tests.mock_api_helpers import MockJSONData
+
+
+#: Registered benchmarks: name -> (function, unit, higher_is_better)
+BENCHMARKS = {}
+
+
+def benchmark(name, unit, higher_is_better=True):
+    """Register benchmark function (returning measured value)."""
+    def register(func):
+        BENCHMARKS[name] = (func, unit, higher_is_better)
+        return func
+    return register
+
+
+class MemoryTransport(Transport):
+    """Transport serving the same body for every call."""
+
+    def __init__(self, body):
+        self.body = body
+
+    def get(self, uri, headers=None):
+        return TransportResponse(200, {}, self.body)
+
+
+def _best_time(func, number, repeat=5):
+    """Return best time (in seconds) of a single ``func()`` call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def _range_payload(days=93):
+    """JSON body of a 93-day date_range() response for EUR."""
+    end = datetime(2017, 10, 31)
+    return json.dumps(
+        MockJSONData(currencies['EUR']).date_range(
+            end - timedelta(days=days - 1), end
+        )
+    )
+
+
+def _construct_throughput(as_float):
+    client = NBPClient('EUR', as_float=as_float, cache_size=0,
+                       transport=MemoryTransport(_range_payload()))
+    seconds = _best_time(
+        lambda: client.date_range('2017-07-31', '2017-10-31'), number=50
+    )
+    return 93 / seconds
+
+
+@benchmark('construct_decimal', 'rates/s')
+def construct_decimal():
+    """JSON -> NBPExchangeRate throughput with Decimal values."""
+    return _construct_throughput(as_float=False)
+
+
+@benchmark('construct_float', 'rates/s')
+def construct_float():
+    """JSON -> NBPExchangeRate throughput with float values."""
+    return _construct_throughput(as_float=True)
+
+
+@benchmark('validate_date_str', 'us/call', higher_is_better=False)
+def validate_date_str():
+    """Cost of validate_date() for date strings."""
+    return _best_time(lambda: validate_date('2017-10-31'), number=10000) * 1e6
+
+
+@benchmark('validate_date_datetime', 'us/call', higher_is_better=False)
+def validate_date_datetime():
+    """Cost of validate_date() for datetime objects."""
+    date = datetime(2017, 10, 31)
+    return _best_time(lambda: validate_date(date), number=10000) * 1e6
+
+
+@benchmark('cache_hit', 'us/call', higher_is_better=False)
+def cache_hit():
+    """Latency of API call answered from LRU cache."""
+    client = NBPClient('EUR', transport=MemoryTransport(_range_payload()))
+    client.date_range('2017-07-31', '2017-10-31')
+    return _best_time(
+        lambda: client.date_range('2017-07-31', '2017-10-31'), number=10000
+    ) * 1e6
+
+
+@benchmark('convert_bulk', 'conversions/s')
+def convert_bulk():
+    """Throughput of converting 10k amounts with a single rate."""
+    rate = NBPExchangeRate('EUR', '2017-10-31', mid=Decimal('4.2498'))
+    rnd = random.Random(0)
+    amounts = [Decimal('{:.2f}'.format(rnd.uniform(0, 10000)))
+               for _ in range(10000)]
+
+    def convert():
+        for amount in amounts:
+            rate * amount
+
+    return len(amounts) / _best_time(convert, number=5)
+
+
+@benchmark('memory_10k_rates', 'bytes', higher_is_better=False)
+def memory_10k_rates():
+    """Memory allocated by 10k NBPExchangeRate objects (Decimal values)."""
+    start = datetime(2000, 1, 1)
+    values = [Decimal('4.{:04d}'.format(i % 10000)) for i in range(10000)]
+    dates = [start + timedelta(days=i) for i in range(10000)]
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        rates = [NBPExchangeRate('EUR', date, mid=value)
+                 for date, value in zip(dates, values)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    assert len(rates) == 10000
+    return sum(stat.size_diff for stat in after.compare_to(before, 'lineno'))
+
+
+def _10k_rates():
+    """10k NBPExchangeRate objects of a single currency (Decimal values)."""
+    start = datetime(2000, 1, 1)
+    return [
+        NBPExchangeRate('EUR', start + timedelta(days=i),
+                        mid=Decimal('4.{:04d}'.format(i % 10000)))
+        for i in range(10000)
+    ]
+
+
+@benchmark('pickle_10k_rates', 'bytes', higher_is_better=False)
+def pickle_10k_rates():
+    """Size of pickled list of 10k exchange rates."""
+    return len(pickle.dumps(_10k_rates(), pickle.HIGHEST_PROTOCOL))
+
+
+@benchmark('pickle_round_trip', 'rates/s')
+def pickle_round_trip():
+    """Throughput of pickling and unpickling list of 10k exchange rates."""
+    rates = _10k_rates()
+    seconds = _best_time(
+        lambda: pickle.loads(pickle.dumps(rates, pickle.HIGHEST_PROTOCOL)),
+        number=5
+    )
+    return len(rates) / seconds
+
+
+@benchmark('series_10k_rates', 'bytes', higher_is_better=False)
+def series_10k_rates():
+    """Size of 10k exchange rates encoded by nbpy.serialization."""
+    return len(serialization.dumps(_10k_rates()))
+
+
+@benchmark('series_round_trip', 'rates/s')
+def series_round_trip():
+    """Throughput of encoding and decoding 10k exchange rates."""
+    rates = _10k_rates()
+    seconds = _best_time(
+        lambda: serialization.loads(serialization.dumps(rates)), number=5
+    )
+    return len(rates) / seconds
+
+
+def _process_time(code, repeat=10):
+    """Best wall time (seconds) of a fresh interpreter running ``code``."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call([sys.executable, '-c', code])
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+@benchmark('import_time', 'ms', higher_is_better=False)
+def import_time():
+    """Time of ``import nbpy`` (over bare interpreter startup)."""
+    return (_process_time('import nbpy') - _process_time('pass')) * 1e3
+
+
+def run(names=None):
+    """Run benchmarks, return results as dict (JSON serializable)."""
+    results = {}
+    for name in sorted(names or BENCHMARKS):
+        func, unit, higher_is_better = BENCHMARKS[name]
+        results[name] = {
+            'value': func(),
+            'unit': unit,
+            'higher_is_better': higher_is_better,
+        }
+
+    return {
+        'nbpy_version': nbpy.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Print comparison of two result sets, return names of regressions.
+
+    Regression is a change for the worse by more than ``threshold``
+    (e.g. ``0.1`` for 10%).
+    """
+    regressions = []
+    print("{:<24} {:>16} {:>16} {:>8}".format(
+        'benchmark', 'baseline', 'current', 'change'
+    ))
+    for name, result in sorted(current['results'].items()):
+        if name not in baseline['results']:
+            continue
+        old, new = baseline['results'][name]['value'], result['value']
+        change = (new - old) / old if old else 0.0
+        worse = -change if result['higher_is_better'] else change
+        if worse > threshold:
+            regressions.append(name)
+        print("{:<24} {:>16.2f} {:>16.2f} {:>+7.1%}{}".format(
+            name, old, new, change, ' !' if worse > threshold else ''
+        ))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('names', nargs='*', help="benchmarks to run")
+    parser.add_argument('--output', help="save results to JSON file")
+    parser.add_argument('--compare', help="compare with saved JSON results")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative change treated as regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.names)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    else:
+        for name, result in sorted(results['results'].items()):
+            print("{:<24} {:>16.2f} {}".format(
+                name, result['value'], result['unit']
+            ))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
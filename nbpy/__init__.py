@@ -1,32 +1,29 @@
 """NBPy package."""
 
 import sys
+import time
 import warnings
-import requests
-from decimal import Decimal
-from functools import lru_cache
 from .version import version as __version__
 from .errors import UnknownCurrencyCode, BidAskUnavailable, APIError
-from .utils import validate_date, first_if_sequence
+from .utils import validate_date, parse_date, first_if_sequence
+from .business_days import previous_publication_day
 from .currencies import currencies
 from .exchange_rate import NBPExchangeRate
+from .api import BASE_URI, NBPBaseClient, iter_windows
 
 
-__all__ = ('NBPClient',)
+__all__ = ('NBPClient', 'iter_ranges')
 
 
 if not sys.version_info >= (3, 3):
     warnings.warn("NBPy supports only Python 3.3 and above.")
 
-#: Base URI
-BASE_URI = "http://api.nbp.pl/api"
 
-
-class NBPClient(object):
+class NBPClient(NBPBaseClient):
     """NBP Web API client."""
 
     # Template URI for NBP API calls
-    _uri_template = BASE_URI + "/exchangerates/rates/{table}/{code}/{tail}"
+    _uri_template = "{base_uri}/exchangerates/rates/{table}/{code}/{tail}"
 
     def __init__(self, currency_code, **kwargs):
         r"""
@@ -48,25 +45,22 @@ class NBPClient(object):
               Default: ``False``.
             * *cache_size* (``int``) --
               LRU cache size for API calls. Default: ``128``.
+            * *archive* (``nbpy.archive.RateArchive`` or ``str``) --
+              Rate archive (or path to it) used as a read-only backend
+              instead of API. Default: ``None``.
         """
-        self.currency_code = currency_code
-
-        #: If True, values will be floats instead of decimals.
-        self.as_float = kwargs.get('as_float', False)
-
-        #: If True, instead of raising APIErrors return None
-        self.suppress_errors = kwargs.get('suppress_errors', False)
+        super().__init__(**kwargs)
 
-        #: Max size for LRU cache.
-        self._cache_size = kwargs.get('cache_size', 128)
-
-        # Proxy settings (for requests)
-        self._proxy_url = kwargs.get('proxy_url', None)  # should have url:port format
-        self._proxy_secure_url = kwargs.get('proxy_https_url', None)
-        self._proxy_secure = kwargs.get('proxy_is_https', False)
+        self.currency_code = currency_code
+        # Index of by_table_number() results, if client has no table_index
+        self._private_index = None
 
-        cache_decorator = lru_cache(maxsize=self.cache_size)
-        self._get_response_data = cache_decorator(self._get_response_data)
+        # Offline archive used instead of API
+        archive = kwargs.get('archive', None)
+        if isinstance(archive, str):
+            from .archive import RateArchive
+            archive = RateArchive(archive)
+        self._archive = archive
 
     def __repr__(self):
         """Return repr(self)."""
@@ -90,18 +84,29 @@ class NBPClient(object):
             raise UnknownCurrencyCode(code)
         self._currency_code = code
 
-    @property
-    def cache_size(self):
-        """Read-only LRU cache size."""
-        return self._cache_size
+    def _table(self, bid_ask=False):
+        """Return table with rates of currency, ``None`` if unavailable."""
+        currency = currencies[self.currency_code]
+        if bid_ask:
+            return 'C' if currency.has_bid_ask else None
+        return currency.mid_table
+
+    def _is_window_published(self, start_date, end_date, bid_ask=False):
+        """Return True if currency's table was published in date range."""
+        table = self._table(bid_ask)
+        if table is None:
+            # Let API call raise BidAskUnavailable
+            return True
+        return self._is_published(table, start_date, end_date)
 
     def _get_response_data(self, uri_tail, bid_ask=False):
         """Return HTTP response data from API call."""
-        table = currencies[self.currency_code].tables.copy()
+        currency = currencies[self.currency_code]
 
         if bid_ask:
             # Only bid/ask rates
-            if 'C' not in table:
+            if not currency.has_bid_ask:
+                self.metrics.record_error(BidAskUnavailable.__name__)
                 if self.suppress_errors:
                     # Return None if errors suppressed
                     return None
@@ -112,46 +117,42 @@ class NBPClient(object):
             table = 'C'
         else:
             # Only mid rate
-            table.discard('C')
-            table = table.pop()
+            table = currency.mid_table
+
+        if self._archive is not None:
+            # Read-only offline backend
+            try:
+                return self._archive.resolve(
+                    self.currency_code, uri_tail, bid_ask, self.as_float
+                )
+            except APIError:
+                if self.suppress_errors:
+                    return None
+                raise
 
         uri = self._uri_template.format(
+            base_uri=self.base_uri,
             code=self.currency_code.lower(),
             table=table.lower(),
             tail=uri_tail.lower()
         )
 
-        if self._proxy_url is not None:
-            proxy_dict = {'http': self._proxy_url, }
-            if self._proxy_secure:
-                if self._proxy_secure_url is not None:
-                    proxy_dict['https'] = self._proxy_secure_url
-                else:
-                    proxy_dict['https'] = proxy_dict['http'].replace('http', 'https')
-        else:
-            proxy_dict = None
-
         # Send request to API, raise exception on error
         try:
-            headers = {'Accept': 'application/json'}
-            r = requests.get(uri, headers=headers, proxies=proxy_dict)
-            r.raise_for_status()
-        except Exception as e:
+            rates = self._request(uri, context={
+                'currency': self.currency_code, 'table': table,
+                'uri_tail': uri_tail
+            })['rates']
+        except APIError:
             if self.suppress_errors:
                 # Return None if errors suppressed
                 return None
-            raise APIError(str(e))
-
-        # Parse data with values as decimals
-        if self.as_float:
-            parse_float_cls = float
-        else:
-            parse_float_cls = Decimal
+            raise
 
-        rates = r.json(parse_float=parse_float_cls)['rates']
+        start = time.perf_counter()
         rates = {rate['effectiveDate']: rate for rate in rates}
 
-        return sorted([
+        rates = sorted([
             NBPExchangeRate(
                 currency_code=self.currency_code,
                 date=rate['effectiveDate'],
@@ -159,6 +160,24 @@ class NBPClient(object):
             ) for rate in rates.values()
         ], key=lambda r: r.date)
 
+        if self.hooks.enabled:
+            self.hooks.emit('after_construct', client=self,
+                            currency=self.currency_code, table=table,
+                            uri_tail=uri_tail, rows=len(rates),
+                            duration=time.perf_counter() - start)
+        return rates
+
+    def _cache_context(self, key):
+        """Return context of cache events for LRU cache ``key``."""
+        uri_tail, bid_ask = key[0], key[1] if len(key) > 1 else False
+        return {'currency': self.currency_code, 'table': self._table(bid_ask),
+                'uri_tail': uri_tail}
+
+    def _index(self, rates, uri_tail, bid_ask=False):
+        """Put ``rates`` in ``table_index`` under their table numbers."""
+        self.table_index.add_rates(self._table(bid_ask), rates,
+                                   scope=self._index_scope)
+
     @first_if_sequence
     def current(self, bid_ask=False):
         """Return earliest available exchange rate."""
@@ -179,16 +198,159 @@ class NBPClient(object):
         """Return exchange rate from ``date``."""
         validate_date(date)
 
+        if not self._is_window_published(date, date, bid_ask):
+            return self._not_published(date)
         return self._get_response_data(date, bid_ask)
 
+    def as_of(self, date, bid_ask=False):
+        """
+        Return exchange rate in effect on ``date``.
+
+        That is rate from the last table published up to ``date``
+        (inclusive), e.g. from Friday for Sunday.
+        """
+        validate_date(date)
+
+        table = self._table(bid_ask)
+        day = previous_publication_day(parse_date(date), table or 'A')
+        if day is None:
+            return self._not_published(date)
+        return self.date(day.strftime("%Y-%m-%d"), bid_ask)
+
     def date_range(self, start_date, end_date, bid_ask=False):
         """Return exchange rates from ``start_date`` to ``end_date``."""
         validate_date(start_date)
         validate_date(end_date)
 
         uri_tail = "{}/{}".format(start_date, end_date)
+        if not self._is_window_published(start_date, end_date, bid_ask):
+            return self._not_published(uri_tail)
         return self._get_response_data(uri_tail, bid_ask)
 
+    def iter_range(self, start_date, end_date, bid_ask=False,
+                   skip_missing=True):
+        """
+        Iterate over exchange rates from ``start_date`` to ``end_date``.
+
+        Unlike ``date_range()``, range length is not limited. Range is split
+        into API-sized windows, fetched one by one while the next window is
+        prefetched in background. Windows bypass LRU cache, so memory usage
+        doesn't depend on range length. Windows without rates (404, e.g.
+        before currency was introduced) are skipped, unless ``skip_missing``
+        is ``False``.
+        """
+        validate_date(start_date)
+        validate_date(end_date)
+
+        return iter_windows([self], start_date, end_date, args=(bid_ask,),
+                            skip_missing=skip_missing)
+
+    def aggregate(self, start_date, end_date, period='month', how='mean',
+                  field='mid'):
+        """
+        Return rates from ``start_date`` to ``end_date`` aggregated by period.
+
+        Range is fetched in windows aligned to calendar quarters (through
+        LRU cache, so repeated and overlapping reports reuse them) and
+        aggregated in a single streaming pass. Means of ``Decimal`` rates
+        are computed from exact sums.
+
+        :param period:
+            ``week``, ``month``, ``quarter`` or ``year``.
+
+        :param how:
+            ``mean``, ``min``, ``max``, ``first``, ``last`` or ``count``.
+
+        :param field:
+            ``mid``, ``bid`` or ``ask``.
+
+        :return:
+            List of ``nbpy.aggregate.Aggregate(start, end, count, value)``
+            for every period with any rates. Bounds of first and last
+            periods are clamped to the range.
+        """
+        from .aggregate import aggregate
+
+        validate_date(start_date)
+        validate_date(end_date)
+
+        rates = iter_windows([self], start_date, end_date,
+                             args=(field != 'mid',), cached=True, align=True)
+        return list(aggregate(rates, period, how, field, start_date,
+                              end_date))
+
+    def by_table_number(self, no):
+        """
+        Return exchange rate from table number ``no`` (e.g. ``211/A/NBP/2017``).
+
+        Answers from ``table_index`` if the table (or currency's rate from
+        it) was fetched before. Otherwise tables around expected effective
+        date of ``no`` are fetched with a single table-level call (and
+        indexed). Clients without ``table_index`` index these tables in a
+        private index, so they are fetched once as well. Bid/ask rates are
+        returned for tables C.
+        """
+        from .table_index import TableIndex, parse_table_number, \
+            search_window
+        from .tables import NBPTableClient
+
+        table, year, number = parse_table_number(no)
+        no = "{:03d}/{}/NBP/{:d}".format(number, table, year)
+
+        index = self.table_index
+        if index is None:
+            if self._private_index is None:
+                self._private_index = TableIndex()
+            index = self._private_index
+        exchange_table = index.get(no, self.currency_code,
+                                   scope=self._index_scope)
+        if exchange_table is None:
+            client = NBPTableClient(
+                table, as_float=self.as_float, cache_size=0,
+                cache=self._cache, base_uri=self.base_uri,
+                transport=self.transport, metrics=self.metrics,
+                hooks=self.hooks, calendar=self.calendar,
+                table_index=index
+            )
+            try:
+                exchange_tables = client.date_range(*search_window(no))
+            except APIError as e:
+                if e.status_code != 404:
+                    if self.suppress_errors:
+                        return None
+                    raise
+                exchange_tables = None
+            exchange_table = next((
+                exchange_table for exchange_table in exchange_tables or ()
+                if exchange_table.no == no
+            ), None)
+
+        if exchange_table is None or self.currency_code not in exchange_table:
+            return self._not_published(no)
+        return exchange_table[self.currency_code]
+
     def __call__(self, bid_ask=False):
         """Return ``self.current()``."""
         return self.current(bid_ask)
+
+
+def iter_ranges(currency_codes, start_date, end_date, bid_ask=False,
+                skip_missing=True, **kwargs):
+    r"""
+    Iterate over exchange rates for many currencies.
+
+    Works like ``NBPClient.iter_range()``, but for each window yields rates
+    for all ``currency_codes`` (in given order) before moving to the next one.
+    Windows for all currencies are fetched concurrently. Currencies without
+    rates in a window (e.g. withdrawn ones) are skipped in it, unless
+    ``skip_missing`` is ``False``.
+
+    :param \**kwargs:
+        Keyword arguments passed to each ``NBPClient``.
+    """
+    validate_date(start_date)
+    validate_date(end_date)
+
+    clients = [NBPClient(code, **kwargs) for code in currency_codes]
+    return iter_windows(clients, start_date, end_date, args=(bid_ask,),
+                        skip_missing=skip_missing)
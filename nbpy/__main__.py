@@ -0,0 +1,177 @@
+"""
+Command line interface of NBPy (installed as ``nbpy`` command as well).
+
+Usage::
+
+    $ python -m nbpy serve --port 8080 --shared-cache /var/cache/nbpy.db
+    $ python -m nbpy backfill --store rates.db --checkpoint backfill.log
+    $ python -m nbpy export --currencies EUR USD --start 2010-01-01 \
+        --end 2017-12-31 --output rates.parquet
+"""
+
+import argparse
+import os
+import sys
+
+
+def serve(args):
+    """Run caching proxy of NBP Web API."""
+    from nbpy.server import CachingProxy, ProxyServer
+
+    kwargs = {}
+    if args.shared_cache:
+        from nbpy.cache import SharedCache
+        kwargs['cache'] = SharedCache(args.shared_cache)
+
+    proxy = CachingProxy(upstream=args.upstream, cache_size=args.cache_size,
+                         ttl=args.ttl, **kwargs)
+    server = ProxyServer(proxy, host=args.host, port=args.port,
+                         prefix=args.prefix, quiet=args.quiet)
+    print("Serving NBP Web API proxy of {} at {}".format(
+        proxy.client.base_uri, server.base_uri
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def backfill(args):
+    """Fetch history of exchange rates into store, resuming from checkpoint."""
+    from nbpy.backfill import Backfill, JSONLinesSink, plan
+
+    # Plan first, so invalid arguments don't leave empty files behind
+    tasks = plan(currency_codes=args.currencies, tables=args.tables,
+                 start_date=args.start, end_date=args.end)
+    if args.jsonl:
+        sink = JSONLinesSink(args.jsonl)
+    else:
+        from nbpy.store import RateStore
+        sink = RateStore(args.store)
+
+    runner = Backfill(sink, checkpoint=args.checkpoint,
+                      concurrency=args.concurrency,
+                      rate_limit=args.rate_limit, base_uri=args.upstream)
+    try:
+        stats = runner.run(tasks)
+    finally:
+        sink.close()
+        if runner.checkpoint is not None:
+            runner.checkpoint.close()
+    print("Fetched {tasks:d} windows ({skipped:d} done before), "
+          "{rows:d} rates".format(**stats))
+    return 0
+
+
+def export(args):
+    """Export exchange rates to CSV, JSON Lines or Parquet file."""
+    from nbpy.export import export as export_rates
+
+    count = export_rates(args.currencies, args.start, args.end, args.output,
+                         fmt=args.format, table=args.table,
+                         concurrency=args.concurrency,
+                         base_uri=args.upstream)
+    if args.output != '-':
+        print("Exported {:d} rates to {}".format(count, args.output))
+    return 0
+
+
+def build_parser():
+    """Return argument parser with all subcommands."""
+    from nbpy.api import BASE_URI
+
+    prog = os.path.basename(sys.argv[0])
+    if prog == '__main__.py':
+        prog = 'python -m nbpy'
+    parser = argparse.ArgumentParser(prog=prog,
+                                     description="NBP Web API tools.")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    parser_serve = commands.add_parser(
+        'serve', help="run caching proxy of NBP Web API"
+    )
+    parser_serve.add_argument('--host', default='127.0.0.1')
+    parser_serve.add_argument('--port', type=int, default=8080)
+    parser_serve.add_argument('--prefix', default='/api',
+                              help="path prefix of served API")
+    parser_serve.add_argument('--upstream', default=BASE_URI,
+                              help="base URI of upstream API")
+    parser_serve.add_argument('--cache-size', type=int, default=4096,
+                              help="max number of responses kept in memory")
+    parser_serve.add_argument('--ttl', type=float, default=60.0,
+                              help="cache time of current/last calls "
+                                   "(seconds)")
+    parser_serve.add_argument('--shared-cache', metavar='PATH',
+                              help="SQLite cache of past responses, shared "
+                                   "by processes and kept across restarts")
+    parser_serve.add_argument('--quiet', action='store_true',
+                              help="don't log requests")
+    parser_serve.set_defaults(func=serve)
+
+    parser_backfill = commands.add_parser(
+        'backfill', help="fetch history of exchange rates"
+    )
+    sinks = parser_backfill.add_mutually_exclusive_group()
+    sinks.add_argument('--store', metavar='PATH', default='nbpy.db',
+                       help="SQLite rate store to write to")
+    sinks.add_argument('--jsonl', metavar='PATH',
+                       help="JSON Lines file to append to")
+    parser_backfill.add_argument('--checkpoint', metavar='PATH',
+                                 help="file of finished requests, to resume "
+                                      "interrupted backfill")
+    parser_backfill.add_argument('--currencies', nargs='+', metavar='CODE',
+                                 help="currencies (default: all)")
+    parser_backfill.add_argument('--tables', nargs='+', default=['A', 'B', 'C'],
+                                 choices=['A', 'B', 'C'])
+    parser_backfill.add_argument('--start',
+                                 help="first date (YYYY-MM-DD, default: "
+                                      "first date available in API)")
+    parser_backfill.add_argument('--end', help="last date (default: today)")
+    parser_backfill.add_argument('--concurrency', type=int, default=4,
+                                 help="max number of concurrent requests")
+    parser_backfill.add_argument('--rate-limit', type=float, default=10.0,
+                                 help="max requests per second")
+    parser_backfill.add_argument('--upstream', default=BASE_URI,
+                                 help="base URI of API")
+    parser_backfill.set_defaults(func=backfill)
+
+    parser_export = commands.add_parser(
+        'export', help="export exchange rates to CSV, JSON Lines or Parquet"
+    )
+    parser_export.add_argument('--currencies', nargs='+', metavar='CODE',
+                               help="currencies (default: all from table)")
+    parser_export.add_argument('--table', default='A', choices=['A', 'B', 'C'],
+                               help="A, B (mid rates) or C (bid/ask rates)")
+    parser_export.add_argument('--start', required=True,
+                               help="first date (YYYY-MM-DD)")
+    parser_export.add_argument('--end', required=True,
+                               help="last date (YYYY-MM-DD)")
+    parser_export.add_argument('--format', choices=['csv', 'jsonl', 'parquet'],
+                               help="output format (default: from extension "
+                                    "of output file)")
+    parser_export.add_argument('--output', default='-', metavar='PATH',
+                               help="output file (default: standard output)")
+    parser_export.add_argument('--concurrency', type=int, default=4,
+                               help="number of windows fetched at once")
+    parser_export.add_argument('--upstream', default=BASE_URI,
+                               help="base URI of API")
+    parser_export.set_defaults(func=export)
+
+    return parser
+
+
+def main(argv=None):
+    from nbpy.errors import UnknownCurrencyCode
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except UnknownCurrencyCode as e:
+        parser.error("unknown currency code: {}".format(e))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
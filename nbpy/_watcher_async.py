@@ -0,0 +1,56 @@
+"""
+Async iterator of ``RateWatcher`` updates.
+
+Kept apart from ``nbpy.watcher`` (and imported only by
+``RateWatcher.updates()``), as it needs Python 3.5+ syntax.
+"""
+
+import asyncio
+
+
+__all__ = ('UpdateStream',)
+
+# Marks end of stream
+_CLOSED = object()
+
+
+class UpdateStream(object):
+    """Async iterator over ``TableUpdate`` objects of a watcher."""
+
+    def __init__(self, watcher, loop=None):
+        """
+        Subscribe to ``watcher``.
+
+        :param loop:
+            Event loop iterating stream. Default: current event loop.
+        """
+        self.watcher = watcher
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._closed = False
+        watcher.subscribe(self._push)
+
+    def _push(self, item):
+        """Pass item from polling thread to event loop."""
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def close(self):
+        """Unsubscribe, ending iteration after queued updates."""
+        if self._closed:
+            return
+        self._closed = True
+        self.watcher.unsubscribe(self._push)
+        self._push(_CLOSED)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self._queue.get()
+        if item is _CLOSED:
+            raise StopAsyncIteration
+        return item
@@ -0,0 +1,136 @@
+"""
+Aggregation of exchange rates by calendar periods.
+
+``aggregate()`` consumes rates (sorted by date, e.g. from
+``NBPClient.iter_range()``) in a single streaming pass, keeping only
+running totals of the current period. With ``Decimal`` rates sums are
+exact, and so are ``min``, ``max``, ``first`` and ``last``.
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from nbpy.utils import parse_date
+
+
+__all__ = ('Aggregate', 'aggregate', 'period_bounds', 'PERIODS', 'HOW')
+
+#: Available periods.
+PERIODS = ('week', 'month', 'quarter', 'year')
+
+#: Available aggregations.
+HOW = ('mean', 'min', 'max', 'first', 'last', 'count')
+
+#: Aggregated value for period ``[start, end]`` from ``count`` rates.
+Aggregate = namedtuple('Aggregate', ('start', 'end', 'count', 'value'))
+
+
+def period_bounds(date, period='month'):
+    """Return first and last day (``datetime``) of ``period`` with ``date``."""
+    date = datetime(date.year, date.month, date.day)
+    if period == 'week':
+        start = date - timedelta(days=date.weekday())
+        return start, start + timedelta(days=6)
+    if period == 'month':
+        start_month = end_month = date.month
+    elif period == 'quarter':
+        start_month = (date.month - 1) // 3 * 3 + 1
+        end_month = start_month + 2
+    elif period == 'year':
+        start_month, end_month = 1, 12
+    else:
+        raise ValueError("Unknown period {}".format(period))
+
+    start = datetime(date.year, start_month, 1)
+    if end_month == 12:
+        end = datetime(date.year, 12, 31)
+    else:
+        end = datetime(date.year, end_month + 1, 1) - timedelta(days=1)
+    return start, end
+
+
+class _Accumulator(object):
+    """Running totals of a single period."""
+
+    def __init__(self, start, end, value):
+        self.start, self.end = start, end
+        self.count = 1
+        self.total = self.min = self.max = self.first = self.last = value
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def result(self, how):
+        if how == 'mean':
+            value = self.total / self.count
+        elif how == 'count':
+            value = self.count
+        else:
+            value = getattr(self, how)
+        return Aggregate(self.start, self.end, self.count, value)
+
+
+def aggregate(rates, period='month', how='mean', field='mid',
+              start_date=None, end_date=None):
+    """
+    Yield ``Aggregate`` for every period with any rates.
+
+    If range ``[start_date, end_date]`` is given, rates from outside of it
+    are skipped, and bounds of partially covered (first and last) periods
+    are clamped to it. Otherwise, aggregates span whole periods.
+
+    :param rates:
+        Iterable of ``NBPExchangeRate`` objects, sorted by date.
+
+    :param period:
+        ``week``, ``month``, ``quarter`` or ``year``.
+
+    :param how:
+        ``mean``, ``min``, ``max``, ``first``, ``last`` or ``count``.
+
+    :param field:
+        ``mid``, ``bid`` or ``ask``.
+
+    :param start_date:
+        First day of range (``datetime`` or date string).
+
+    :param end_date:
+        Last day of range (``datetime`` or date string).
+    """
+    if period not in PERIODS:
+        raise ValueError("Unknown period {}".format(period))
+    if how not in HOW:
+        raise ValueError("Unknown aggregation {}".format(how))
+    if start_date is not None:
+        start_date = parse_date(start_date)
+    if end_date is not None:
+        end_date = parse_date(end_date)
+
+    current = None
+    for rate in rates:
+        if start_date is not None and rate.date < start_date:
+            continue
+        if end_date is not None and rate.date > end_date:
+            break
+        value = getattr(rate, field)
+        if current is not None and rate.date <= current.end:
+            current.add(value)
+            continue
+
+        if current is not None:
+            yield current.result(how)
+        start, end = period_bounds(rate.date, period)
+        if start_date is not None:
+            start = max(start, start_date)
+        if end_date is not None:
+            end = min(end, end_date)
+        current = _Accumulator(start, end, value)
+
+    if current is not None:
+        yield current.result(how)
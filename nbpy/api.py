@@ -0,0 +1,416 @@
+"""Common base for NBP Web API clients."""
+
+import json
+import threading
+import time
+from decimal import Decimal
+from nbpy.errors import APIError
+from nbpy.business_days import _to_date, has_publication_day
+from nbpy.cache import LRUCache
+from nbpy.hooks import Hooks, global_hooks
+from nbpy.metrics import Metrics, global_metrics, endpoint_name
+from nbpy.utils import MAX_DAYS_IN_RANGE, date_windows, is_final
+from nbpy.transport import RequestsTransport
+
+
+__all__ = ('BASE_URI', 'NBPBaseClient', 'iter_windows')
+
+#: Base URI
+BASE_URI = "http://api.nbp.pl/api"
+
+# Context of events of calls made outside of clients' API methods
+_NO_CONTEXT = {'currency': None, 'table': None, 'uri_tail': None}
+
+
+class NBPBaseClient(object):
+    """Holds settings and HTTP handling shared by NBP Web API clients."""
+
+    #: Max number of days in date range call.
+    max_days = MAX_DAYS_IN_RANGE
+
+    def __init__(self, **kwargs):
+        r"""
+        Initialize common settings.
+
+        :param \**kwargs:
+            See below.
+
+        :Keyword Arguments:
+            * *as_float* (``bool``) --
+              If ``True``, all exchange rates will be returned as ``float``s,
+              otherwise as ``decimal.Decimal``. Default: ``False``.
+            * *suppress_errors* (``bool``) --
+              If ``True``, all ``BidAskUnavailable``s and ``APIError``s are
+              suppressed and instead all API calls returns ``None``.
+              Default: ``False``.
+            * *cache_size* (``int``) --
+              LRU cache size for API calls. Default: ``128``.
+            * *cache* (``nbpy.cache.SharedCache``) --
+              Cache of API responses shared with other processes, used
+              beneath LRU cache for calls which can't change anymore (for
+              past dates). Default: ``None``.
+            * *base_uri* (``str``) --
+              Base URI of API (e.g. local stand-in or caching proxy).
+              Default: ``nbpy.BASE_URI``.
+            * *transport* (``nbpy.transport.Transport``) --
+              Transport used for all API calls. Default: ``RequestsTransport``
+              (with proxy settings).
+            * *metrics* (``nbpy.metrics.Metrics``) --
+              Metrics registry for client. Default: new registry, propagating
+              to ``nbpy.metrics.global_metrics``.
+            * *hooks* (``nbpy.hooks.Hooks``) --
+              Event hooks for client. Default: new registry, propagating
+              to ``nbpy.hooks.global_hooks``.
+            * *calendar* (``bool``) --
+              If ``True``, calls for dates without published tables (see
+              ``nbpy.business_days``) fail (with 404 ``APIError``) without
+              calling API. Default: ``True``.
+            * *revalidate* (``int``) --
+              Max number of parsed responses kept with their ``ETag`` and
+              ``Last-Modified`` validators for conditional requests, ``0``
+              to disable them. Default: ``128``.
+            * *ttl* (``float``) --
+              Time (in seconds) after which LRU-cached results of calls
+              which can still change (``current``, ``today``, ``last`` and
+              ranges up to today) expire, so they are revalidated with API.
+              ``None`` keeps them until evicted. Default: ``60``.
+            * *table_index* (``nbpy.table_index.TableIndex``) --
+              Index of fetched tables by table number (e.g.
+              ``nbpy.table_index.global_index``). Default: ``None`` (results
+              aren't indexed).
+        """
+        #: If True, values will be floats instead of decimals.
+        self.as_float = kwargs.get('as_float', False)
+
+        #: If True, instead of raising APIErrors return None
+        self.suppress_errors = kwargs.get('suppress_errors', False)
+
+        #: If True, dates without tables are answered locally.
+        self.calendar = kwargs.get('calendar', True)
+
+        #: Max size for LRU cache.
+        self._cache_size = kwargs.get('cache_size', 128)
+
+        #: Shared cache for API responses.
+        self._cache = kwargs.get('cache', None)
+
+        # Proxy settings (for requests)
+        self._proxy_url = kwargs.get('proxy_url', None)  # should have url:port format
+        self._proxy_secure_url = kwargs.get('proxy_https_url', None)
+        self._proxy_secure = kwargs.get('proxy_is_https', False)
+
+        #: Base URI of API.
+        self.base_uri = kwargs.get('base_uri', BASE_URI).rstrip('/')
+
+        #: Transport used for API calls.
+        self.transport = kwargs.get('transport', None)
+        if self.transport is None:
+            self.transport = RequestsTransport(proxies=self._proxies())
+
+        #: Metrics (requests, latency, cache, errors etc.)
+        self.metrics = kwargs.get('metrics', None)
+        if self.metrics is None:
+            self.metrics = Metrics(parent=global_metrics)
+
+        #: Event hooks (tracing, profiling)
+        self.hooks = kwargs.get('hooks', None)
+        if self.hooks is None:
+            self.hooks = Hooks(parent=global_hooks)
+
+        #: Fetched tables by table number (None if not indexed)
+        self.table_index = kwargs.get('table_index', None)
+
+        #: Parsed responses with validators, for conditional requests
+        self._validators = LRUCache(maxsize=kwargs.get('revalidate', 128))
+        # Set in threads calling API bypassing LRU cache
+        self._uncached = threading.local()
+
+        cache_decorator = LRUCache(maxsize=self.cache_size,
+                                   metrics=self.metrics, hooks=self.hooks,
+                                   context={'client': self},
+                                   describe=self._cache_context,
+                                   ttl=kwargs.get('ttl', 60.0),
+                                   volatile=self._is_volatile)
+        fetch = self._get_response_data
+        cached = cache_decorator(
+            fetch if self.table_index is None else self._indexed(fetch)
+        )
+        # Calls bypassing LRU cache (e.g. iter_windows()) aren't indexed
+        cached.__wrapped__ = self._bypassing(fetch)
+        self._get_response_data = cached
+
+    @property
+    def cache_size(self):
+        """Read-only LRU cache size."""
+        return self._cache_size
+
+    def _get_response_data(self, uri_tail, *args):
+        """Return HTTP response data from API call."""
+        raise NotImplementedError()
+
+    def _cache_context(self, key):
+        """Return context of cache events for LRU cache ``key``."""
+        return {'currency': None, 'table': None, 'uri_tail': key[0]}
+
+    def _is_volatile(self, key):
+        """Return True if result cached under LRU cache ``key`` can change."""
+        return not is_final(self._cache_context(key)['uri_tail'])
+
+    @property
+    def _index_scope(self):
+        """Scope of results in ``table_index`` (depends on settings)."""
+        return (self.base_uri, self.as_float)
+
+    def _index(self, data, uri_tail, *args):
+        """Put ``data`` returned for API call in ``table_index``."""
+        pass
+
+    def _bypassing(self, fetch):
+        """
+        Return ``fetch`` marking its calls as bypassing LRU cache.
+
+        Responses of such calls which can't change anymore (e.g. past windows
+        of ``iter_windows()``) aren't kept for revalidation, unlike e.g. polls
+        of ``PrefetchScheduler``.
+        """
+        def uncached(uri_tail, *args):
+            self._uncached.active = True
+            try:
+                return fetch(uri_tail, *args)
+            finally:
+                self._uncached.active = False
+        return uncached
+
+    def _indexed(self, fetch):
+        """Return ``fetch`` indexing its results in ``table_index``."""
+        def indexed(uri_tail, *args):
+            data = fetch(uri_tail, *args)
+            if data:
+                self._index(data, uri_tail, *args)
+            return data
+        return indexed
+
+    def _is_published(self, table, start_date, end_date):
+        """
+        Return True if ``table`` was published in date range (inclusive).
+
+        Always True if calendar is disabled. Dates have to be valid.
+        """
+        if not self.calendar:
+            return True
+        start_date, end_date = _to_date(start_date), _to_date(end_date)
+        if start_date > end_date:
+            # Let API reject it
+            return True
+        return has_publication_day(start_date, end_date, table)
+
+    def _is_window_published(self, start_date, end_date, *args):
+        """Return True if any table was published in date range."""
+        return True
+
+    def _not_published(self, uri_tail):
+        """Fail like API does for dates without tables (404)."""
+        self.metrics.record_error(APIError.__name__)
+        if self.suppress_errors:
+            return None
+        raise APIError(
+            "404 No table published for: {}".format(uri_tail),
+            status_code=404
+        )
+
+    def _proxies(self):
+        """Return proxy settings for requests."""
+        if self._proxy_url is None:
+            return None
+
+        proxy_dict = {'http': self._proxy_url, }
+        if self._proxy_secure:
+            if self._proxy_secure_url is not None:
+                proxy_dict['https'] = self._proxy_secure_url
+            else:
+                proxy_dict['https'] = proxy_dict['http'].replace('http', 'https')
+        return proxy_dict
+
+    def _fetch(self, uri, context=None):
+        """Send request to API and return response body, raise APIError."""
+        return self._fetch_response(uri, context=context).body
+
+    def _fetch_response(self, uri, headers=None, context=None):
+        """
+        Send request to API and return ``TransportResponse``.
+
+        Raises APIError on error (any status other than 2xx, and 304 for
+        requests with ``headers`` holding validators). ``context``
+        (``currency``, ``table`` and ``uri_tail`` of call) is passed to
+        event hooks.
+        """
+        conditional = bool(headers)
+        endpoint = endpoint_name(uri)
+        context = context or _NO_CONTEXT
+        if self.hooks.enabled:
+            self.hooks.emit('before_request', client=self, uri=uri,
+                            endpoint=endpoint, **context)
+
+        start = time.perf_counter()
+        try:
+            headers = dict(headers or {}, **{
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip',
+            })
+            response = self.transport.get(uri, headers=headers)
+        except Exception as e:
+            self.metrics.record_request(endpoint,
+                                        time.perf_counter() - start, 0)
+            self.metrics.record_error(APIError.__name__)
+            raise APIError(str(e))
+
+        duration = time.perf_counter() - start
+        response_bytes = len(response.body.encode('utf-8'))
+        self.metrics.record_request(endpoint, duration, response_bytes,
+                                    response.wire_bytes)
+        if self.hooks.enabled:
+            self.hooks.emit('after_response', client=self, uri=uri,
+                            endpoint=endpoint,
+                            status_code=response.status_code,
+                            duration=duration, response_bytes=response_bytes,
+                            **context)
+
+        if not (200 <= response.status_code < 300 or
+                response.status_code == 304 and conditional):
+            self.metrics.record_error(APIError.__name__)
+            raise APIError(
+                "{status_code} Error for url: {uri}".format(
+                    status_code=response.status_code,
+                    uri=uri
+                ),
+                status_code=response.status_code
+            )
+
+        return response
+
+    def _request(self, uri, context=None):
+        """
+        Return parsed JSON from API call (or shared cache).
+
+        ``context`` (``currency``, ``table`` and ``uri_tail`` of call) is
+        passed to event hooks.
+        """
+        if self._cache is not None and is_final(uri):
+            # Responses for current, today etc. aren't shared (nor kept)
+            body = self._cache.get_or_fetch(
+                uri, lambda: self._fetch(uri, context)
+            )
+            return self._parse(uri, body, context)
+
+        # Revalidate previous response, if it had validators
+        entry = self._validators.get(uri)
+        headers = {}
+        if entry is not None:
+            etag, last_modified, data, body_bytes = entry
+            if etag is not None:
+                headers['If-None-Match'] = etag
+            if last_modified is not None:
+                headers['If-Modified-Since'] = last_modified
+
+        response = self._fetch_response(uri, headers, context)
+        if response.status_code == 304:
+            # Unchanged, reuse parsed data (entry was refreshed by get())
+            self.metrics.record_not_modified(endpoint_name(uri), body_bytes)
+            return data
+
+        data = self._parse(uri, response.body, context)
+        if getattr(self._uncached, 'active', False) and is_final(uri):
+            # Don't keep past data of calls bypassing LRU cache in memory
+            return data
+        headers = {
+            key.lower(): value for key, value in response.headers.items()
+        }
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        if etag is not None or last_modified is not None:
+            self._validators.set(uri, (
+                etag, last_modified, data, len(response.body.encode('utf-8'))
+            ))
+        return data
+
+    def _parse(self, uri, body, context=None):
+        """Return parsed JSON response ``body``."""
+        # Parse data with values as decimals
+        if self.as_float:
+            parse_float_cls = float
+        else:
+            parse_float_cls = Decimal
+
+        start = time.perf_counter()
+        data = json.loads(body, parse_float=parse_float_cls)
+        duration = time.perf_counter() - start
+        self.metrics.record_parse(duration)
+        if self.hooks.enabled:
+            self.hooks.emit('after_parse', client=self, uri=uri,
+                            duration=duration, **(context or _NO_CONTEXT))
+        return data
+
+
+def iter_windows(clients, start_date, end_date, args=(), cached=False,
+                 index=False, skip_missing=True, align=False):
+    """
+    Yield results of ``clients`` window by window, prefetching next one.
+
+    Range is split into windows of ``max_days`` of clients, windows without
+    any published table are skipped. Every window is fetched with
+    ``client._get_response_data(uri_tail, *args)``; unless ``cached`` is
+    set, bypassing LRU cache and ``table_index`` of clients (unless
+    ``index`` is set), so windows won't pile up in memory.
+
+    Unless ``skip_missing`` is ``False``, windows without data of a client
+    (404, e.g. before currency was introduced or after it was withdrawn)
+    are skipped instead of raising ``APIError``.
+
+    If ``align`` is set, windows are aligned to calendar quarters (see
+    ``nbpy.utils.date_windows()``), so cached windows are reused by
+    overlapping ranges. Results from outside the range aren't filtered out.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_days = min(client.max_days for client in clients) if clients else 1
+    windows = date_windows(start_date, end_date, max_days, align)
+    executor = ThreadPoolExecutor(max_workers=max(len(clients), 1))
+
+    def fetch(client, uri_tail):
+        try:
+            if cached:
+                return client._get_response_data(uri_tail, *args)
+            data = client._get_response_data.__wrapped__(uri_tail, *args)
+        except APIError as e:
+            if skip_missing and e.status_code == 404:
+                return None
+            raise
+        if index and data and client.table_index is not None:
+            client._index(data, uri_tail, *args)
+        return data
+
+    def submit(window):
+        uri_tail = "{:%Y-%m-%d}/{:%Y-%m-%d}".format(*window)
+        return [
+            executor.submit(fetch, client, uri_tail)
+            for client in clients
+            if client._is_window_published(window[0], window[1], *args)
+        ]
+
+    pending = []
+    try:
+        window = next(windows, None)
+        if window is not None:
+            pending = submit(window)
+        while window is not None:
+            current = pending
+            # Prefetch next window before consuming current one
+            window = next(windows, None)
+            pending = submit(window) if window is not None else []
+            for future in current:
+                for item in future.result() or ():
+                    yield item
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,361 @@
+"""
+Offline, memory-mapped archive of historical exchange rates.
+
+Archive file layout (all integers little-endian):
+
+* header: magic ``NBPA``, format version, number of currencies and blocks,
+* currency index: 3-byte ASCII codes, referenced by their position,
+* block directory: one entry per (currency, bid/ask) pair pointing to
+  a contiguous run of records,
+* records: date ordinal, currency index and fixed-point values, sorted by
+  block and then by date.
+
+Only the header, currency index and block directory are read when archive
+is opened, records are accessed through ``mmap`` and binary search.
+"""
+
+import mmap
+import os
+import struct
+from datetime import datetime
+from decimal import Decimal
+from nbpy.errors import APIError, ArchiveError
+from nbpy.exchange_rate import NBPExchangeRate
+from nbpy.utils import parse_date
+
+
+__all__ = (
+    'RateArchive',
+    'write_archive', 'build_archive', 'extend_archive',
+)
+
+#: Archive magic bytes.
+MAGIC = b'NBPA'
+
+#: Archive format version.
+VERSION = 1
+
+# magic, version, number of currencies, number of blocks
+_HEADER = struct.Struct('<4sHHI')
+# currency index, bid/ask flag, first record, number of records
+_BLOCK = struct.Struct('<H?xQQ')
+# date ordinal, currency index, decimal places of both values, both values
+_RECORD = struct.Struct('<IHBBqq')
+_ORDINAL = struct.Struct('<I')
+
+_CODE_SIZE = 3
+
+
+def _to_fixed(value):
+    """Return (unscaled integer, decimal places) for ``value``."""
+    if value is None:
+        return 0, 0
+
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    sign, digits, exponent = value.as_tuple()
+    places = max(-exponent, 0)
+    return int(value.scaleb(places)), places
+
+
+def _from_fixed(unscaled, places, as_float):
+    """Return value from (unscaled integer, decimal places)."""
+    value = Decimal(unscaled).scaleb(-places)
+    return float(value) if as_float else value
+
+
+class RateArchive(object):
+    """Read-only, memory-mapped archive of exchange rates."""
+
+    def __init__(self, path):
+        """
+        Open archive from ``path``.
+
+        Opening cost doesn't depend on number of records: only header,
+        currency index and block directory are parsed.
+        """
+        self.path = path
+
+        with open(path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file can't be mapped
+                raise ArchiveError("{} is not NBPy archive".format(path))
+
+        try:
+            magic, version, n_codes, n_blocks = _HEADER.unpack_from(self._mmap)
+        except struct.error:
+            self.close()
+            raise ArchiveError("{} is not NBPy archive".format(path))
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ArchiveError("{} is not NBPy archive (version {:d})".format(
+                path, VERSION
+            ))
+
+        offset = _HEADER.size
+        end = offset + n_codes * _CODE_SIZE
+        codes = self._mmap[offset:end].decode('ascii')
+        self._codes = [
+            codes[i:i + _CODE_SIZE]
+            for i in range(0, len(codes), _CODE_SIZE)
+        ]
+        offset += n_codes * _CODE_SIZE
+
+        #: (currency code, bid_ask) -> (first record, number of records)
+        self._blocks = {}
+        for _ in range(n_blocks):
+            index, bid_ask, first, count = _BLOCK.unpack_from(
+                self._mmap, offset
+            )
+            self._blocks[(self._codes[index], bid_ask)] = (first, count)
+            offset += _BLOCK.size
+
+        self._records_offset = offset
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({path}, records={count:d})".format(
+            cls_name=self.__class__.__name__,
+            path=self.path,
+            count=len(self)
+        )
+
+    def __len__(self):
+        """Return number of records."""
+        return sum(count for _, count in self._blocks.values())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close underlying memory map."""
+        self._mmap.close()
+
+    @property
+    def currency_codes(self):
+        """Currency codes available in archive."""
+        return sorted(set(code for code, _ in self._blocks))
+
+    def _record(self, position):
+        """Unpack record at ``position``."""
+        return _RECORD.unpack_from(
+            self._mmap, self._records_offset + position * _RECORD.size
+        )
+
+    def _ordinal(self, position):
+        """Unpack date ordinal of record at ``position``."""
+        return _ORDINAL.unpack_from(
+            self._mmap, self._records_offset + position * _RECORD.size
+        )[0]
+
+    def _bisect(self, first, count, ordinal):
+        """Return position of first record in block not before ``ordinal``."""
+        lo, hi = first, first + count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ordinal(mid) < ordinal:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _rate(self, code, position, bid_ask, as_float):
+        """Return ``NBPExchangeRate`` for record at ``position``."""
+        ordinal, _, places1, places2, value1, value2 = self._record(position)
+        date = datetime.fromordinal(ordinal)
+
+        if bid_ask:
+            return NBPExchangeRate(
+                currency_code=code, date=date,
+                bid=_from_fixed(value1, places1, as_float),
+                ask=_from_fixed(value2, places2, as_float),
+            )
+        return NBPExchangeRate(
+            currency_code=code, date=date,
+            mid=_from_fixed(value1, places1, as_float),
+        )
+
+    def _block(self, currency_code, bid_ask):
+        return self._blocks.get((currency_code.upper(), bool(bid_ask)), (0, 0))
+
+    def lookup(self, currency_code, date, bid_ask=False, as_float=False):
+        """
+        Return exchange rate for ``currency_code`` from ``date``.
+
+        Returns ``None`` if there's no such rate in archive.
+        """
+        first, count = self._block(currency_code, bid_ask)
+        ordinal = parse_date(date).toordinal()
+        position = self._bisect(first, count, ordinal)
+
+        if position < first + count and self._ordinal(position) == ordinal:
+            return self._rate(currency_code.upper(), position, bid_ask,
+                              as_float)
+        return None
+
+    def range(self, currency_code, start_date, end_date, bid_ask=False,
+              as_float=False):
+        """Return exchange rates from ``start_date`` to ``end_date``."""
+        first, count = self._block(currency_code, bid_ask)
+        start = self._bisect(first, count, parse_date(start_date).toordinal())
+        end = self._bisect(first, count, parse_date(end_date).toordinal() + 1)
+
+        return [
+            self._rate(currency_code.upper(), position, bid_ask, as_float)
+            for position in range(start, end)
+        ]
+
+    def last(self, currency_code, n, bid_ask=False, as_float=False):
+        """Return last ``n`` exchange rates."""
+        first, count = self._block(currency_code, bid_ask)
+
+        return [
+            self._rate(currency_code.upper(), position, bid_ask, as_float)
+            for position in range(first + max(count - n, 0), first + count)
+        ]
+
+    def resolve(self, currency_code, uri_tail, bid_ask=False, as_float=False):
+        """
+        Return exchange rates for API resource ``uri_tail``.
+
+        Mirrors ``/exchangerates/rates/{table}/{code}/{uri_tail}`` API calls,
+        raises ``APIError`` if there's no data (as API responds with 404).
+        """
+        parts = [part for part in uri_tail.split('/') if part]
+
+        if not parts:
+            rates = self.last(currency_code, 1, bid_ask, as_float)
+        elif parts[0] == 'today':
+            rates = self.range(currency_code, datetime.today(),
+                               datetime.today(), bid_ask, as_float)
+        elif parts[0] == 'last':
+            rates = self.last(currency_code, int(parts[1]), bid_ask, as_float)
+        else:
+            rates = self.range(currency_code, parts[0], parts[-1], bid_ask,
+                               as_float)
+
+        if not rates:
+            raise APIError(
+                "404 Not Found: no archived data for {}/{}".format(
+                    currency_code, uri_tail
+                ),
+                status_code=404
+            )
+        return rates
+
+    def iter_rates(self, bid_ask=False, as_float=False):
+        """Iterate over all archived exchange rates, block by block."""
+        for (code, block_bid_ask), (first, count) in sorted(
+                self._blocks.items()):
+            if block_bid_ask != bid_ask:
+                continue
+            for position in range(first, first + count):
+                yield self._rate(code, position, bid_ask, as_float)
+
+
+def _rate_values(rate):
+    """Return (bid_ask, value1, value2) for ``NBPExchangeRate``."""
+    if hasattr(rate, 'bid') and hasattr(rate, 'ask'):
+        return True, rate.bid, rate.ask
+    return False, rate.mid, None
+
+
+def write_archive(path, rates, extend=False):
+    """
+    Write ``rates`` (iterable of ``NBPExchangeRate``) to archive at ``path``.
+
+    If ``extend`` is ``True`` and archive already exists, its records are
+    merged with ``rates`` (new values win for duplicated dates). Archive is
+    written to a temporary file first and then atomically replaced.
+    """
+    # (code, bid_ask) -> {ordinal: (value1, value2)}
+    blocks = {}
+
+    if extend and os.path.exists(path):
+        with RateArchive(path) as archive:
+            for (code, bid_ask), (first, count) in archive._blocks.items():
+                block = blocks.setdefault((code, bid_ask), {})
+                for position in range(first, first + count):
+                    record = archive._record(position)
+                    block[record[0]] = (record[4], record[2],
+                                        record[5], record[3])
+
+    for rate in rates:
+        bid_ask, value1, value2 = _rate_values(rate)
+        block = blocks.setdefault((rate.currency_code, bid_ask), {})
+        block[rate.date.toordinal()] = _to_fixed(value1) + _to_fixed(value2)
+
+    codes = sorted(set(code for code, _ in blocks))
+    code_index = {code: index for index, code in enumerate(codes)}
+
+    tmp_path = "{}.tmp".format(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(codes), len(blocks)))
+        f.write(''.join(codes).encode('ascii'))
+
+        first = 0
+        for key in sorted(blocks):
+            f.write(_BLOCK.pack(code_index[key[0]], key[1], first,
+                                len(blocks[key])))
+            first += len(blocks[key])
+
+        for key in sorted(blocks):
+            index = code_index[key[0]]
+            for ordinal, values in sorted(blocks[key].items()):
+                value1, places1, value2, places2 = values
+                f.write(_RECORD.pack(ordinal, index, places1, places2,
+                                     value1, value2))
+
+    os.replace(tmp_path, path)
+
+
+def _fetch_rates(currency_codes, start_date, end_date, **kwargs):
+    """Yield mid and (where available) bid/ask rates from API."""
+    from nbpy import iter_ranges
+    from nbpy.currencies import currencies
+
+    codes = [code.upper() for code in currency_codes]
+    for rate in iter_ranges(codes, start_date, end_date, **kwargs):
+        yield rate
+
+    codes = [code for code in codes if 'C' in currencies[code].tables]
+    for rate in iter_ranges(codes, start_date, end_date, bid_ask=True,
+                            **kwargs):
+        yield rate
+
+
+def build_archive(path, currency_codes, start_date, end_date, **kwargs):
+    r"""
+    Build archive at ``path`` from API data.
+
+    Fetches mid (and bid/ask, where available) exchange rates for all
+    ``currency_codes`` from ``start_date`` to ``end_date``.
+
+    :param \**kwargs:
+        Keyword arguments passed to each ``NBPClient``.
+    """
+    write_archive(
+        path, _fetch_rates(currency_codes, start_date, end_date, **kwargs)
+    )
+
+
+def extend_archive(path, currency_codes, start_date, end_date, **kwargs):
+    r"""
+    Extend existing archive at ``path`` with API data.
+
+    Works like ``build_archive()``, but keeps already archived records.
+
+    :param \**kwargs:
+        Keyword arguments passed to each ``NBPClient``.
+    """
+    write_archive(
+        path, _fetch_rates(currency_codes, start_date, end_date, **kwargs),
+        extend=True
+    )
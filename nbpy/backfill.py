@@ -0,0 +1,376 @@
+"""
+Resumable backfill of exchange rates history.
+
+``plan()`` computes requests needed to fetch history of given currencies
+and tables: table-level range calls (one call for all currencies from
+a table) wherever more than one currency from a table is requested,
+per-currency calls otherwise, all in API-legal windows, skipping windows
+without any published table.
+
+``Backfill`` runs a plan with bounded concurrency and rate limiting,
+retrying throttled and failed requests. Every finished task is recorded in
+an append-only checkpoint file after its rows are written to the sink, so
+an interrupted backfill resumes where it left off.
+
+Sinks need a single ``write(table, rows)`` method, where ``rows`` are tuples
+of ``(no, NBPExchangeRate)``, e.g. ``nbpy.store.RateStore`` or
+``JSONLinesSink``.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from nbpy.business_days import FIRST_DATE, has_publication_day
+from nbpy.currencies import currencies
+from nbpy.errors import APIError, UnknownCurrencyCode
+from nbpy.utils import parse_date, format_date, date_windows
+
+
+__all__ = (
+    'Task', 'plan', 'Backfill', 'Checkpoint', 'RateLimiter', 'JSONLinesSink',
+)
+
+#: Single API request of a backfill: per-currency call if there's only one
+#: currency in ``codes``, table-level call otherwise.
+Task = namedtuple('Task', ('table', 'codes', 'start', 'end'))
+
+
+def task_id(task):
+    """Return stable identifier of ``task`` (used in checkpoints)."""
+    if len(task.codes) == 1:
+        codes = task.codes[0]
+    else:
+        codes = hashlib.sha1(','.join(task.codes).encode()).hexdigest()[:12]
+    return '/'.join((
+        task.table, codes, format_date(task.start), format_date(task.end)
+    ))
+
+
+def _per_currency(table, code):
+    """Return True if ``code`` rates from ``table`` have their own calls."""
+    # Currency calls only reach the mid table preferred by NBPCurrency
+    return table == 'C' or currencies[code].mid_table == table
+
+
+def plan(currency_codes=None, tables=('A', 'B', 'C'), start_date=None,
+         end_date=None):
+    """
+    Return list of ``Task`` objects fetching given history.
+
+    Like ``RateStore.sync()``, tables with more than one requested currency
+    are fetched with table-level calls (one call for all currencies).
+    Windows are as long as API allows, windows without any table published
+    (e.g. before 2002-01-02 or over holidays) are skipped.
+
+    :param currency_codes:
+        Currency codes to fetch. Default: all currencies. Unknown codes
+        raise ``UnknownCurrencyCode``.
+
+    :param tables:
+        Tables to fetch. Default: ``A``, ``B`` and ``C``.
+
+    :param start_date:
+        First date to fetch. Default: first date available in API.
+
+    :param end_date:
+        Last date to fetch. Default: today.
+    """
+    if currency_codes is None:
+        currency_codes = currencies
+    codes = sorted(set(code.upper() for code in currency_codes))
+    for code in codes:
+        if code not in currencies:
+            raise UnknownCurrencyCode(code)
+    start_date = parse_date(start_date or FIRST_DATE.isoformat())
+    end_date = parse_date(end_date or datetime.today())
+
+    tasks = []
+    for table in tables:
+        table = table.upper()
+        table_codes = tuple(
+            code for code in codes if table in currencies[code].tables
+        )
+        if not table_codes:
+            continue
+
+        for start, end in date_windows(start_date, end_date):
+            if not has_publication_day(start, end, table):
+                continue
+            tasks.append(Task(table, table_codes, start, end))
+    return tasks
+
+
+class RateLimiter(object):
+    """Thread-safe limiter of requests per second (token bucket)."""
+
+    def __init__(self, rate, burst=1):
+        """
+        Initialize limiter.
+
+        :param rate: Max requests per second.
+        :param burst: Max requests sent at once.
+        """
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Wait until request can be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Checkpoint(object):
+    """Append-only file of finished task identifiers."""
+
+    def __init__(self, path):
+        """Open (or create) checkpoint at ``path``."""
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            size = 0
+            with open(path, 'r') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break
+                    size += len(line)
+                    self.done.add(line[:-1])
+            # Drop last line cut by a crash
+            os.truncate(path, size)
+        self._file = open(path, 'a')
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({path}, done={done:d})".format(
+            cls_name=self.__class__.__name__,
+            path=self.path,
+            done=len(self.done)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __contains__(self, task):
+        return task_id(task) in self.done
+
+    def add(self, task):
+        """Record ``task`` as finished (durably)."""
+        identifier = task_id(task)
+        self._file.write(identifier + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(identifier)
+
+    def close(self):
+        """Close checkpoint file."""
+        self._file.close()
+
+
+class JSONLinesSink(object):
+    """Sink appending rates to a JSON Lines file."""
+
+    def __init__(self, path):
+        """Open ``path`` for appending."""
+        self.path = path
+        self._file = open(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, table, rows):
+        """Write ``rows`` (tuples of ``(no, NBPExchangeRate)``)."""
+        for no, rate in rows:
+            record = {
+                'table': table,
+                'code': rate.currency_code,
+                'date': format_date(rate.date),
+                'no': no,
+            }
+            for key in ('mid', 'bid', 'ask'):
+                if hasattr(rate, key):
+                    # Keep decimals exact
+                    record[key] = str(getattr(rate, key))
+            self._file.write(json.dumps(record, sort_keys=True) + '\n')
+        self._file.flush()
+        return len(rows)
+
+    def close(self):
+        """Close file."""
+        self._file.close()
+
+
+class Backfill(object):
+    """Runs backfill plan against API, writing rates to sink."""
+
+    def __init__(self, sink, checkpoint=None, concurrency=4, rate_limit=10.0,
+                 retries=3, backoff=1.0, **kwargs):
+        r"""
+        Initialize backfill.
+
+        :param sink:
+            Object with ``write(table, rows)`` method, e.g.
+            ``nbpy.store.RateStore``.
+
+        :param checkpoint:
+            Path to checkpoint file (or ``Checkpoint``). Default: ``None``
+            (no resuming).
+
+        :param concurrency:
+            Max number of concurrent requests. Default: ``4``.
+
+        :param rate_limit:
+            Max requests per second, ``None`` for no limit. Default: ``10``.
+
+        :param retries:
+            Number of retries of throttled (429), failed (5xx) or broken
+            requests. Default: ``3``.
+
+        :param backoff:
+            Delay (in seconds) before first retry, doubled for every next
+            one. Default: ``1``.
+
+        :param \**kwargs:
+            Keyword arguments passed to API clients.
+        """
+        self.sink = sink
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.retries = retries
+        self.backoff = backoff
+
+        if kwargs.get('transport') is None:
+            # Share connection pool between all clients
+            from nbpy.api import NBPBaseClient
+            kwargs['transport'] = NBPBaseClient(**kwargs).transport
+        # Backfilled windows are never requested twice
+        self._client_kwargs = dict(kwargs, cache_size=0, revalidate=0)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({sink!r}, concurrency={concurrency:d})".format(
+            cls_name=self.__class__.__name__,
+            sink=self.sink,
+            concurrency=self.concurrency
+        )
+
+    def _client(self, table, code=None):
+        """Return (shared) API client for table or currency."""
+        key = (table, code)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if code is None:
+                    from nbpy.tables import NBPTableClient
+                    client = NBPTableClient(table, **self._client_kwargs)
+                else:
+                    from nbpy import NBPClient
+                    client = NBPClient(code, **self._client_kwargs)
+                self._clients[key] = client
+        return client
+
+    def fetch(self, task):
+        """Fetch rows of ``task`` (tuples of ``(no, NBPExchangeRate)``)."""
+        code, = task.codes if len(task.codes) == 1 else (None,)
+        if code is not None and not _per_currency(task.table, code):
+            code = None
+        client = self._client(task.table, code)
+
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                if code is None:
+                    exchange_tables = client.date_range(task.start, task.end)
+                    return [
+                        (exchange_table.no, exchange_table[currency_code])
+                        for exchange_table in exchange_tables or ()
+                        for currency_code in task.codes
+                        if currency_code in exchange_table
+                    ]
+                rates = client.date_range(
+                    format_date(task.start), format_date(task.end),
+                    bid_ask=(task.table == 'C')
+                )
+                return [(rate.no, rate) for rate in rates or ()]
+            except APIError as e:
+                if e.status_code == 404:
+                    return []
+                retry = e.status_code is None or e.status_code == 429 or \
+                    e.status_code >= 500
+                if not retry or attempt == self.retries:
+                    raise
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def run(self, tasks):
+        """
+        Run ``tasks`` (skipping ones finished before), return statistics.
+
+        Rows are written to sink (and tasks checkpointed) in the calling
+        thread, in order of completion.
+        """
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, \
+            wait
+
+        stats = {'tasks': 0, 'skipped': 0, 'rows': 0}
+        pending = iter(tasks)
+        running = {}
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        def submit():
+            # Keep only a bounded number of tasks in flight
+            while len(running) < 2 * self.concurrency:
+                task = next(pending, None)
+                if task is None:
+                    return
+                if self.checkpoint is not None and task in self.checkpoint:
+                    stats['skipped'] += 1
+                    continue
+                running[executor.submit(self.fetch, task)] = task
+
+        try:
+            submit()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    rows = future.result()
+                    if rows:
+                        self.sink.write(task.table, rows)
+                    if self.checkpoint is not None:
+                        self.checkpoint.add(task)
+                    stats['tasks'] += 1
+                    stats['rows'] += len(rows)
+                submit()
+        finally:
+            for future in running:
+                future.cancel()
+            executor.shutdown(wait=True)
+        return stats
@@ -0,0 +1,211 @@
+"""
+Publication calendar of NBP exchange rate tables.
+
+Tables A and C are published on every business day (no weekends and Polish
+public holidays, including movable ones based on Easter), table B on
+Wednesdays (or on the preceding business day, if Wednesday is a holiday).
+Clients use the calendar to answer calls for days without tables locally,
+without any I/O.
+
+Holidays and publication days of every table are precomputed per year (on
+first use) as sets and sorted tuples of date ordinals, so every check is
+a set lookup, and range checks are binary searches.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date as date_cls, datetime
+
+
+__all__ = (
+    'FIRST_DATE',
+    'easter', 'holidays', 'is_holiday', 'is_business_day',
+    'is_publication_day', 'publication_days', 'has_publication_day',
+    'previous_publication_day',
+)
+
+#: First date with published tables.
+FIRST_DATE = date_cls(2002, 1, 2)
+
+# Fixed holidays (month, day, first year, last year)
+_FIXED_HOLIDAYS = (
+    (1, 1, None, None),     # New Year's Day
+    (1, 6, 2011, None),     # Epiphany
+    (5, 1, None, None),     # Labour Day
+    (5, 3, None, None),     # Constitution Day
+    (8, 15, None, None),    # Assumption of Mary
+    (11, 1, None, None),    # All Saints' Day
+    (11, 11, None, None),   # Independence Day
+    (12, 24, 2025, None),   # Christmas Eve
+    (12, 25, None, None),   # Christmas Day
+    (12, 26, None, None),   # Second Day of Christmas
+)
+
+# Movable holidays (days after Easter Sunday)
+_EASTER_HOLIDAYS = (
+    0,      # Easter Sunday
+    1,      # Easter Monday
+    49,     # Pentecost
+    60,     # Corpus Christi
+)
+
+# One-off holidays
+_EXTRA_HOLIDAYS = (
+    date_cls(2018, 11, 12),     # 100th anniversary of independence
+)
+
+_holidays = {}
+# (year, table) -> (set, sorted tuple) of publication day ordinals
+_publications = {}
+_lock = threading.Lock()
+
+
+def _to_date(date):
+    """Return ``datetime.date`` from date string, ``date`` or ``datetime``."""
+    if isinstance(date, str):
+        if len(date) == 10 and date[4] == date[7] == '-' and \
+                (date[:4] + date[5:7] + date[8:]).isdigit():
+            # Much faster than strptime() for YYYY-MM-DD strings
+            return date_cls(int(date[:4]), int(date[5:7]), int(date[8:]))
+        return datetime.strptime(date, '%Y-%m-%d').date()
+    if isinstance(date, datetime):
+        return date.date()
+    return date
+
+
+def easter(year):
+    """Return date of Easter Sunday in ``year`` (Gregorian calendar)."""
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher)
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    weekday = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * weekday) // 451
+    month, day = divmod(h + weekday - 7 * m + 114, 31)
+    return date_cls(year, month, day + 1)
+
+
+def holidays(year):
+    """Return ordinals of Polish public holidays in ``year`` (frozenset)."""
+    ordinals = _holidays.get(year)
+    if ordinals is not None:
+        return ordinals
+
+    ordinals = {
+        date_cls(year, month, day).toordinal()
+        for month, day, first, last in _FIXED_HOLIDAYS
+        if (first is None or year >= first) and (last is None or year <= last)
+    }
+    easter_ordinal = easter(year).toordinal()
+    ordinals.update(easter_ordinal + days for days in _EASTER_HOLIDAYS)
+    ordinals.update(
+        date.toordinal() for date in _EXTRA_HOLIDAYS if date.year == year
+    )
+
+    with _lock:
+        return _holidays.setdefault(year, frozenset(ordinals))
+
+
+def is_holiday(date):
+    """Return True if ``date`` is a Polish public holiday."""
+    date = _to_date(date)
+    return date.toordinal() in holidays(date.year)
+
+
+def is_business_day(date):
+    """Return True if ``date`` is neither weekend nor public holiday."""
+    date = _to_date(date)
+    return date.weekday() < 5 and date.toordinal() not in holidays(date.year)
+
+
+def _is_business_ordinal(ordinal):
+    """Return True if date ``ordinal`` is a business day."""
+    # Ordinal 1 (0001-01-01) is Monday
+    return (ordinal - 1) % 7 < 5 and \
+        ordinal not in holidays(date_cls.fromordinal(ordinal).year)
+
+
+def _publication_ordinals(year, table):
+    """Return (set, sorted tuple) of ordinals of ``table`` publication days."""
+    table = 'B' if table.upper() == 'B' else 'A'
+    ordinals = _publications.get((year, table))
+    if ordinals is not None:
+        return ordinals
+
+    first = max(date_cls(year, 1, 1), FIRST_DATE).toordinal()
+    last = date_cls(year, 12, 31).toordinal()
+    if table == 'A':
+        days = [
+            ordinal for ordinal in range(first, last + 1)
+            if _is_business_ordinal(ordinal)
+        ]
+    else:
+        # Wednesday, or the preceding business day if Wednesday is a
+        # holiday (possibly in previous year, so look a week ahead)
+        days = []
+        wednesday = first + (2 - (first - 1) % 7) % 7
+        for wednesday in range(wednesday, last + 8, 7):
+            day = wednesday
+            while not _is_business_ordinal(day):
+                day -= 1
+            if first <= day <= last:
+                days.append(day)
+    ordinals = (frozenset(days), tuple(days))
+
+    with _lock:
+        return _publications.setdefault((year, table), ordinals)
+
+
+def is_publication_day(date, table='A'):
+    """Return True if ``table`` is published on ``date``."""
+    date = _to_date(date)
+    return date.toordinal() in _publication_ordinals(date.year, table)[0]
+
+
+def publication_days(start_date, end_date, table='A'):
+    """Yield publication days of ``table`` from given range (as ``date``)."""
+    start = max(_to_date(start_date), FIRST_DATE).toordinal()
+    end = _to_date(end_date).toordinal()
+    if start > end:
+        return
+    for year in range(date_cls.fromordinal(start).year,
+                      date_cls.fromordinal(end).year + 1):
+        ordinals = _publication_ordinals(year, table)[1]
+        for index in range(bisect_left(ordinals, start),
+                           bisect_right(ordinals, end)):
+            yield date_cls.fromordinal(ordinals[index])
+
+
+def has_publication_day(start_date, end_date, table='A'):
+    """Return True if ``table`` was published in given range (inclusive)."""
+    start = _to_date(start_date).toordinal()
+    end = _to_date(end_date).toordinal()
+    year = date_cls.fromordinal(start).year
+    while start <= end:
+        ordinals = _publication_ordinals(year, table)[1]
+        index = bisect_left(ordinals, start)
+        if index < len(ordinals):
+            return ordinals[index] <= end
+        year += 1
+        start = date_cls(year, 1, 1).toordinal()
+    return False
+
+
+def previous_publication_day(date, table='A'):
+    """
+    Return last publication day of ``table`` up to ``date`` (inclusive).
+
+    Returns ``None`` for dates before ``FIRST_DATE``.
+    """
+    ordinal = _to_date(date).toordinal()
+    for year in range(date_cls.fromordinal(ordinal).year,
+                      FIRST_DATE.year - 1, -1):
+        ordinals = _publication_ordinals(year, table)[1]
+        index = bisect_right(ordinals, ordinal)
+        if index:
+            return date_cls.fromordinal(ordinals[index - 1])
+    return None
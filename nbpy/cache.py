@@ -0,0 +1,348 @@
+"""
+Caches of API responses.
+
+``LRUCache`` is an in-process LRU cache with hit/miss/eviction counters,
+``SharedCache`` is shared by all processes on a host.
+
+For ``SharedCache``, raw response bodies are kept in a SQLite database in WAL
+mode, so many processes (e.g. pre-fork web server workers) can read it
+concurrently. Fetching missing keys is guarded by cross-process locks
+(``fcntl`` byte-range locks on a companion lock file, striped by key), so only
+one process fetches a missing key, while others wait and reuse its result.
+"""
+
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # No cross-process locking (e.g. on Windows), only between threads
+    fcntl = None
+
+
+__all__ = ('LRUCache', 'SharedCache')
+
+
+class LRUCache(object):
+    """
+    Thread-safe LRU cache, usable as a decorator.
+
+    Works like ``functools.lru_cache``, but counts hits, misses and evictions
+    (optionally recording them to ``nbpy.metrics.Metrics``), and can expire
+    values which may become outdated.
+    """
+
+    # Marks missing keys (None is a valid cached value)
+    _missing = object()
+
+    def __init__(self, maxsize=128, metrics=None, hooks=None, context=None,
+                 describe=None, ttl=None, volatile=None):
+        """
+        Initialize empty cache.
+
+        :param maxsize:
+            Max number of cached values, ``None`` for unbounded cache and
+            ``0`` to disable caching. Default: ``128``.
+
+        :param metrics:
+            ``nbpy.metrics.Metrics`` object to record cache events.
+
+        :param hooks:
+            ``nbpy.hooks.Hooks`` object to emit ``cache_hit`` and
+            ``cache_miss`` events to.
+
+        :param context:
+            Extra context for emitted events.
+
+        :param describe:
+            Callable returning dict of extra event context for a key (e.g.
+            currency and table of cached call).
+
+        :param ttl:
+            Time (in seconds) after which values expire. Default: ``None``
+            (values are kept until evicted).
+
+        :param volatile:
+            Callable returning True for keys whose values expire after
+            ``ttl``. Default: ``None`` (all keys).
+        """
+        self.maxsize = maxsize
+        self.metrics = metrics
+        self.hooks = hooks
+        self.context = context or {}
+        self.describe = describe
+        self.ttl = ttl
+        self.volatile = volatile
+        self.hits = self.misses = self.evictions = 0
+        self._data = OrderedDict()
+        # Expiration times (time.monotonic()) of volatile keys
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(maxsize={maxsize}, size={size:d})".format(
+            cls_name=self.__class__.__name__,
+            maxsize=self.maxsize,
+            size=len(self)
+        )
+
+    def __len__(self):
+        return len(self._data)
+
+    def _record(self, event):
+        if self.metrics is not None:
+            self.metrics.record_cache(event)
+
+    def _emit(self, event, key, **extra):
+        """Emit ``cache_hit`` or ``cache_miss`` event for key."""
+        if self.hooks is None or not self.hooks.enabled:
+            return
+        context = dict(self.context, key=key, **extra)
+        if self.describe is not None:
+            context.update(self.describe(key))
+        self.hooks.emit('cache_' + event, **context)
+
+    def _lookup(self, key):
+        """Return cached value for key (or ``_missing``), count hit or miss."""
+        with self._lock:
+            value = self._data.get(key, self._missing)
+            if self._expires and value is not self._missing:
+                expires = self._expires.get(key)
+                if expires is not None and expires <= time.monotonic():
+                    del self._data[key], self._expires[key]
+                    value = self._missing
+            if value is self._missing:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+
+        self._record('miss' if value is self._missing else 'hit')
+        return value
+
+    def get(self, key, default=None):
+        """Return cached value for key (counted as hit or miss)."""
+        value = self._lookup(key)
+        self._emit('miss' if value is self._missing else 'hit', key)
+        return default if value is self._missing else value
+
+    def set(self, key, value):
+        """Store value for key, evicting least recently used if full."""
+        if self.maxsize == 0:
+            return
+
+        expires = None
+        if self.ttl is not None and (self.volatile is None or
+                                     self.volatile(key)):
+            expires = time.monotonic() + self.ttl
+
+        evicted = 0
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if expires is not None:
+                self._expires[key] = expires
+            elif self._expires:
+                self._expires.pop(key, None)
+            while self.maxsize is not None and len(self._data) > self.maxsize:
+                evicted_key, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted_key, None)
+                evicted += 1
+            self.evictions += evicted
+
+        for _ in range(evicted):
+            self._record('eviction')
+
+    def clear(self):
+        """Remove all cached values."""
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def __call__(self, func):
+        """
+        Wrap ``func`` with cache (keyed by positional arguments).
+
+        ``cache_miss`` events are emitted after ``func`` returns, with its
+        ``duration``.
+        """
+        @wraps(func)
+        def cached(*args):
+            value = self._lookup(args)
+            if value is not self._missing:
+                self._emit('hit', args)
+                return value
+
+            start = time.perf_counter()
+            try:
+                value = func(*args)
+            finally:
+                self._emit('miss', args,
+                           duration=time.perf_counter() - start)
+            self.set(args, value)
+            return value
+
+        cached.cache = self
+        return cached
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+
+class SharedCache(object):
+    """File-backed cache of API responses, safe across threads and processes."""
+
+    def __init__(self, path, ttl=None, stripes=64, timeout=30.0):
+        """
+        Open (or create) cache at ``path``.
+
+        :param path:
+            Path to SQLite database. Lock file is created next to it.
+
+        :param ttl:
+            Time to live of cached responses in seconds. Default: ``None``
+            (responses never expire).
+
+        :param stripes:
+            Number of lock stripes, i.e. how many different keys can be
+            fetched concurrently. Default: ``64``.
+
+        :param timeout:
+            How long to wait for database locks (in seconds). Default: ``30``.
+        """
+        self.path = path
+        self.ttl = ttl
+        self._stripes = stripes
+        self._timeout = timeout
+        self._pid = None
+        self._local = None
+        self._inherited = []
+        self._reset()
+
+        with self._connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({path}, ttl={ttl})".format(
+            cls_name=self.__class__.__name__,
+            path=self.path,
+            ttl=self.ttl
+        )
+
+    def _reset(self):
+        """(Re)create per-process state, e.g. after ``fork()``."""
+        if self._local is not None:
+            # Connections inherited from parent can't be used (nor closed)
+            self._inherited.append(self._local)
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._thread_locks = [threading.Lock() for _ in range(self._stripes)]
+        self._lock_file = None
+        if fcntl is not None:
+            self._lock_file = open(self.path + '.lock', 'a+b')
+
+    def _check_pid(self):
+        """Drop state inherited from parent process."""
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _connection(self):
+        """Return SQLite connection for current thread and process."""
+        self._check_pid()
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Imported here, as LRUCache is imported with nbpy
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout=self._timeout)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _stripe(self, key):
+        """Return lock stripe for key (stable across processes)."""
+        return zlib.crc32(key.encode('utf-8')) % self._stripes
+
+    def _lock(self, stripe):
+        """Acquire lock for stripe."""
+        self._thread_locks[stripe].acquire()
+        if self._lock_file is not None:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX, 1, stripe)
+
+    def _unlock(self, stripe):
+        """Release lock for stripe."""
+        if self._lock_file is not None:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_UN, 1, stripe)
+        self._thread_locks[stripe].release()
+
+    def get(self, key):
+        """Return cached value for key, or ``None``."""
+        row = self._connection().execute(
+            "SELECT value, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+        if self.ttl is not None and row[1] + self.ttl < time.time():
+            return None
+        return row[0]
+
+    def set(self, key, value):
+        """Store value for key."""
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return cached value for key, calling ``fetch()`` on cache miss.
+
+        Only one thread (in any process) fetches given key at once, others
+        wait and reuse its result. Errors from ``fetch()`` aren't cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        stripe = self._stripe(key)
+        self._lock(stripe)
+        try:
+            # Someone else could fetch it while we were waiting
+            value = self.get(key)
+            if value is None:
+                value = fetch()
+                self.set(key, value)
+        finally:
+            self._unlock(stripe)
+        return value
+
+    def clear(self):
+        """Remove all cached values."""
+        with self._connection() as connection:
+            connection.execute("DELETE FROM responses")
+
+    def close(self):
+        """Close connection of current thread and lock file."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -1,10 +1,23 @@
 """
 Available tables and currencies.
 
-Data taken from /api/exchangerates/tables/{a,b,c}/ API calls.
+Bundled data taken from /api/exchangerates/tables/{a,b,c}/ API calls.
+Registry can be refreshed from the same calls with ``currencies.refresh()``,
+which adds new currencies and tables to bundled ones (currencies withdrawn
+since are kept, as their historical rates are still available).
 """
 
 import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+
+
+#: Default path of refreshed registry cache.
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'nbpy', 'currencies.json'
+)
 
 
 class NBPCurrency(object):
@@ -33,6 +46,14 @@ class NBPCurrency(object):
         self.name = name
         self.tables = set(tables)
 
+        #: Table with mid rates (``A`` or ``B``), ``None`` if there's none.
+        self.mid_table = next(
+            (table for table in ('A', 'B') if table in self.tables), None
+        )
+
+        #: True if bid/ask rates (table ``C``) are available.
+        self.has_bid_ask = 'C' in self.tables
+
     def __repr__(self):
         """Return repr(self)."""
         return "{cls_name}({name}, code={code}, tables={tables})".format(
@@ -47,8 +68,140 @@ class NBPCurrency(object):
         return self.name
 
 
-#: Available currencies
-currencies = {
+class CurrencyRegistry(Mapping):
+    """
+    Mapping of currency codes to ``NBPCurrency`` objects.
+
+    ``NBPCurrency`` objects are built on first access to given code, so
+    importing ``nbpy`` doesn't pay for building all of them. Registry starts
+    with bundled data and can be refreshed from API with ``refresh()``.
+    """
+
+    def __init__(self, data):
+        r"""
+        Initialize registry.
+
+        :param data:
+            Dict mapping currency codes to ``NBPCurrency`` keyword arguments
+            (``name`` and ``tables``).
+        """
+        self._data = data
+        # Refreshed data is merged into initial one
+        self._initial = data
+        self._currencies = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return repr(dict(self))
+
+    def __getitem__(self, code):
+        try:
+            return self._currencies[code]
+        except KeyError:
+            pass
+
+        items = self._data[code]
+        with self._lock:
+            currency = self._currencies.get(code)
+            if currency is None:
+                currency = NBPCurrency(code=code, **items)
+                self._currencies[code] = currency
+        return currency
+
+    def __contains__(self, code):
+        return code in self._data
+
+    def update(self, data):
+        """Replace registry contents with ``data`` (same format as in init)."""
+        with self._lock:
+            self._currencies = {}
+            self._data = data
+
+    def refresh(self, cache_path=DEFAULT_CACHE_PATH, ttl=86400, force=False,
+                **kwargs):
+        r"""
+        Refresh registry from ``/exchangerates/tables/{a,b,c}`` API calls.
+
+        Currencies and tables from API are merged into initial (e.g.
+        bundled) data, so currencies missing from current tables (withdrawn
+        ones) stay available. Result is cached on disk at ``cache_path`` and
+        reused for ``ttl`` seconds. If API is unavailable, registry falls
+        back to (even stale) cache and then to its current data.
+
+        :param cache_path:
+            Path of on-disk cache, ``None`` to disable it.
+
+        :param ttl:
+            Time (in seconds) for which cached data is used instead of API.
+
+        :param force:
+            If ``True``, always call API.
+
+        :param \**kwargs:
+            Keyword arguments passed to ``nbpy.tables.NBPTableClient``.
+
+        :return:
+            Source of data: ``'cache'``, ``'api'``, ``'stale cache'`` or
+            ``None`` if registry wasn't changed.
+        """
+        from nbpy.errors import APIError
+
+        cached = _read_cache(cache_path)
+        if cached is not None and not force and \
+                cached['fetched'] + ttl >= time.time():
+            self.update(self._merge(cached['currencies']))
+            return 'cache'
+
+        try:
+            data = self._fetch(**kwargs)
+        except (APIError, ValueError, KeyError):
+            # Offline (or malformed response), use what we have
+            if cached is not None:
+                self.update(self._merge(cached['currencies']))
+                return 'stale cache'
+            return None
+
+        self.update(self._merge(data))
+        _write_cache(cache_path, data)
+        return 'api'
+
+    def _merge(self, data):
+        """Return initial data with currencies and tables from ``data``."""
+        merged = dict(self._initial)
+        for code, items in data.items():
+            known = merged.get(code)
+            if known is not None:
+                items = dict(items, tables=tuple(sorted(
+                    set(known['tables']) | set(items['tables'])
+                )))
+            merged[code] = items
+        return merged
+
+    def _fetch(self, **kwargs):
+        """Return registry data from current tables A, B and C."""
+        from nbpy.tables import NBPTableClient
+
+        data = {}
+        for table in ('A', 'B', 'C'):
+            client = NBPTableClient(table, **dict(kwargs, cache_size=0))
+            for code, name in client.currency_names().items():
+                # Prefer (English) names of already known currencies
+                if code in self._data:
+                    name = self._data[code]['name']
+                entry = data.setdefault(code, {'name': name, 'tables': ()})
+                entry['tables'] += (table,)
+        return data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Bundled currency data
+_currencies_data = {
     'AED': {'name': 'United Arab Emirates dirham',
             'tables': ('B',)},
     'AFN': {'name': 'Afghan afghani',
@@ -349,7 +502,39 @@ currencies = {
             'tables': ('B',)},
 }
 
-currencies = {
-    code: NBPCurrency(code=code, **items)
-    for code, items in currencies.items()
-}
+
+def _read_cache(path):
+    """Return cached registry data, ``None`` if unavailable."""
+    if path is None:
+        return None
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+        cached['currencies'] = {
+            code: {'name': items['name'], 'tables': tuple(items['tables'])}
+            for code, items in cached['currencies'].items()
+        }
+        cached['fetched'] = float(cached['fetched'])
+        return cached
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(path, data):
+    """Write registry data to cache (atomically), ignore I/O errors."""
+    if path is None:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = "{}.{:d}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'fetched': time.time(), 'currencies': data}, f)
+        os.replace(tmp_path, path)
+    except (IOError, OSError):
+        pass
+
+
+#: Available currencies
+currencies = CurrencyRegistry(_currencies_data)
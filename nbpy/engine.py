@@ -0,0 +1,132 @@
+"""
+Engine shared by immutable per-currency client views.
+
+``NBPEngine`` holds transport (HTTP session), LRU cache, conditional
+request validators, metrics, hooks and settings. ``engine['EUR']`` returns
+an ``NBPClientView``: an ``NBPClient`` bound to a currency, which can't be
+modified and stores nothing but the engine and currency code. Views are
+created once per currency and reused, so request handlers can grab one
+per request at the cost of a dict lookup, and share them between threads.
+"""
+
+from functools import partial
+from nbpy import NBPClient
+from nbpy.api import NBPBaseClient
+from nbpy.currencies import currencies
+from nbpy.errors import UnknownCurrencyCode
+
+
+__all__ = ('NBPEngine', 'NBPClientView')
+
+
+class NBPEngine(NBPBaseClient):
+    """Session, caches and settings shared by per-currency client views."""
+
+    def __init__(self, **kwargs):
+        r"""
+        Initialize engine.
+
+        :param \**kwargs:
+            See ``NBPClient``. LRU cache (``cache_size``) is shared by all
+            views, keyed by currency code.
+        """
+        super().__init__(**kwargs)
+
+        archive = kwargs.get('archive', None)
+        if isinstance(archive, str):
+            from nbpy.archive import RateArchive
+            archive = RateArchive(archive)
+        self._archive = archive
+
+        self._views = {}
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(as_float={as_float!s}, suppress_errors={suppress_errors!s}, cache_size={cache_size})".format(
+            cls_name=self.__class__.__name__,
+            as_float=self.as_float,
+            suppress_errors=self.suppress_errors,
+            cache_size=self.cache_size
+        )
+
+    def __getitem__(self, currency_code):
+        """Return (shared) client view for ``currency_code``."""
+        view = self._views.get(currency_code)
+        if view is None:
+            code = currency_code.upper()
+            if code not in currencies:
+                raise UnknownCurrencyCode(code)
+            view = self._views.get(code)
+            if view is None:
+                # setdefault is atomic, so racing threads get the same view
+                view = self._views.setdefault(code, NBPClientView(self, code))
+            self._views.setdefault(currency_code, view)
+        return view
+
+    def _get_response_data(self, currency_code, uri_tail, bid_ask=False):
+        """Return HTTP response data from API call for currency."""
+        return NBPClient._get_response_data(self[currency_code], uri_tail,
+                                            bid_ask)
+
+    def _cache_context(self, key):
+        """Return context of cache events for LRU cache ``key``."""
+        return self[key[0]]._cache_context(key[1:])
+
+    def _index(self, rates, currency_code, uri_tail, bid_ask=False):
+        """Put ``rates`` of currency in ``table_index``."""
+        self[currency_code]._index(rates, uri_tail, bid_ask)
+
+
+class NBPClientView(NBPClient):
+    """
+    Immutable ``NBPClient`` for a single currency, backed by ``NBPEngine``.
+
+    Settings, caches and metrics are those of the engine. Create views with
+    ``engine[currency_code]``.
+    """
+
+    def __init__(self, engine, currency_code):
+        """
+        Initialize view of ``engine`` for ``currency_code``.
+
+        :param engine:
+            ``NBPEngine`` object.
+
+        :param currency_code:
+            Valid currency code (upper case).
+        """
+        set_attr = object.__setattr__
+        set_attr(self, '_engine', engine)
+        set_attr(self, '_currency_code', currency_code)
+
+        # Calls go through LRU cache of engine, keyed by currency
+        fetch = partial(engine._get_response_data, currency_code)
+        fetch.__wrapped__ = partial(engine._get_response_data.__wrapped__,
+                                    currency_code)
+        set_attr(self, '_get_response_data', fetch)
+
+    def __getattr__(self, name):
+        # Settings, transport, caches etc. of engine
+        if name == '_engine':
+            raise AttributeError(name)
+        return getattr(self._engine, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "{} is immutable".format(self.__class__.__name__)
+        )
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            "{} is immutable".format(self.__class__.__name__)
+        )
+
+    @property
+    def currency_code(self):
+        """Currency code (ISO 4217)."""
+        return self._currency_code
+
+    @property
+    def engine(self):
+        """Engine of view."""
+        return self._engine
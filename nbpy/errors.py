@@ -3,7 +3,7 @@
 __all__ = (
     'NBPError',
     'UnknownCurrencyCode', 'DateFormattingError',
-    'BidAskUnavailable', 'APIError',
+    'BidAskUnavailable', 'APIError', 'ArchiveError',
 )
 
 
@@ -29,4 +29,14 @@ class BidAskUnavailable(NBPError):
 
 class APIError(NBPError):
     """Raised for API errors (400, 404, connection problems etc.)."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+
+        #: HTTP status code (``None`` for connection problems etc.)
+        self.status_code = status_code
+
+
+class ArchiveError(NBPError):
+    """Raised for missing or malformed rate archives."""
     pass
@@ -1,6 +1,6 @@
 """Defines NBPCurrencyExchangeRate class."""
 
-from datetime import datetime
+from datetime import datetime, time
 from nbpy.errors import UnknownCurrencyCode
 from nbpy.currencies import currencies
 from nbpy.utils import validate_date
@@ -9,6 +9,26 @@ from nbpy.utils import validate_date
 __all__ = ('NBPExchangeRate',)
 
 
+def _rebuild(cls, currency_code, date, *values):
+    """
+    Return rate of ``cls`` without validating (trusted) arguments.
+
+    ``date`` is a date ordinal (or ``datetime`` with time of day), ``values``
+    are either ``(mid,)`` or ``(bid, ask)``.
+    """
+    rate = cls.__new__(cls)
+    rate._currency_code = currency_code
+    if isinstance(date, int):
+        date = datetime.fromordinal(date)
+    rate._date = date
+    rate.no = None
+    if len(values) == 2:
+        rate.bid, rate.ask = values
+    else:
+        rate.mid, = values
+    return rate
+
+
 class NBPExchangeRate(object):
     """Holds information about exchange rates for given currency and day."""
 
@@ -34,10 +54,16 @@ class NBPExchangeRate(object):
               Bid exchange rate for ``date``. If given, ``ask`` is also required.
             * *ask* (``decimal.Decimal`` or ``float``) --
               Ask exchange rate for ``date``. If given, ``bid`` is also required.
+            * *no* (``str``) --
+              Number of table with the rate (e.g. ``211/A/NBP/2017``).
+              Default: ``None``.
         """
         self.currency_code = currency_code
         self.date = date
 
+        #: Number of table with the rate (None if unknown)
+        self.no = kwargs.get('no', None)
+
         if 'bid' in kwargs and 'ask' in kwargs:
             self.bid = kwargs.get('bid')
             self.ask = kwargs.get('ask')
@@ -64,6 +90,20 @@ class NBPExchangeRate(object):
                 mid=self.mid
             )
 
+    def __reduce__(self):
+        """Pickle as currency code, date ordinal, values and table number."""
+        date = self.date
+        if date.time() == time() and date.tzinfo is None:
+            date = date.toordinal()
+        try:
+            values = (self.bid, self.ask)
+        except AttributeError:
+            values = (self.mid,)
+        args = (self.__class__, self.currency_code, date) + values
+        if self.no is None:
+            return (_rebuild, args)
+        return (_rebuild, args, {'no': self.no})
+
     @property
     def currency_code(self):
         """Currency code (ISO 4217)."""
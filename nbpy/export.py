@@ -0,0 +1,245 @@
+"""
+Streaming export of exchange rates to CSV, JSON Lines and Parquet files.
+
+Rows are read straight from parsed API responses (no ``NBPExchangeRate``
+objects are built), window by window, with next windows fetched
+concurrently, so memory usage doesn't depend on length of exported range.
+Windows are planned like in ``nbpy.backfill`` (table-level calls for more
+than one currency).
+
+Parquet files are written column-wise in row groups and require
+``pyarrow``.
+"""
+
+import csv
+import json
+import sys
+from collections import deque
+from datetime import datetime
+from nbpy.backfill import plan, _per_currency
+from nbpy.currencies import currencies
+from nbpy.errors import APIError
+from nbpy.utils import format_date
+
+
+__all__ = ('FORMATS', 'columns', 'iter_rows', 'export')
+
+#: Available output formats.
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def columns(table):
+    """Return names of exported columns for ``table``."""
+    values = ('bid', 'ask') if table.upper() == 'C' else ('mid',)
+    return ('table', 'code', 'date', 'no') + values
+
+
+def iter_rows(currency_codes, start_date, end_date, table='A', concurrency=4,
+              **kwargs):
+    r"""
+    Yield exported rows (tuples, see ``columns()``), sorted by window.
+
+    Windows are planned right away, so unknown currency codes raise
+    ``UnknownCurrencyCode`` before any rows are requested.
+
+    :param currency_codes:
+        Currency codes to export. Default (``None``): all currencies from
+        ``table``.
+
+    :param table:
+        ``A``, ``B`` (mid rates) or ``C`` (bid/ask rates).
+
+    :param concurrency:
+        Number of windows fetched at once. Default: ``4``.
+
+    :param \**kwargs:
+        Keyword arguments passed to API client.
+    """
+    table = table.upper()
+    if currency_codes is None:
+        currency_codes = [
+            code for code, currency in currencies.items()
+            if table in currency.tables
+        ]
+    tasks = plan(currency_codes, tables=(table,), start_date=start_date,
+                 end_date=end_date)
+    return _iter_rows(tasks, table, concurrency, kwargs)
+
+
+def _iter_rows(tasks, table, concurrency, kwargs):
+    """Yield rows of planned windows, fetched concurrently."""
+    from concurrent.futures import ThreadPoolExecutor
+    from nbpy.api import NBPBaseClient
+
+    # Windows are requested once, so nothing is worth caching
+    client = NBPBaseClient(**dict(kwargs, cache_size=0, revalidate=0))
+    keys = columns(table)[4:]
+
+    def fetch(task):
+        return list(_window_rows(client, task, keys))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = deque()
+        try:
+            for task in tasks:
+                futures.append(executor.submit(fetch, task))
+                if len(futures) >= concurrency:
+                    yield from futures.popleft().result()
+            while futures:
+                yield from futures.popleft().result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _window_rows(client, task, keys):
+    """Yield rows of single planned window."""
+    from nbpy import NBPClient
+    from nbpy.tables import NBPTableClient
+
+    tail = "{}/{}".format(format_date(task.start), format_date(task.end))
+    code = task.codes[0] if len(task.codes) == 1 else None
+    if code is not None and not _per_currency(task.table, code):
+        code = None
+
+    if code is None:
+        uri = NBPTableClient._uri_template.format(
+            base_uri=client.base_uri, table=task.table.lower(), tail=tail
+        )
+    else:
+        uri = NBPClient._uri_template.format(
+            base_uri=client.base_uri, table=task.table.lower(),
+            code=code.lower(), tail=tail
+        )
+
+    try:
+        data = client._request(uri, context={
+            'currency': code, 'table': task.table, 'uri_tail': tail
+        })
+    except APIError as e:
+        if e.status_code == 404:
+            # No tables in window
+            return
+        raise
+
+    if code is not None:
+        for rate in data['rates']:
+            yield (task.table, code, rate['effectiveDate'], rate['no']) + \
+                tuple(rate[key] for key in keys)
+        return
+
+    codes = set(task.codes)
+    for exchange_table in data:
+        prefix = (exchange_table['effectiveDate'], exchange_table['no'])
+        for rate in exchange_table['rates']:
+            rate_code = rate['code'].upper()
+            if rate_code in codes:
+                yield (task.table, rate_code) + prefix + \
+                    tuple(rate[key] for key in keys)
+
+
+def _write_csv(rows, names, output):
+    writer = csv.writer(output)
+    writer.writerow(names)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def _write_jsonl(rows, names, output):
+    count = 0
+    for row in rows:
+        # Values as strings keep decimals exact (like JSONLinesSink)
+        record = {
+            name: value if i < 4 else str(value)
+            for i, (name, value) in enumerate(zip(names, row))
+        }
+        output.write(json.dumps(record, sort_keys=True) + '\n')
+        count += 1
+    return count
+
+
+def _write_parquet(rows, names, path, as_float=False, row_group_size=65536):
+    import pyarrow
+    import pyarrow.parquet
+
+    value_type = pyarrow.float64() if as_float else pyarrow.decimal128(18, 8)
+    schema = pyarrow.schema(
+        [(name, pyarrow.string()) for name in ('table', 'code')] +
+        [('date', pyarrow.date32()), ('no', pyarrow.string())] +
+        [(name, value_type) for name in names[4:]]
+    )
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+        batch = [[] for _ in names]
+
+        def flush():
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type)
+                 for values, field in zip(batch, schema)],
+                schema=schema
+            ))
+            for values in batch:
+                del values[:]
+
+        for row in rows:
+            for values, value in zip(batch, row):
+                values.append(value)
+            batch[2][-1] = datetime.strptime(row[2], '%Y-%m-%d').date()
+            count += 1
+            if len(batch[0]) == row_group_size:
+                flush()
+        if batch[0] or not count:
+            flush()
+    return count
+
+
+def export(currency_codes, start_date, end_date, output, fmt=None,
+           table='A', concurrency=4, **kwargs):
+    r"""
+    Export exchange rates to file, return number of exported rates.
+
+    :param currency_codes:
+        Currency codes to export, ``None`` for all currencies from ``table``.
+
+    :param output:
+        Path of output file, or ``-`` for standard output (CSV and JSON
+        Lines only).
+
+    :param fmt:
+        ``csv``, ``jsonl`` or ``parquet``. Default: from extension of
+        ``output``, CSV for standard output.
+
+    :param table:
+        ``A``, ``B`` (mid rates) or ``C`` (bid/ask rates).
+
+    :param concurrency:
+        Number of windows fetched at once. Default: ``4``.
+
+    :param \**kwargs:
+        Keyword arguments passed to API client.
+    """
+    if fmt is None:
+        extension = output.rsplit('.', 1)[-1].lower()
+        fmt = extension if extension in FORMATS else 'csv'
+    if fmt not in FORMATS:
+        raise ValueError("Unknown format {}".format(fmt))
+
+    names = columns(table)
+    rows = iter_rows(currency_codes, start_date, end_date, table=table,
+                     concurrency=concurrency, **kwargs)
+
+    if fmt == 'parquet':
+        if output == '-':
+            raise ValueError("Parquet can't be written to standard output")
+        return _write_parquet(rows, names, output,
+                              as_float=kwargs.get('as_float', False))
+
+    writer = _write_csv if fmt == 'csv' else _write_jsonl
+    if output == '-':
+        return writer(rows, names, sys.stdout)
+    with open(output, 'w', newline='') as f:
+        return writer(rows, names, f)
@@ -0,0 +1,193 @@
+"""Gold prices API calls (``/cenyzlota``)."""
+
+import time
+from datetime import date as date_cls, datetime
+from nbpy.api import NBPBaseClient, iter_windows
+from nbpy.errors import APIError
+from nbpy.utils import (
+    validate_date, parse_date, format_date, first_if_sequence
+)
+
+
+__all__ = ('NBPGoldPrice', 'NBPGoldClient')
+
+#: First date with published gold price.
+FIRST_DATE = date_cls(2013, 1, 2)
+
+
+class NBPGoldPrice(object):
+    """Holds price of 1 g of gold (in PLN) for given day."""
+
+    def __init__(self, date, price):
+        r"""
+        Initialize for date and price.
+
+        :param date:
+            ``datetime.datetime`` object or properly formatted date string
+            (``YYYY-MM-DD``).
+
+        :param price:
+            Price of 1 g of gold (``decimal.Decimal`` or ``float``).
+        """
+        self.date = date
+        self.price = price
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({date}, price={price})".format(
+            cls_name=self.__class__.__name__,
+            date=self.date.strftime('%Y-%m-%d'),
+            price=self.price
+        )
+
+    @property
+    def date(self):
+        """Datetime object."""
+        return self._date
+
+    @date.setter
+    def date(self, date):
+        validate_date(date)
+
+        if isinstance(date, datetime):
+            self._date = date
+        else:
+            self._date = datetime.strptime(date, "%Y-%m-%d")
+
+    def __call__(self, grams):
+        """Return price of ``grams`` of gold in PLN."""
+        return self.price * grams
+
+    def __mul__(self, grams):
+        """Return price of ``grams`` of gold in PLN."""
+        return self(grams)
+
+    def __rmul__(self, grams):
+        """Return price of ``grams`` of gold in PLN."""
+        return self(grams)
+
+
+class NBPGoldClient(NBPBaseClient):
+    """NBP Web API client for gold prices."""
+
+    # Template URI for NBP API calls
+    _uri_template = "{base_uri}/cenyzlota/{tail}"
+
+    #: Max number of days in date range call.
+    max_days = 367
+
+    def __init__(self, **kwargs):
+        r"""
+        Initialize client.
+
+        :param \**kwargs:
+            See ``NBPClient``.
+        """
+        super().__init__(**kwargs)
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(as_float={as_float!s}, suppress_errors={suppress_errors!s}, cache_size={cache_size})".format(
+            cls_name=self.__class__.__name__,
+            as_float=self.as_float,
+            suppress_errors=self.suppress_errors,
+            cache_size=self.cache_size
+        )
+
+    def _is_window_published(self, start_date, end_date):
+        """Return True if any price was published in date range."""
+        if self.calendar and format_date(end_date) < FIRST_DATE.isoformat():
+            return False
+        # Prices are published on the same days as table A
+        return self._is_published('A', start_date, end_date)
+
+    def _get_response_data(self, uri_tail):
+        """Return HTTP response data from API call."""
+        uri = self._uri_template.format(
+            base_uri=self.base_uri,
+            tail=uri_tail.lower()
+        )
+
+        # Send request to API, raise exception on error
+        try:
+            prices = self._request(uri, self._cache_context((uri_tail,)))
+        except APIError:
+            if self.suppress_errors:
+                # Return None if errors suppressed
+                return None
+            raise
+
+        start = time.perf_counter()
+        prices = sorted([
+            NBPGoldPrice(date=price['data'], price=price['cena'])
+            for price in prices
+        ], key=lambda p: p.date)
+
+        if self.hooks.enabled:
+            self.hooks.emit('after_construct', client=self, currency=None,
+                            table=None, uri_tail=uri_tail, rows=len(prices),
+                            duration=time.perf_counter() - start)
+        return prices
+
+    @first_if_sequence
+    def current(self):
+        """Return last published gold price."""
+        return self._get_response_data('')
+
+    @first_if_sequence
+    def today(self):
+        """Return gold price from today."""
+        return self._get_response_data('today')
+
+    def last(self, n):
+        """Return last ``n`` gold prices."""
+        uri_tail = "last/{:d}".format(n)
+        return self._get_response_data(uri_tail)
+
+    @first_if_sequence
+    def date(self, date):
+        """Return gold price from ``date``."""
+        uri_tail = format_date(date)
+        if not self._is_window_published(date, date):
+            return self._not_published(uri_tail)
+        return self._get_response_data(uri_tail)
+
+    def date_range(self, start_date, end_date):
+        """
+        Return gold prices from ``start_date`` to ``end_date``.
+
+        Ranges longer than ``max_days`` are split into windows.
+        """
+        validate_date(start_date)
+        validate_date(end_date)
+
+        uri_tail = "{}/{}".format(format_date(start_date),
+                                  format_date(end_date))
+        if not self._is_window_published(start_date, end_date):
+            return self._not_published(uri_tail)
+
+        days = (parse_date(end_date) - parse_date(start_date)).days
+        if days < self.max_days:
+            # Single call
+            return self._get_response_data(uri_tail)
+
+        # Windows failing with suppressed errors yield nothing
+        prices = list(iter_windows([self], start_date, end_date, cached=True))
+        if not prices and self.suppress_errors:
+            return None
+        return prices
+
+    def iter_range(self, start_date, end_date):
+        """
+        Iterate over gold prices from ``start_date`` to ``end_date``.
+
+        Works like ``NBPClient.iter_range()``.
+        """
+        validate_date(start_date)
+        validate_date(end_date)
+
+        return iter_windows([self], start_date, end_date)
+
+    def __call__(self):
+        """Return ``self.current()``."""
+        return self.current()
@@ -0,0 +1,147 @@
+"""
+Event hooks for tracing and profiling of API clients.
+
+Clients emit events at every stage of fetch/parse/construct pipeline:
+
+* ``before_request`` -- ``uri``, ``endpoint``,
+* ``after_response`` -- ``uri``, ``endpoint``, ``status_code``,
+  ``duration``, ``response_bytes``,
+* ``after_parse`` -- ``uri``, ``duration``,
+* ``after_construct`` -- ``rows``, ``duration``,
+* ``cache_hit``, ``cache_miss`` -- ``key`` (misses, emitted after the call,
+  also ``duration``).
+
+Every event context contains also ``client`` (client object emitting event)
+and ``currency``, ``table`` and ``uri_tail`` of call (``None`` if unknown,
+e.g. currency of table-level calls).
+Callbacks are called as ``callback(event, context)``. Clients check
+``hooks.enabled`` before building event context, so hooks cost next to
+nothing when no callbacks are registered.
+"""
+
+import threading
+from collections import defaultdict
+
+
+__all__ = ('Hooks', 'StageProfiler', 'global_hooks', 'EVENTS')
+
+#: Available events.
+EVENTS = (
+    'before_request', 'after_response', 'after_parse', 'after_construct',
+    'cache_hit', 'cache_miss',
+)
+
+
+class Hooks(object):
+    """Registry of event callbacks."""
+
+    def __init__(self, parent=None):
+        """
+        Initialize empty registry.
+
+        :param parent:
+            ``Hooks`` object to which all events are propagated as well.
+        """
+        self.parent = parent
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(callbacks={count:d})".format(
+            cls_name=self.__class__.__name__,
+            count=sum(len(callbacks) for callbacks in self._callbacks.values())
+        )
+
+    @property
+    def enabled(self):
+        """True if any callback (here or in parent) is registered."""
+        return bool(self._callbacks) or (
+            self.parent is not None and self.parent.enabled
+        )
+
+    def register(self, callback, events=EVENTS):
+        """Register ``callback`` for ``events`` (default: all events)."""
+        if isinstance(events, str):
+            events = (events,)
+
+        with self._lock:
+            for event in events:
+                if event not in EVENTS:
+                    raise ValueError("Unknown event {}".format(event))
+                # Copy on write, so emit() doesn't need locking
+                callbacks = dict(self._callbacks)
+                callbacks[event] = callbacks.get(event, ()) + (callback,)
+                self._callbacks = callbacks
+        return callback
+
+    def unregister(self, callback, events=EVENTS):
+        """Unregister ``callback`` from ``events`` (default: all events)."""
+        if isinstance(events, str):
+            events = (events,)
+
+        with self._lock:
+            callbacks = dict(self._callbacks)
+            for event in events:
+                remaining = tuple(
+                    cb for cb in callbacks.get(event, ()) if cb != callback
+                )
+                if remaining:
+                    callbacks[event] = remaining
+                else:
+                    callbacks.pop(event, None)
+            self._callbacks = callbacks
+
+    def emit(self, event, **context):
+        """Call all callbacks registered for ``event``."""
+        for callback in self._callbacks.get(event, ()):
+            callback(event, context)
+        if self.parent is not None:
+            self.parent.emit(event, **context)
+
+
+class StageProfiler(object):
+    """Callback aggregating durations of pipeline stages."""
+
+    def __init__(self, hooks=None):
+        """
+        Initialize profiler, starting it if ``hooks`` are given.
+
+        :param hooks:
+            ``Hooks`` to attach to (e.g. ``nbpy.hooks.global_hooks``).
+        """
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {'count': 0, 'total': 0.0,
+                                           'max': 0.0})
+        self._hooks = None
+        if hooks is not None:
+            self.start(hooks)
+
+    def __call__(self, event, context):
+        duration = context.get('duration')
+        with self._lock:
+            stats = self._stats[event]
+            stats['count'] += 1
+            if duration is not None:
+                stats['total'] += duration
+                stats['max'] = max(stats['max'], duration)
+
+    def start(self, hooks):
+        """Attach profiler to ``hooks``."""
+        self._hooks = hooks
+        hooks.register(self)
+
+    def stop(self):
+        """Detach profiler from hooks."""
+        if self._hooks is not None:
+            self._hooks.unregister(self)
+            self._hooks = None
+
+    def report(self):
+        """Return dict with count, total and max duration for every event."""
+        with self._lock:
+            return {event: dict(stats) for event, stats in self._stats.items()}
+
+
+#: Hooks of all clients.
+global_hooks = Hooks()
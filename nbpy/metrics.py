@@ -0,0 +1,286 @@
+"""
+Runtime metrics of API clients.
+
+Every client records to its own ``Metrics`` object (``client.metrics``),
+which propagates everything to module-level ``global_metrics``. Metrics are
+available as a plain dict (``snapshot()``) or in Prometheus text exposition
+format (``to_prometheus()``).
+"""
+
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+__all__ = ('Metrics', 'Histogram', 'global_metrics', 'endpoint_name')
+
+#: Default histogram buckets (in seconds).
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+#: Histogram buckets of JSON parse time (in seconds).
+PARSE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                 0.0025, 0.005, 0.01, 0.025)
+
+
+# First path segments of API resources
+_FAMILIES = ('exchangerates', 'cenyzlota')
+
+
+def _is_date(segment):
+    return len(segment) == 10 and segment[4] == '-' and segment[7] == '-'
+
+
+def endpoint_name(uri):
+    """
+    Return endpoint name for API ``uri``, without any variable parts.
+
+    E.g. ``exchangerates/rates/date_range`` for
+    ``.../exchangerates/rates/a/eur/2017-10-01/2017-10-31/``.
+    """
+    parts = [part for part in urlsplit(uri).path.split('/') if part]
+    for i, part in enumerate(parts):
+        if part in _FAMILIES:
+            # Strip base URI path (e.g. /api)
+            parts = parts[i:]
+            break
+
+    # Resource family, e.g. exchangerates/rates, exchangerates/tables
+    family = parts[:2] if parts[:1] == ['exchangerates'] else parts[:1]
+    tail = parts[len(family):]
+
+    dates = sum(1 for part in tail if _is_date(part))
+    if dates == 2:
+        kind = 'date_range'
+    elif dates == 1:
+        kind = 'date'
+    elif 'last' in tail:
+        kind = 'last'
+    elif 'today' in tail:
+        kind = 'today'
+    else:
+        kind = 'current'
+
+    return '/'.join(family + [kind])
+
+
+class Histogram(object):
+    """Cumulative histogram (Prometheus-style) of observed values."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Add observed ``value``."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        """Return dict with cumulative bucket counts, sum and count."""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'buckets': buckets, 'sum': self.sum, 'count': self.count}
+
+
+class Metrics(object):
+    """Thread-safe registry of client metrics."""
+
+    def __init__(self, parent=None):
+        """
+        Initialize empty metrics.
+
+        :param parent:
+            ``Metrics`` object to which all records are propagated as well.
+        """
+        self.parent = parent
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(requests={requests:d})".format(
+            cls_name=self.__class__.__name__,
+            requests=sum(self._requests.values())
+        )
+
+    def reset(self):
+        """Clear all recorded metrics."""
+        with self._lock:
+            self._requests = defaultdict(int)
+            self._latency = defaultdict(Histogram)
+            self._response_bytes = defaultdict(int)
+            self._wire_bytes = defaultdict(int)
+            self._not_modified = defaultdict(int)
+            self._bytes_saved = defaultdict(int)
+            self._parse_time = Histogram(PARSE_BUCKETS)
+            self._cache = defaultdict(int)
+            self._errors = defaultdict(int)
+
+    def record_request(self, endpoint, latency, response_bytes,
+                       wire_bytes=None):
+        """
+        Record API request to ``endpoint``.
+
+        ``response_bytes`` is size of (decoded) body, ``wire_bytes`` number
+        of bytes actually received (e.g. compressed), if known.
+        """
+        if wire_bytes is None:
+            wire_bytes = response_bytes
+        with self._lock:
+            self._requests[endpoint] += 1
+            self._latency[endpoint].observe(latency)
+            self._response_bytes[endpoint] += response_bytes
+            self._wire_bytes[endpoint] += wire_bytes
+            if response_bytes > wire_bytes:
+                self._bytes_saved['compression'] += response_bytes - wire_bytes
+        if self.parent is not None:
+            self.parent.record_request(endpoint, latency, response_bytes,
+                                       wire_bytes)
+
+    def record_not_modified(self, endpoint, saved_bytes):
+        """Record 304 response, which saved ``saved_bytes`` of body."""
+        with self._lock:
+            self._not_modified[endpoint] += 1
+            self._bytes_saved['not_modified'] += saved_bytes
+        if self.parent is not None:
+            self.parent.record_not_modified(endpoint, saved_bytes)
+
+    def record_parse(self, duration):
+        """Record time spent on parsing response."""
+        with self._lock:
+            self._parse_time.observe(duration)
+        if self.parent is not None:
+            self.parent.record_parse(duration)
+
+    def record_cache(self, event):
+        """Record LRU cache ``event`` (``hit``, ``miss`` or ``eviction``)."""
+        with self._lock:
+            self._cache[event] += 1
+        if self.parent is not None:
+            self.parent.record_cache(event)
+
+    def record_error(self, error):
+        """Record error (exception object or class name)."""
+        if not isinstance(error, str):
+            error = error.__class__.__name__
+        with self._lock:
+            self._errors[error] += 1
+        if self.parent is not None:
+            self.parent.record_error(error)
+
+    @property
+    def cache_hit_ratio(self):
+        """Ratio of LRU cache hits to all lookups (``None`` if no lookups)."""
+        with self._lock:
+            hits, misses = self._cache['hit'], self._cache['miss']
+        if not hits + misses:
+            return None
+        return hits / (hits + misses)
+
+    def snapshot(self):
+        """Return all metrics as dict."""
+        with self._lock:
+            return {
+                'requests': dict(self._requests),
+                'latency': {
+                    endpoint: histogram.snapshot()
+                    for endpoint, histogram in self._latency.items()
+                },
+                'response_bytes': dict(self._response_bytes),
+                'wire_bytes': dict(self._wire_bytes),
+                'not_modified': dict(self._not_modified),
+                'bytes_saved': {
+                    reason: self._bytes_saved[reason]
+                    for reason in ('compression', 'not_modified')
+                },
+                'parse_time': self._parse_time.snapshot(),
+                'cache': {
+                    event: self._cache[event]
+                    for event in ('hit', 'miss', 'eviction')
+                },
+                'errors': dict(self._errors),
+            }
+
+    def to_prometheus(self, prefix='nbpy'):
+        """Return all metrics in Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help_text))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, kind))
+
+        def sample(name, labels, value):
+            labels = ','.join(
+                '{}="{}"'.format(key, val) for key, val in labels
+            )
+            lines.append("{}_{}{} {}".format(
+                prefix, name, '{' + labels + '}' if labels else '', value
+            ))
+
+        def histogram(name, labels, data):
+            for bound, count in sorted(data['buckets'].items()):
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                sample(name + '_bucket', labels + [('le', le)], count)
+            sample(name + '_sum', labels, data['sum'])
+            sample(name + '_count', labels, data['count'])
+
+        metric('requests_total', 'counter', "API requests by endpoint.")
+        for endpoint, count in sorted(snapshot['requests'].items()):
+            sample('requests_total', [('endpoint', endpoint)], count)
+
+        metric('request_duration_seconds', 'histogram',
+               "API request latency by endpoint.")
+        for endpoint, data in sorted(snapshot['latency'].items()):
+            histogram('request_duration_seconds', [('endpoint', endpoint)],
+                      data)
+
+        metric('response_bytes_total', 'counter',
+               "Bytes of API responses by endpoint.")
+        for endpoint, count in sorted(snapshot['response_bytes'].items()):
+            sample('response_bytes_total', [('endpoint', endpoint)], count)
+
+        metric('wire_bytes_total', 'counter',
+               "Bytes received from API (before decompression) by endpoint.")
+        for endpoint, count in sorted(snapshot['wire_bytes'].items()):
+            sample('wire_bytes_total', [('endpoint', endpoint)], count)
+
+        metric('not_modified_total', 'counter',
+               "API responses revalidated with 304 by endpoint.")
+        for endpoint, count in sorted(snapshot['not_modified'].items()):
+            sample('not_modified_total', [('endpoint', endpoint)], count)
+
+        metric('bytes_saved_total', 'counter',
+               "Response bytes not transferred, by reason.")
+        for reason, count in sorted(snapshot['bytes_saved'].items()):
+            sample('bytes_saved_total', [('reason', reason)], count)
+
+        metric('parse_duration_seconds', 'histogram',
+               "Time spent on parsing API responses.")
+        histogram('parse_duration_seconds', [], snapshot['parse_time'])
+
+        metric('cache_events_total', 'counter', "LRU cache events.")
+        for event, count in sorted(snapshot['cache'].items()):
+            sample('cache_events_total', [('event', event)], count)
+
+        metric('errors_total', 'counter', "Errors by class.")
+        for error, count in sorted(snapshot['errors'].items()):
+            sample('errors_total', [('error', error)], count)
+
+        return '\n'.join(lines) + '\n'
+
+
+#: Metrics of all clients.
+global_metrics = Metrics()
@@ -0,0 +1,247 @@
+"""
+Publication-aware prefetching of exchange rates.
+
+``PrefetchScheduler`` warms LRU caches of given clients at startup, then
+polls around expected publication time of their tables (on publication
+days from ``nbpy.business_days``) and refreshes
+cached ``current`` and ``today`` calls as soon as new tables appear, so no
+application request pays for the first fetch after publication (or after
+deploy).
+
+Polling is cheap: a single small ``today`` call (which is 404 until the
+table is published) per table, and only after it succeeds all clients using
+given table are refreshed.
+"""
+
+import threading
+from datetime import datetime, time, timedelta
+
+from nbpy.business_days import is_publication_day
+from nbpy.errors import NBPError
+from nbpy.utils import parse_date
+
+
+__all__ = ('PrefetchScheduler', 'PUBLICATION_TIMES')
+
+#: Earliest expected publication time of tables (local time in Warsaw).
+PUBLICATION_TIMES = {
+    'A': time(11, 45),
+    'B': time(11, 45),
+    'C': time(7, 45),
+}
+
+
+class _Target(object):
+    """Client (with call arguments) kept warm by scheduler."""
+
+    def __init__(self, client, bid_ask=False):
+        self.client = client
+        # NBPClient calls take bid_ask argument, NBPTableClient calls don't
+        self.args = (bid_ask,) if hasattr(client, 'currency_code') else ()
+        if hasattr(client, 'currency_code'):
+            from nbpy.currencies import currencies
+            currency = currencies[client.currency_code]
+            self.table = 'C' if bid_ask else currency.mid_table
+        else:
+            self.table = client.table
+
+    def fetch(self, uri_tail):
+        """Call API bypassing LRU cache, return result (``None`` if none)."""
+        return self.client._get_response_data.__wrapped__(uri_tail,
+                                                          *self.args)
+
+    def store(self, uri_tail, result):
+        """Put ``result`` in LRU cache of client."""
+        cache = self.client._get_response_data.cache
+        cache.set((uri_tail,) + self.args, result)
+
+
+def _effective_date(result):
+    """Return effective date of last rate (or table) in ``result``."""
+    if not result:
+        return None
+    return max(item.date for item in result)
+
+
+class PrefetchScheduler(object):
+    """Keeps caches of clients warm, prefetching tables after publication."""
+
+    def __init__(self, clients=(), bid_ask=False, publication_times=None,
+                 poll_interval=60.0, poll_window=4 * 3600.0, now=None):
+        """
+        Initialize scheduler (call ``start()`` to run in background thread).
+
+        :param clients:
+            ``NBPClient`` and ``nbpy.tables.NBPTableClient`` objects to keep
+            warm (more can be added with ``add()``).
+
+        :param bid_ask:
+            If ``True``, bid/ask rates of ``NBPClient`` objects are kept warm
+            instead of mid rates.
+
+        :param publication_times:
+            Dict of table and earliest expected publication time. Default:
+            ``PUBLICATION_TIMES``.
+
+        :param poll_interval:
+            Time (in seconds) between polls. Default: ``60``.
+
+        :param poll_window:
+            How long (in seconds) after expected publication time to poll
+            before giving up until the next day. Default: 4 hours.
+
+        :param now:
+            Function returning current time (``datetime``), e.g. in Warsaw
+            time zone. Default: ``datetime.now``.
+        """
+        self.publication_times = dict(PUBLICATION_TIMES,
+                                      **(publication_times or {}))
+        self.poll_interval = poll_interval
+        self.poll_window = timedelta(seconds=poll_window)
+        self.now = now or datetime.now
+
+        #: Effective date of last seen table (by table).
+        self.last_dates = {}
+
+        #: Number of failed calls (other than 404 of unpublished tables).
+        self.errors = 0
+
+        self._targets = []
+        self._stop = threading.Event()
+        self._thread = None
+        for client in clients:
+            self.add(client, bid_ask)
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(clients={count:d})".format(
+            cls_name=self.__class__.__name__,
+            count=len(self._targets)
+        )
+
+    @property
+    def tables(self):
+        """Tables of all clients."""
+        return sorted({target.table for target in self._targets})
+
+    def add(self, client, bid_ask=False):
+        """Add ``client`` to keep warm."""
+        self._targets.append(_Target(client, bid_ask))
+
+    def _refresh(self, targets, uri_tail=''):
+        """Fetch ``uri_tail`` for ``targets`` and store it as current."""
+        today = parse_date(self.now())
+        for target in targets:
+            try:
+                result = target.fetch(uri_tail)
+            except NBPError:
+                # Retry on next poll
+                self.errors += 1
+                continue
+            if result is None:
+                continue
+
+            target.store('', result)
+            date = _effective_date(result)
+            if date == today:
+                target.store('today', result)
+            last_date = self.last_dates.get(target.table, datetime.min)
+            if date is not None and date > last_date:
+                self.last_dates[target.table] = date
+
+    def warm_up(self):
+        """Fetch current tables for all clients."""
+        self._refresh(self._targets)
+
+    def is_due(self, table, now=None):
+        """Return True if ``table`` should be polled for at ``now``."""
+        now = now or self.now()
+        today = parse_date(now)
+        if self.last_dates.get(table, datetime.min) >= today:
+            # Already have today's table
+            return False
+        if not is_publication_day(today, table):
+            return False
+
+        start = datetime.combine(today.date(), self.publication_times[table])
+        return start <= now < start + self.poll_window
+
+    def poll(self):
+        """
+        Check tables which are due, prefetch new ones.
+
+        :return: List of newly published tables.
+        """
+        published = []
+        for table in self.tables:
+            if not self.is_due(table):
+                continue
+
+            targets = [
+                target for target in self._targets if target.table == table
+            ]
+            try:
+                result = targets[0].fetch('today')
+            except NBPError as e:
+                # 404: not published yet, otherwise retry on next poll (any
+                # error escaping would stop the scheduler thread)
+                if getattr(e, 'status_code', None) != 404:
+                    self.errors += 1
+                continue
+            if _effective_date(result) != parse_date(self.now()):
+                continue
+
+            targets[0].store('today', result)
+            targets[0].store('', result)
+            self.last_dates[table] = _effective_date(result)
+            self._refresh(targets[1:])
+            published.append(table)
+        return published
+
+    def next_poll(self, now=None):
+        """Return seconds until next poll should happen."""
+        now = now or self.now()
+        delays = []
+        for table in self.tables:
+            if self.is_due(table, now):
+                return self.poll_interval
+
+            # Nearest publication time in the future (within a week)
+            day = parse_date(now)
+            for _ in range(8):
+                start = datetime.combine(day.date(),
+                                         self.publication_times[table])
+                if start > now and self.is_due(table, start):
+                    delays.append((start - now).total_seconds())
+                    break
+                day += timedelta(days=1)
+
+        return min(delays) if delays else self.poll_interval
+
+    def run(self):
+        """Warm up, then poll until ``stop()`` is called."""
+        self.warm_up()
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.next_poll())
+
+    def start(self):
+        """Run in background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,278 @@
+"""
+Caching proxy for NBP Web API.
+
+``CachingProxy`` serves the same paths as NBP Web API (``/api/exchangerates``
+and ``/api/cenyzlota``), fetching missing responses from upstream API once
+and serving them from memory afterwards. Concurrent requests for the same
+path are coalesced into a single upstream request. Responses for past dates
+never change, so they are cached until evicted (and kept in ``SharedCache``,
+if given); responses for ``current``, ``today`` and ``last`` calls expire
+after ``ttl`` seconds. Requests with query strings (e.g. ``?format=xml``)
+are rejected with 400, as responses are cached by path.
+
+Run with ``python -m nbpy serve``.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit
+
+from nbpy.api import BASE_URI, NBPBaseClient
+from nbpy.cache import LRUCache
+from nbpy.errors import APIError
+from nbpy.utils import is_final
+
+
+__all__ = ('CachingProxy', 'ProxyServer')
+
+# First path segments of proxied API resources
+_FAMILIES = ('exchangerates', 'cenyzlota')
+
+# Statuses which are (negatively) cached, as retrying won't change them soon
+_CACHED_ERRORS = (400, 404)
+
+
+class _InFlight(object):
+    """Upstream request awaited by coalesced requests."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class CachingProxy(object):
+    """Fetches, caches and coalesces upstream API responses."""
+
+    def __init__(self, upstream=BASE_URI, cache_size=4096, ttl=60.0,
+                 **kwargs):
+        r"""
+        Initialize proxy.
+
+        :param upstream:
+            Base URI of upstream API. Default: ``nbpy.BASE_URI``.
+
+        :param cache_size:
+            Max number of cached responses. Default: ``4096``.
+
+        :param ttl:
+            Time (in seconds) for which responses of ``current``, ``today``
+            and ``last`` calls (and errors) are cached. Default: ``60``.
+
+        :param \**kwargs:
+            Keyword arguments passed to ``nbpy.api.NBPBaseClient`` (e.g.
+            ``cache``, ``transport``, ``metrics``, proxy settings).
+        """
+        self.ttl = ttl
+        self.client = NBPBaseClient(base_uri=upstream,
+                                    **dict(kwargs, cache_size=0))
+        self._cache = LRUCache(maxsize=cache_size,
+                               metrics=self.client.metrics,
+                               hooks=self.client.hooks,
+                               context={'client': self.client})
+        self._shared = self.client._cache
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({upstream}, ttl={ttl})".format(
+            cls_name=self.__class__.__name__,
+            upstream=self.client.base_uri,
+            ttl=self.ttl
+        )
+
+    @property
+    def metrics(self):
+        """Metrics of upstream requests and cache."""
+        return self.client.metrics
+
+    @staticmethod
+    def is_final(path, today=None):
+        """
+        Return True if response for API ``path`` can't change anymore.
+
+        That is true for calls for given date (or date range) in the past.
+        """
+        return is_final(path, today)
+
+    def get(self, path):
+        """
+        Return ``(status_code, body, cached)`` for API ``path``.
+
+        ``path`` is relative to base URI (e.g.
+        ``/exchangerates/rates/a/eur/``).
+        """
+        path = '/' + path.strip('/') + '/'
+        cached = self._cache.get(path)
+        if cached is not None and (cached[2] is None or
+                                   cached[2] > time.monotonic()):
+            return cached[0], cached[1], True
+
+        with self._lock:
+            in_flight = self._in_flight.get(path)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[path] = _InFlight()
+
+        if not leader:
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                # Leader failed unexpectedly, fail the same way
+                raise in_flight.error
+            return in_flight.result + (True,)
+
+        try:
+            in_flight.result = self._fetch(path)
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[path]
+            in_flight.event.set()
+        return in_flight.result + (False,)
+
+    def _fetch(self, path):
+        """Fetch ``path`` from upstream (or shared cache) and cache it."""
+        uri = self.client.base_uri + path
+        final = self.is_final(path)
+        try:
+            if final and self._shared is not None:
+                body = self._shared.get_or_fetch(
+                    uri, lambda: self.client._fetch(uri)
+                )
+            else:
+                body = self.client._fetch(uri)
+            status = 200
+        except APIError as e:
+            status = e.status_code or 502
+            body = str(e)
+
+        if status == 200 or status in _CACHED_ERRORS:
+            expires = None
+            if not (final and status == 200):
+                expires = time.monotonic() + self.ttl
+            self._cache.set(path, (status, body, expires))
+        return status, body
+
+    def clear(self):
+        """Remove all responses cached in memory."""
+        self._cache.clear()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    """Request handler for ``ProxyServer``."""
+
+    #: ProxyServer object (set by ProxyServer)
+    server_config = None
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server_config.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def do_GET(self):
+        uri = urlsplit(self.path)
+        path = uri.path
+        prefix = self.server_config.prefix
+        cache_status = None
+
+        if uri.query:
+            # Responses are cached by path, query would be ignored
+            status = 400
+            body = "400 Bad Request: query parameters aren't supported"
+            content_type = 'text/plain; charset=utf-8'
+        elif path.rstrip('/') == '/metrics':
+            status = 200
+            body = self.server_config.proxy.metrics.to_prometheus()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path.startswith(prefix) and \
+                path[len(prefix):].lstrip('/').split('/')[0] in _FAMILIES:
+            try:
+                status, body, cached = self.server_config.proxy.get(
+                    path[len(prefix):]
+                )
+                cache_status = 'HIT' if cached else 'MISS'
+            except Exception as e:
+                status, body = 502, "502 Bad Gateway: {}".format(e)
+            content_type = 'application/json; charset=utf-8'
+            if status != 200:
+                content_type = 'text/plain; charset=utf-8'
+        else:
+            status = 404
+            body = "404 Not Found"
+            content_type = 'text/plain; charset=utf-8'
+
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if cache_status is not None:
+            self.send_header('X-Cache', cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ProxyServer(object):
+    """HTTP server exposing ``CachingProxy`` under NBP Web API paths."""
+
+    def __init__(self, proxy=None, host='127.0.0.1', port=8080,
+                 prefix='/api', quiet=False):
+        """
+        Initialize server (call ``start()`` to serve in background thread).
+
+        :param proxy: ``CachingProxy`` (default: proxy of NBP Web API).
+        :param host: Host to listen on.
+        :param port: Port to listen on, ``0`` for any free port.
+        :param prefix: Path prefix of API (as in ``nbpy.BASE_URI``).
+        :param quiet: If ``True``, requests aren't logged.
+        """
+        self.proxy = proxy if proxy is not None else CachingProxy()
+        self.prefix = '/' + prefix.strip('/') if prefix.strip('/') else ''
+        self.quiet = quiet
+        self._thread = None
+
+        handler = type('ProxyHandler', (_ProxyHandler,),
+                       {'server_config': self})
+        self._server = _ThreadingHTTPServer((host, port), handler)
+
+    @property
+    def base_uri(self):
+        """Base URI to pass to clients."""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}{}".format(host, port, self.prefix)
+
+    def start(self):
+        """Serve in background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        """Serve in current thread."""
+        self._server.serve_forever()
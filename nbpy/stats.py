@@ -0,0 +1,293 @@
+"""
+Rolling statistics over exchange rate series.
+
+``RollingWindow`` keeps mean, standard deviation, min/max and percent change
+of the last ``size`` values, updated in (amortized) O(1) per appended value.
+``RollingStats`` does the same for ``mid``, ``bid`` and ``ask`` of
+``NBPExchangeRate`` series, skipping rates it has already seen, so results
+of every refresh (e.g. ``last(n)``) can simply be appended.
+
+``rolling_series()`` computes statistics for every window of a whole series
+(e.g. for initial backfill of a dashboard), vectorized with NumPy if it's
+installed.
+"""
+
+import math
+from collections import deque
+from decimal import Decimal
+
+
+__all__ = ('RollingWindow', 'RollingStats', 'rolling_series')
+
+#: Statistics computed by rolling windows.
+STATISTICS = ('mean', 'std', 'min', 'max', 'pct_change')
+
+
+class RollingWindow(object):
+    """Statistics of the last ``size`` values."""
+
+    def __init__(self, size):
+        """
+        Initialize empty window.
+
+        :param size:
+            Number of values in window.
+        """
+        if size < 1:
+            raise ValueError("Window size has to be positive")
+        self.size = size
+        self._values = deque()
+        self._count = 0
+        # Running sums are exact for Decimal values
+        self._sum = 0
+        self._sum_squares = 0
+        # Monotonic deques of (index, value), candidates for min and max
+        self._min = deque()
+        self._max = deque()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(size={size:d}, count={count:d})".format(
+            cls_name=self.__class__.__name__,
+            size=self.size,
+            count=len(self)
+        )
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def full(self):
+        """True if window holds ``size`` values."""
+        return len(self._values) == self.size
+
+    def append(self, value):
+        """Add ``value``, dropping the oldest one if window is full."""
+        values = self._values
+        if len(values) == self.size:
+            old = values.popleft()
+            self._sum -= old
+            self._sum_squares -= old * old
+        values.append(value)
+        self._sum += value
+        self._sum_squares += value * value
+
+        index = self._count
+        self._count += 1
+        expired = index - self.size
+
+        while self._min and self._min[-1][1] > value:
+            self._min.pop()
+        self._min.append((index, value))
+        if self._min[0][0] <= expired:
+            self._min.popleft()
+
+        while self._max and self._max[-1][1] < value:
+            self._max.pop()
+        self._max.append((index, value))
+        if self._max[0][0] <= expired:
+            self._max.popleft()
+
+    def extend(self, values):
+        """Add all ``values``."""
+        for value in values:
+            self.append(value)
+
+    @property
+    def mean(self):
+        """Mean of values, ``None`` if empty."""
+        if not self._values:
+            return None
+        return self._sum / len(self._values)
+
+    @property
+    def variance(self):
+        """Sample variance of values, ``None`` if less than 2 values."""
+        count = len(self._values)
+        if count < 2:
+            return None
+        m2 = self._sum_squares - self._sum * self._sum / count
+        # Rounding errors can't make it negative
+        return max(m2 / (count - 1), 0)
+
+    @property
+    def std(self):
+        """Sample standard deviation of values."""
+        variance = self.variance
+        if variance is None:
+            return None
+        if isinstance(variance, Decimal):
+            return variance.sqrt()
+        return math.sqrt(variance)
+
+    @property
+    def min(self):
+        """Smallest value, ``None`` if empty."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self):
+        """Largest value, ``None`` if empty."""
+        return self._max[0][1] if self._max else None
+
+    @property
+    def pct_change(self):
+        """Percent change from the oldest to the newest value."""
+        if not self._values or not self._values[0]:
+            return None
+        return (self._values[-1] / self._values[0] - 1) * 100
+
+    def snapshot(self):
+        """Return dict of all statistics."""
+        return {name: getattr(self, name) for name in STATISTICS}
+
+
+class RollingStats(object):
+    """Rolling statistics of ``NBPExchangeRate`` series."""
+
+    def __init__(self, size, fields=None):
+        """
+        Initialize empty statistics.
+
+        :param size:
+            Number of rates in window.
+
+        :param fields:
+            Fields of rates (``mid``, ``bid``, ``ask``). Default: fields of
+            the first appended rate.
+        """
+        self.size = size
+        self.fields = tuple(fields) if fields is not None else None
+        self.last_date = None
+        self._windows = {}
+        if self.fields is not None:
+            self._init_windows()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(size={size:d}, fields={fields}, last_date={date})".format(
+            cls_name=self.__class__.__name__,
+            size=self.size,
+            fields=self.fields,
+            date=(self.last_date.strftime('%Y-%m-%d')
+                  if self.last_date is not None else None)
+        )
+
+    def _init_windows(self):
+        self._windows = {field: RollingWindow(self.size)
+                         for field in self.fields}
+
+    def __getitem__(self, field):
+        """Return ``RollingWindow`` of ``field``."""
+        return self._windows[field]
+
+    def append(self, rate):
+        """
+        Add ``rate`` (``NBPExchangeRate``).
+
+        Returns ``False`` (and ignores rate) if it isn't newer than the last
+        added one.
+        """
+        if self.last_date is not None and rate.date <= self.last_date:
+            return False
+
+        if self.fields is None:
+            self.fields = tuple(
+                field for field in ('mid', 'bid', 'ask')
+                if hasattr(rate, field)
+            )
+            self._init_windows()
+
+        for field, window in self._windows.items():
+            window.append(getattr(rate, field))
+        self.last_date = rate.date
+        return True
+
+    def extend(self, rates):
+        """
+        Add ``rates`` (e.g. result of ``NBPClient.last(n)``).
+
+        Rates already seen are skipped. Returns number of added rates.
+        """
+        if rates is None:
+            return 0
+        return sum(self.append(rate)
+                   for rate in sorted(rates, key=lambda r: r.date))
+
+    def snapshot(self):
+        """Return dict of statistics by field."""
+        return {
+            field: window.snapshot() for field, window in self._windows.items()
+        }
+
+
+def rolling_series(rates, size, field='mid', use_numpy=None):
+    """
+    Return statistics of every full window of ``rates`` (by date).
+
+    :param rates:
+        Sequence of ``NBPExchangeRate`` objects.
+
+    :param size:
+        Number of rates in window.
+
+    :param field:
+        ``mid``, ``bid`` or ``ask``.
+
+    :param use_numpy:
+        ``True`` to vectorize computation with NumPy (values are returned as
+        ``float``s), ``False`` to compute it in pure Python (values keep their
+        type, e.g. ``Decimal``). Default: NumPy if installed.
+
+    :return:
+        Dict of lists: ``date`` (of the newest rate in window) and
+        statistics (``mean``, ``std``, ``min``, ``max``, ``pct_change``).
+    """
+    rates = sorted(rates, key=lambda r: r.date)
+    dates = [rate.date for rate in rates]
+    values = [getattr(rate, field) for rate in rates]
+
+    if use_numpy is None or use_numpy:
+        try:
+            import numpy
+        except ImportError:
+            if use_numpy:
+                raise
+            numpy = None
+        if numpy is not None:
+            return _rolling_numpy(numpy, dates, values, size)
+
+    series = {name: [] for name in ('date',) + STATISTICS}
+    window = RollingWindow(size)
+    for date, value in zip(dates, values):
+        window.append(value)
+        if window.full:
+            series['date'].append(date)
+            for name in STATISTICS:
+                series[name].append(getattr(window, name))
+    return series
+
+
+def _rolling_numpy(numpy, dates, values, size):
+    """Vectorized ``rolling_series()``."""
+    series = {'date': dates[size - 1:]}
+    if len(values) < size:
+        series.update((name, []) for name in STATISTICS)
+        return series
+
+    values = numpy.array(values, dtype=float)
+    windows = numpy.lib.stride_tricks.sliding_window_view(values, size)
+    series['mean'] = windows.mean(axis=1).tolist()
+    if size > 1:
+        series['std'] = windows.std(axis=1, ddof=1).tolist()
+    else:
+        series['std'] = [None] * len(windows)
+    series['min'] = windows.min(axis=1).tolist()
+    series['max'] = windows.max(axis=1).tolist()
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        pct_change = (windows[:, -1] / windows[:, 0] - 1) * 100
+    series['pct_change'] = [
+        None if first == 0 else change
+        for first, change in zip(windows[:, 0].tolist(), pct_change.tolist())
+    ]
+    return series
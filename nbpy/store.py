@@ -0,0 +1,265 @@
+"""
+Local SQLite store of exchange rates with incremental (delta) sync.
+
+For each currency and table, store keeps the last effective date held
+locally, so syncing fetches only newer rates. Every fetched window is written
+together with updated sync state in a single transaction, therefore
+an interrupted sync resumes from the last written window.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from decimal import Decimal
+from nbpy.business_days import FIRST_DATE
+from nbpy.errors import APIError
+from nbpy.currencies import currencies
+from nbpy.exchange_rate import NBPExchangeRate
+from nbpy.utils import parse_date, format_date, date_windows
+
+
+__all__ = ('RateStore',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rates (
+    code TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    date TEXT NOT NULL,
+    no TEXT,
+    mid TEXT,
+    bid TEXT,
+    ask TEXT,
+    PRIMARY KEY (code, tbl, date)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    code TEXT NOT NULL,
+    tbl TEXT NOT NULL,
+    last_date TEXT NOT NULL,
+    PRIMARY KEY (code, tbl)
+);
+"""
+
+
+def _to_text(value):
+    """Store values as text, so decimals are kept exact."""
+    return None if value is None else str(value)
+
+
+class RateStore(object):
+    """SQLite-backed local store of exchange rates."""
+
+    def __init__(self, path):
+        """Open (or create) store at ``path``."""
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({path})".format(
+            cls_name=self.__class__.__name__,
+            path=self.path
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close database connection."""
+        self._connection.close()
+
+    def last_date(self, currency_code, table):
+        """Return last effective date held for currency and table, or None."""
+        row = self._connection.execute(
+            "SELECT last_date FROM sync_state WHERE code = ? AND tbl = ?",
+            (currency_code.upper(), table.upper())
+        ).fetchone()
+
+        return parse_date(row[0]) if row is not None else None
+
+    def write(self, table, rows, synced=None):
+        """
+        Write ``rows`` (tuples of ``(no, NBPExchangeRate)``) for ``table``.
+
+        Rates and sync state are written in one transaction.
+
+        :param synced:
+            Dict of currency codes and dates their sync state is advanced
+            to, even if they have no rows (e.g. currencies missing from
+            fetched tables).
+        """
+        table = table.upper()
+        last_dates = {
+            code: format_date(date) for code, date in (synced or {}).items()
+        }
+        records = []
+        for no, rate in rows:
+            date = format_date(rate.date)
+            records.append((
+                rate.currency_code, table, date, no,
+                _to_text(getattr(rate, 'mid', None)),
+                _to_text(getattr(rate, 'bid', None)),
+                _to_text(getattr(rate, 'ask', None)),
+            ))
+            last_dates[rate.currency_code] = max(
+                date, last_dates.get(rate.currency_code, date)
+            )
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO rates VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO sync_state VALUES (?, ?, ?)",
+                [(code, table, date) for code, date in last_dates.items()]
+            )
+            self._connection.executemany(
+                "UPDATE sync_state SET last_date = MAX(last_date, ?) "
+                "WHERE code = ? AND tbl = ?",
+                [(date, code, table) for code, date in last_dates.items()]
+            )
+
+        return len(records)
+
+    def rates(self, currency_code, start_date, end_date, bid_ask=False,
+              as_float=False):
+        """Return stored exchange rates from ``start_date`` to ``end_date``."""
+        parse_value = float if as_float else Decimal
+        columns = "date, no, bid, ask" if bid_ask else "date, no, mid"
+        table_clause = "tbl = 'C'" if bid_ask else "tbl != 'C'"
+
+        rows = self._connection.execute(
+            "SELECT {columns} FROM rates "
+            "WHERE code = ? AND {table_clause} AND date BETWEEN ? AND ? "
+            "ORDER BY date".format(columns=columns, table_clause=table_clause),
+            (currency_code.upper(), format_date(start_date),
+             format_date(end_date))
+        )
+
+        keys = ('bid', 'ask') if bid_ask else ('mid',)
+        return [
+            NBPExchangeRate(
+                currency_code=currency_code,
+                date=row[0],
+                no=row[1],
+                **{key: parse_value(value)
+                   for key, value in zip(keys, row[2:])}
+            )
+            for row in rows
+        ]
+
+    def sync(self, currency_codes=None, tables=('A', 'B', 'C'),
+             start_date=None, end_date=None, **kwargs):
+        r"""
+        Fetch and store rates newer than last effective dates held locally.
+
+        For tables with more than one currency to sync, table-level
+        ``/exchangerates/tables`` calls are used (one call for all currencies),
+        otherwise per-currency calls are sent.
+
+        :param currency_codes:
+            Currency codes to sync. Default: all currencies.
+
+        :param tables:
+            Tables to sync. Default: ``A``, ``B`` and ``C``.
+
+        :param start_date:
+            Date to sync from, if there's no local history for currency.
+            Default: first date available in API.
+
+        :param end_date:
+            Date to sync to. Default: today.
+
+        :param \**kwargs:
+            Keyword arguments passed to API clients.
+
+        :return:
+            Number of written rates.
+        """
+        if currency_codes is None:
+            currency_codes = currencies
+        codes = sorted(set(code.upper() for code in currency_codes))
+        end_date = parse_date(end_date or datetime.today())
+        start_date = parse_date(start_date or FIRST_DATE.isoformat())
+
+        written = 0
+        for table in tables:
+            table = table.upper()
+            since = {}
+            for code in codes:
+                if table not in currencies[code].tables:
+                    continue
+                last_date = self.last_date(code, table)
+                if last_date is None:
+                    since[code] = start_date
+                else:
+                    since[code] = last_date + timedelta(days=1)
+
+            since = {
+                code: date for code, date in since.items() if date <= end_date
+            }
+            if not since:
+                continue
+
+            if len(since) > 1:
+                written += self._sync_table(table, since, end_date, **kwargs)
+            else:
+                written += self._sync_currency(table, since, end_date,
+                                               **kwargs)
+        return written
+
+    def _sync_table(self, table, since, end_date, **kwargs):
+        """Sync currencies from ``since`` using table-level calls."""
+        from nbpy.tables import NBPTableClient
+
+        client = NBPTableClient(table, **dict(kwargs, cache_size=0))
+        written = 0
+        for window in date_windows(min(since.values()), end_date):
+            exchange_tables = _no_data_as_empty(client.date_range, *window)
+            synced = {}
+            if exchange_tables:
+                # Currencies missing from tables (e.g. withdrawn ones) are
+                # synced up to the last table as well, so they don't hold
+                # back later syncs
+                last_date = max(exchange_table.date
+                                for exchange_table in exchange_tables)
+                synced = {code: last_date for code, date in since.items()
+                          if date <= last_date}
+            written += self.write(table, [
+                (exchange_table.no, exchange_table[code])
+                for exchange_table in exchange_tables
+                for code, date in since.items()
+                if code in exchange_table and exchange_table.date >= date
+            ], synced)
+        return written
+
+    def _sync_currency(self, table, since, end_date, **kwargs):
+        """Sync single currency from ``since`` using per-currency calls."""
+        from nbpy import NBPClient
+
+        (code, start_date), = since.items()
+        client = NBPClient(code, **dict(kwargs, cache_size=0))
+        written = 0
+        for window in date_windows(start_date, end_date):
+            rates = _no_data_as_empty(
+                client.date_range,
+                format_date(window[0]), format_date(window[1]),
+                bid_ask=(table == 'C')
+            )
+            written += self.write(table, [
+                (rate.no, rate) for rate in rates
+            ])
+        return written
+
+
+def _no_data_as_empty(call, *args, **kwargs):
+    """Call ``call``, return empty list if API has no data (404)."""
+    try:
+        return call(*args, **kwargs) or []
+    except APIError as e:
+        if e.status_code == 404:
+            return []
+        raise
@@ -0,0 +1,221 @@
+"""
+Index of exchange rate tables by table number.
+
+Every table fetched by ``nbpy.tables.NBPTableClient`` is indexed with all
+its rates; rates fetched by ``NBPClient`` are indexed under their table
+numbers as partial tables. ``NBPClient.by_table_number()`` answers from the
+index, fetching (and indexing) missing tables once.
+
+Indexing is opt-in: only clients given a ``table_index`` (e.g.
+``global_index``) index their results (other clients keep tables fetched by
+``by_table_number()`` in private indexes). Windows fetched by
+``nbpy.api.iter_windows()`` (e.g. ``NBPClient.iter_range()``), which bypass
+LRU cache, aren't indexed unless requested.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from nbpy.business_days import publication_days
+
+
+__all__ = (
+    'TableIndex', 'global_index', 'parse_table_number', 'estimate_date',
+    'search_window',
+)
+
+_TABLE_NUMBER = re.compile(r'^(\d+)/([ABC])/NBP/(\d{4})$', re.IGNORECASE)
+
+
+def parse_table_number(no):
+    """
+    Return table, year and sequence number of table number ``no``.
+
+    E.g. ``('A', 2017, 211)`` for ``211/A/NBP/2017``. Raises ``ValueError``
+    for malformed numbers.
+    """
+    match = _TABLE_NUMBER.match(no.strip())
+    if match is None:
+        raise ValueError("Invalid table number {}".format(no))
+    number, table, year = match.groups()
+    return table.upper(), int(year), int(number)
+
+
+def estimate_date(no):
+    """
+    Return expected effective date (``datetime``) of table ``no``.
+
+    Tables are numbered by publication day within a year, so it's the n-th
+    publication day of the year (see ``nbpy.business_days``), or ``None``
+    if there are fewer.
+    """
+    table, year, number = parse_table_number(no)
+    if number < 1:
+        return None
+    for n, day in enumerate(publication_days(datetime(year, 1, 1),
+                                             datetime(year, 12, 31), table),
+                            start=1):
+        if n == number:
+            return datetime(day.year, day.month, day.day)
+    return None
+
+
+def search_window(no, margin=7):
+    """Return date range (within year) around expected date of ``no``."""
+    table, year, number = parse_table_number(no)
+    estimate = estimate_date(no) or datetime(year, 12, 31)
+    margin = timedelta(days=margin)
+    return (max(estimate - margin, datetime(year, 1, 1)),
+            min(estimate + margin, datetime(year, 12, 31)))
+
+
+class TableIndex(object):
+    """
+    Thread-safe index of ``NBPExchangeTable`` objects by table number.
+
+    Tables are indexed within a scope (e.g. base URI and value type of
+    clients), so clients with different settings can share an index.
+    """
+
+    def __init__(self, max_rates=50000):
+        """
+        Initialize empty index.
+
+        :param max_rates:
+            Max number of rates in indexed tables (least recently used
+            tables are dropped), ``None`` for unbounded index.
+            Default: ``50000`` (over 5 years of tables A).
+        """
+        self.max_rates = max_rates
+        self._tables = OrderedDict()
+        # Keys of tables indexed with all their rates
+        self._complete = set()
+        self._rates = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(max_rates={max_rates}, tables={tables:d}, " \
+            "rates={rates:d})".format(
+                cls_name=self.__class__.__name__,
+                max_rates=self.max_rates,
+                tables=len(self),
+                rates=self._rates
+            )
+
+    def __len__(self):
+        return len(self._tables)
+
+    def __contains__(self, no):
+        """Return True if table ``no`` is indexed (within any scope)."""
+        with self._lock:
+            return any(key[1] == no for key in self._tables)
+
+    def __getitem__(self, no):
+        """
+        Return indexed (possibly partial) table ``no``.
+
+        Tables are looked up within all scopes, most recently used first.
+        Use ``get()`` to look up table within given scope.
+        """
+        with self._lock:
+            for key in reversed(self._tables):
+                if key[1] == no:
+                    return self._tables[key]
+        raise KeyError(no)
+
+    @property
+    def rates(self):
+        """Number of rates in indexed tables."""
+        return self._rates
+
+    def _store(self, key, exchange_table):
+        """Put table under ``key`` (lock has to be held)."""
+        previous = self._tables.pop(key, None)
+        if previous is not None:
+            self._rates -= len(previous)
+        self._tables[key] = exchange_table
+        self._rates += len(exchange_table)
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used tables over limit (lock has to be held)."""
+        while self.max_rates is not None and self._rates > self.max_rates \
+                and self._tables:
+            dropped, exchange_table = self._tables.popitem(last=False)
+            self._rates -= len(exchange_table)
+            self._complete.discard(dropped)
+
+    def add_table(self, exchange_table, scope=None):
+        """Index ``NBPExchangeTable`` with all its rates."""
+        key = (scope, exchange_table.no)
+        with self._lock:
+            self._store(key, exchange_table)
+            self._complete.add(key)
+
+    def add_rates(self, table, rates, scope=None):
+        """
+        Index rates of single currency from per-currency calls.
+
+        :param table:
+            Table (``A``, ``B`` or ``C``).
+
+        :param rates:
+            Iterable of ``NBPExchangeRate`` objects (rates without table
+            number are skipped).
+        """
+        from nbpy.tables import NBPExchangeTable
+
+        with self._lock:
+            for rate in rates:
+                if rate.no is None:
+                    continue
+                key = (scope, rate.no)
+                exchange_table = self._tables.get(key)
+                if exchange_table is None:
+                    exchange_table = NBPExchangeTable(table, rate.no,
+                                                      rate.date, ())
+                    self._tables[key] = exchange_table
+                else:
+                    self._tables.move_to_end(key)
+                if key not in self._complete and \
+                        rate.currency_code not in exchange_table.rates:
+                    exchange_table.rates[rate.currency_code] = rate
+                    self._rates += 1
+            self._evict()
+
+    def get(self, no, currency_code=None, scope=None):
+        """
+        Return indexed table ``no`` (``None`` if missing).
+
+        Partial tables (from per-currency calls) are returned only if they
+        hold rate of ``currency_code``.
+        """
+        key = (scope, no)
+        with self._lock:
+            exchange_table = self._tables.get(key)
+            if exchange_table is None:
+                return None
+            self._tables.move_to_end(key)
+            if key in self._complete or (
+                    currency_code is not None and
+                    currency_code.upper() in exchange_table.rates):
+                return exchange_table
+            return None
+
+    def is_complete(self, no, scope=None):
+        """Return True if table ``no`` is indexed with all its rates."""
+        return (scope, no) in self._complete
+
+    def clear(self):
+        """Remove all tables."""
+        with self._lock:
+            self._tables.clear()
+            self._complete.clear()
+            self._rates = 0
+
+
+#: Index which can be shared by clients (given as their ``table_index``).
+global_index = TableIndex()
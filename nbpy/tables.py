@@ -0,0 +1,238 @@
+"""Table-level API calls (all currencies from given table at once)."""
+
+import time
+from datetime import datetime
+from nbpy.api import NBPBaseClient
+from nbpy.errors import APIError
+from nbpy.currencies import currencies
+from nbpy.exchange_rate import NBPExchangeRate
+from nbpy.utils import validate_date, format_date, first_if_sequence
+
+
+__all__ = ('NBPExchangeTable', 'NBPTableClient')
+
+#: Available tables.
+TABLES = ('A', 'B', 'C')
+
+
+class NBPExchangeTable(object):
+    """Holds a single published table of exchange rates."""
+
+    def __init__(self, table, no, date, rates):
+        r"""
+        Initialize for table, table number, effective date and rates.
+
+        :param table:
+            Table (``A``, ``B`` or ``C``).
+
+        :param no:
+            Table number (e.g. ``211/A/NBP/2017``).
+
+        :param date:
+            ``datetime.datetime`` object or properly formatted date string
+            (``YYYY-MM-DD``).
+
+        :param rates:
+            Iterable of ``NBPExchangeRate`` objects.
+        """
+        self.table = table
+        self.no = no
+        self.date = date
+        self.rates = {rate.currency_code: rate for rate in rates}
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({table}, {no}, {date}, currencies={count:d})".format(
+            cls_name=self.__class__.__name__,
+            table=self.table,
+            no=self.no,
+            date=self.date.strftime('%Y-%m-%d'),
+            count=len(self)
+        )
+
+    @property
+    def date(self):
+        """Effective date (datetime object)."""
+        return self._date
+
+    @date.setter
+    def date(self, date):
+        validate_date(date)
+
+        if isinstance(date, datetime):
+            self._date = date
+        else:
+            self._date = datetime.strptime(date, "%Y-%m-%d")
+
+    def __getitem__(self, currency_code):
+        """Return exchange rate for ``currency_code``."""
+        return self.rates[currency_code.upper()]
+
+    def __contains__(self, currency_code):
+        return currency_code.upper() in self.rates
+
+    def __iter__(self):
+        return iter(self.rates.values())
+
+    def __len__(self):
+        return len(self.rates)
+
+
+class NBPTableClient(NBPBaseClient):
+    """NBP Web API client for whole tables of exchange rates."""
+
+    # Template URI for NBP API calls
+    _uri_template = "{base_uri}/exchangerates/tables/{table}/{tail}"
+
+    def __init__(self, table, **kwargs):
+        r"""
+        Initialize for given ``table``.
+
+        :param table:
+            ``A``, ``B`` (mid rates) or ``C`` (bid/ask rates).
+
+        :param \**kwargs:
+            See ``NBPClient``.
+        """
+        super().__init__(**kwargs)
+
+        self.table = table
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({table}, as_float={as_float!s}, suppress_errors={suppress_errors!s}, cache_size={cache_size})".format(
+            cls_name=self.__class__.__name__,
+            table=self.table,
+            as_float=self.as_float,
+            suppress_errors=self.suppress_errors,
+            cache_size=self.cache_size
+        )
+
+    @property
+    def table(self):
+        """Table (``A``, ``B`` or ``C``)."""
+        return self._table
+
+    @table.setter
+    def table(self, table):
+        table = table.upper()
+        if table not in TABLES:
+            raise ValueError("Unknown table {}".format(table))
+        self._table = table
+
+    def _parse_table(self, data):
+        """Return ``NBPExchangeTable`` from table JSON data."""
+        date = data['effectiveDate']
+        return NBPExchangeTable(
+            table=data['table'],
+            no=data['no'],
+            date=date,
+            rates=[
+                NBPExchangeRate(
+                    currency_code=rate['code'],
+                    date=date,
+                    no=data['no'],
+                    **{key: rate[key]
+                       for key in ('mid', 'bid', 'ask') if key in rate}
+                )
+                for rate in data['rates']
+                # Skip currencies unknown to nbpy.currencies
+                if rate['code'].upper() in currencies
+            ]
+        )
+
+    def _get_response_data(self, uri_tail):
+        """Return HTTP response data from API call."""
+        uri = self._uri_template.format(
+            base_uri=self.base_uri,
+            table=self.table.lower(),
+            tail=uri_tail.lower()
+        )
+
+        # Send request to API, raise exception on error
+        try:
+            tables = self._request(uri, self._cache_context((uri_tail,)))
+        except APIError:
+            if self.suppress_errors:
+                # Return None if errors suppressed
+                return None
+            raise
+
+        start = time.perf_counter()
+        tables = sorted([
+            self._parse_table(data) for data in tables
+        ], key=lambda t: t.date)
+
+        if self.hooks.enabled:
+            self.hooks.emit('after_construct', client=self, currency=None,
+                            table=self.table, uri_tail=uri_tail,
+                            rows=sum(len(table) for table in tables),
+                            duration=time.perf_counter() - start)
+        return tables
+
+    def _cache_context(self, key):
+        """Return context of cache events for LRU cache ``key``."""
+        return {'currency': None, 'table': self.table, 'uri_tail': key[0]}
+
+    def _index(self, tables, uri_tail):
+        """Put ``tables`` in ``table_index``."""
+        for exchange_table in tables:
+            self.table_index.add_table(exchange_table,
+                                       scope=self._index_scope)
+
+    def _is_window_published(self, start_date, end_date):
+        """Return True if table was published in date range."""
+        return self._is_published(self.table, start_date, end_date)
+
+    def currency_names(self):
+        """
+        Return dict of currency codes and names from last published table.
+
+        Unlike other calls, includes currencies unknown to
+        ``nbpy.currencies`` and is never cached.
+        """
+        uri = self._uri_template.format(
+            base_uri=self.base_uri,
+            table=self.table.lower(),
+            tail=''
+        )
+        return {
+            rate['code'].upper(): rate['currency']
+            for data in self._request(uri, self._cache_context(('',)))
+            for rate in data['rates']
+        }
+
+    @first_if_sequence
+    def current(self):
+        """Return last published table."""
+        return self._get_response_data('')
+
+    @first_if_sequence
+    def today(self):
+        """Return table published today."""
+        return self._get_response_data('today')
+
+    def last(self, n):
+        """Return last ``n`` tables."""
+        uri_tail = "last/{:d}".format(n)
+        return self._get_response_data(uri_tail)
+
+    @first_if_sequence
+    def date(self, date):
+        """Return table from ``date``."""
+        uri_tail = format_date(date)
+        if not self._is_window_published(date, date):
+            return self._not_published(uri_tail)
+        return self._get_response_data(uri_tail)
+
+    def date_range(self, start_date, end_date):
+        """Return tables from ``start_date`` to ``end_date``."""
+        uri_tail = "{}/{}".format(format_date(start_date),
+                                  format_date(end_date))
+        if not self._is_window_published(start_date, end_date):
+            return self._not_published(uri_tail)
+        return self._get_response_data(uri_tail)
+
+    def __call__(self):
+        """Return ``self.current()``."""
+        return self.current()
@@ -0,0 +1,188 @@
+"""
+Transports used by API clients for all I/O.
+
+Transport has a single ``get(uri, headers)`` method returning
+``TransportResponse`` (with decoded body and, if known, number of bytes
+received over the wire, e.g. gzip-compressed). Besides default
+``RequestsTransport``, there are ``RecordingTransport`` (saving responses of a
+wrapped transport to disk) and ``ReplayTransport`` (serving previously recorded
+responses), useful for offline tests and deterministic benchmarks.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+
+__all__ = (
+    'TransportResponse',
+    'Transport', 'RequestsTransport', 'RecordingTransport', 'ReplayTransport',
+)
+
+
+#: Response returned by transports.
+TransportResponse = namedtuple(
+    'TransportResponse', ('status_code', 'headers', 'body', 'wire_bytes')
+)
+# Transports which don't know wire size may omit it
+TransportResponse.__new__.__defaults__ = (None,)
+
+
+class Transport(object):
+    """Base transport class."""
+
+    def get(self, uri, headers=None):
+        """Send GET request to ``uri``, return ``TransportResponse``."""
+        raise NotImplementedError()
+
+    def close(self):
+        """Release resources held by transport."""
+        pass
+
+
+class RequestsTransport(Transport):
+    """
+    Default transport, using ``requests`` session (with connection pool).
+
+    ``requests`` is imported (and session created) on the first request,
+    so importing ``nbpy`` stays cheap.
+    """
+
+    def __init__(self, proxies=None, timeout=None):
+        """
+        Initialize transport.
+
+        :param proxies:
+            Proxy settings for ``requests``. Default: ``None``.
+
+        :param timeout:
+            Request timeout in seconds. Default: ``None`` (no timeout).
+        """
+        self.proxies = proxies
+        self.timeout = timeout
+        self._session = None
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(proxies={proxies})".format(
+            cls_name=self.__class__.__name__,
+            proxies=self.proxies
+        )
+
+    @property
+    def session(self):
+        """``requests.Session`` (created on first use)."""
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def get(self, uri, headers=None):
+        """Send GET request to ``uri``, return ``TransportResponse``."""
+        r = self.session.get(uri, headers=headers, proxies=self.proxies,
+                             timeout=self.timeout)
+        try:
+            # Bytes read from socket (before decompression)
+            wire_bytes = r.raw.tell()
+        except (AttributeError, ValueError):
+            wire_bytes = None
+        return TransportResponse(r.status_code, dict(r.headers), r.text,
+                                 wire_bytes or None)
+
+    def close(self):
+        """Close underlying session."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+def _recording_path(directory, uri):
+    """Return path of recorded response for ``uri``."""
+    import hashlib
+
+    name = hashlib.sha1(uri.encode('utf-8')).hexdigest()
+    return os.path.join(directory, name + '.json')
+
+
+class RecordingTransport(Transport):
+    """Transport saving responses of wrapped transport to ``directory``."""
+
+    def __init__(self, transport, directory):
+        """
+        Initialize transport.
+
+        :param transport:
+            Wrapped transport (e.g. ``RequestsTransport``).
+
+        :param directory:
+            Directory for recorded responses (created if missing).
+        """
+        self.transport = transport
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({transport!r}, {directory})".format(
+            cls_name=self.__class__.__name__,
+            transport=self.transport,
+            directory=self.directory
+        )
+
+    def get(self, uri, headers=None):
+        """
+        Send GET request with wrapped transport and record response.
+
+        ``304 Not Modified`` responses (without body) aren't recorded, so
+        they don't replace recorded responses to revalidated requests.
+        """
+        response = self.transport.get(uri, headers=headers)
+        if response.status_code == 304:
+            return response
+
+        with open(_recording_path(self.directory, uri), 'w') as f:
+            json.dump({
+                'uri': uri,
+                'status_code': response.status_code,
+                'headers': response.headers,
+                'body': response.body,
+                'wire_bytes': response.wire_bytes,
+            }, f)
+        return response
+
+    def close(self):
+        """Close wrapped transport."""
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """Transport serving responses recorded by ``RecordingTransport``."""
+
+    def __init__(self, directory):
+        """
+        Initialize transport.
+
+        :param directory:
+            Directory with recorded responses.
+        """
+        self.directory = directory
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}({directory})".format(
+            cls_name=self.__class__.__name__,
+            directory=self.directory
+        )
+
+    def get(self, uri, headers=None):
+        """Return recorded response for ``uri``, raise KeyError if missing."""
+        try:
+            with open(_recording_path(self.directory, uri), 'r') as f:
+                data = json.load(f)
+        except (IOError, OSError):
+            raise KeyError("No recorded response for {}".format(uri))
+
+        return TransportResponse(
+            data['status_code'], data['headers'], data['body'],
+            data.get('wire_bytes')
+        )
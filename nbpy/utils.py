@@ -1,11 +1,15 @@
 """Various utilities."""
 
-from datetime import datetime
+from datetime import date as _date, datetime, timedelta
 from functools import wraps
-from collections import Sequence
+from collections.abc import Sequence
 from nbpy.errors import DateFormattingError
 
 
+#: Maximum number of days covered by a single date range API call.
+MAX_DAYS_IN_RANGE = 93
+
+
 def validate_date(date):
     """Check if date is datetime or properly formatted string (YYYY-MM-DD)."""
     if not isinstance(date, datetime):
@@ -17,6 +21,72 @@ def validate_date(date):
             )
 
 
+def parse_date(date):
+    """Return ``datetime`` for datetime or date string (YYYY-MM-DD)."""
+    validate_date(date)
+
+    if isinstance(date, datetime):
+        return datetime(date.year, date.month, date.day)
+    return datetime.strptime(date, "%Y-%m-%d")
+
+
+def format_date(date):
+    """Return date string (YYYY-MM-DD) for datetime or date string."""
+    return parse_date(date).strftime("%Y-%m-%d")
+
+
+def date_windows(start_date, end_date, max_days=MAX_DAYS_IN_RANGE,
+                 align=False):
+    """
+    Split ``[start_date, end_date]`` into API-legal windows.
+
+    Yields ``(start, end)`` tuples of ``datetime`` objects, each covering
+    at most ``max_days`` days, in ascending order.
+
+    If ``align`` is set, windows are calendar quarters (or months, if
+    quarters don't fit in ``max_days``), so overlapping ranges are split
+    into the same windows. First and last windows may then extend beyond
+    the range (but not beyond today, unless the range does).
+    """
+    start = parse_date(start_date)
+    end = parse_date(end_date)
+    step = timedelta(days=max_days - 1)
+
+    if align and max_days >= 31:
+        months = 3 if max_days >= 92 else 1
+        today = datetime.combine(_date.today(), datetime.min.time())
+        last = max(end, today)
+        month = (start.month - 1) // months * months
+        window_start = datetime(start.year, month + 1, 1)
+        while window_start <= end:
+            year, month = divmod(window_start.month - 1 + months, 12)
+            window_end = datetime(window_start.year + year, month + 1, 1) - \
+                timedelta(days=1)
+            yield window_start, min(window_end, last)
+            window_start = window_end + timedelta(days=1)
+        return
+
+    while start <= end:
+        window_end = min(start + step, end)
+        yield start, window_end
+        start = window_end + timedelta(days=1)
+
+
+def is_final(uri, today=None):
+    """
+    Return True if response for API ``uri`` can't change anymore.
+
+    That is true for calls for given date (or date range) in the past, but
+    not e.g. for ``current``, ``today`` and ``last`` calls.
+    """
+    today = (today or _date.today()).isoformat()
+    dates = [
+        part for part in uri.split('/')
+        if len(part) == 10 and part[4] == '-' and part[7] == '-'
+    ]
+    return bool(dates) and max(dates) < today
+
+
 def first_if_sequence(func):
     """If func's result is a sequence, return only first element."""
     @wraps(func)
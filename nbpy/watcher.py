@@ -0,0 +1,216 @@
+"""
+Notifications about newly published exchange rates.
+
+``RateWatcher`` polls current tables of watched currencies in a single
+loop (one table-level request per table, revalidated with
+``If-None-Match``/``If-Modified-Since``, so unchanged tables cost a ``304``
+without body) and tracks effective date and number of the last seen table.
+Only tables newer than the last seen ones are passed to subscribers:
+callbacks (``subscribe()``) or async iterators (``updates()``).
+"""
+
+import threading
+from collections import namedtuple
+
+from nbpy.currencies import currencies
+from nbpy.errors import BidAskUnavailable, NBPError, UnknownCurrencyCode
+from nbpy.metrics import Metrics, global_metrics
+
+
+__all__ = ('RateWatcher', 'TableUpdate')
+
+#: Newly published table ``no`` from ``date`` with ``rates`` of watched
+#: currencies (``NBPExchangeRate`` objects).
+TableUpdate = namedtuple('TableUpdate', ('table', 'no', 'date', 'rates'))
+
+
+class RateWatcher(object):
+    """Polls tables of watched currencies, notifies about new ones."""
+
+    def __init__(self, currency_codes, bid_ask=False, poll_interval=60.0,
+                 **kwargs):
+        r"""
+        Initialize watcher (call ``start()`` to poll in background thread).
+
+        :param currency_codes:
+            Currency codes to watch.
+
+        :param bid_ask:
+            If ``True``, bid/ask rates (table C) are watched instead of mid
+            rates.
+
+        :param poll_interval:
+            Time (in seconds) between polls. Default: ``60``.
+
+        :param \**kwargs:
+            Keyword arguments passed to API clients (see ``NBPClient``).
+        """
+        from nbpy.tables import NBPTableClient
+
+        self.poll_interval = poll_interval
+        self.metrics = kwargs.pop('metrics', None)
+        if self.metrics is None:
+            self.metrics = Metrics(parent=global_metrics)
+
+        #: Watched currency codes by table.
+        self.currency_codes = {}
+        for code in currency_codes:
+            code = code.upper()
+            if code not in currencies:
+                raise UnknownCurrencyCode(code)
+            currency = currencies[code]
+            if bid_ask and not currency.has_bid_ask:
+                raise BidAskUnavailable(
+                    "Bid/ask unavailable for {}".format(code)
+                )
+            table = 'C' if bid_ask else currency.mid_table
+            codes = self.currency_codes.setdefault(table, [])
+            if code not in codes:
+                codes.append(code)
+
+        #: Effective date and number of last seen table (by table).
+        self.last_seen = {}
+
+        # Every poll has to reach API, unchanged tables are revalidated
+        self._clients = {
+            table: NBPTableClient(table, **dict(kwargs, cache_size=0,
+                                                metrics=self.metrics))
+            for table in self.currency_codes
+        }
+        self._subscribers = []
+        self._streams = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        """Return repr(self)."""
+        return "{cls_name}(tables={tables}, subscribers={count:d})".format(
+            cls_name=self.__class__.__name__,
+            tables=self.tables,
+            count=len(self._subscribers)
+        )
+
+    @property
+    def tables(self):
+        """Watched tables."""
+        return sorted(self.currency_codes)
+
+    def subscribe(self, callback):
+        """
+        Call ``callback(update)`` with every new ``TableUpdate``.
+
+        Callbacks are called in polling thread. Returns ``callback``, so it
+        can be used as a decorator.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """Stop calling ``callback``."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def updates(self, loop=None):
+        """
+        Return async iterator over new ``TableUpdate`` objects.
+
+        Iteration ends after ``stop()``. Has to be created in event loop
+        (or given one) it's iterated in.
+        """
+        from nbpy._watcher_async import UpdateStream
+
+        stream = UpdateStream(self, loop)
+        with self._lock:
+            self._streams.append(stream)
+        return stream
+
+    def _emit(self, update):
+        """Pass ``update`` to all subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(update)
+            except Exception as e:
+                # Faulty subscriber doesn't stop others
+                self.metrics.record_error(e.__class__.__name__)
+
+    def _is_new(self, table, exchange_table):
+        """Return True if ``exchange_table`` wasn't seen yet."""
+        last = self.last_seen.get(table)
+        if last is None:
+            return True
+        last_date, last_no = last
+        return exchange_table.date > last_date or (
+            exchange_table.date == last_date and exchange_table.no != last_no
+        )
+
+    def poll(self, notify=True):
+        """
+        Fetch current tables, notify subscribers about new ones.
+
+        :param notify:
+            If ``False``, new tables are only marked as seen.
+
+        :return: List of ``TableUpdate`` objects of new tables.
+        """
+        updates = []
+        for table in self.tables:
+            try:
+                exchange_table = self._clients[table].current()
+            except NBPError:
+                # Already recorded in metrics, retry on next poll
+                continue
+            if exchange_table is None or not self._is_new(table,
+                                                          exchange_table):
+                continue
+
+            self.last_seen[table] = (exchange_table.date, exchange_table.no)
+            updates.append(TableUpdate(
+                table=table,
+                no=exchange_table.no,
+                date=exchange_table.date,
+                rates=[exchange_table[code]
+                       for code in self.currency_codes[table]
+                       if code in exchange_table]
+            ))
+
+        if notify:
+            for update in updates:
+                self._emit(update)
+        return updates
+
+    def run(self):
+        """Poll until ``stop()`` (current tables are seen, if none were)."""
+        if not self.last_seen:
+            self.poll(notify=False)
+        while not self._stop.wait(self.poll_interval):
+            self.poll()
+
+    def start(self):
+        """Run in background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop polling, end all async iterators."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            streams, self._streams = self._streams, []
+        for stream in streams:
+            stream.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -30,6 +30,9 @@ setup(
     license=license,
     packages=['nbpy', ],
     install_requires=requirements,
+    entry_points={
+        'console_scripts': ['nbpy = nbpy.__main__:main'],
+    },
     python_requires='>=3.3',
     classifiers=[
         'Development Status :: 3 - Alpha',
@@ -1,10 +1,49 @@
-"""Mock API helper classes."""
+"""
+Mock API helper classes.
 
+Besides helpers for mocked responses, module provides ``MockAPIServer``:
+a local HTTP server standing in for NBP Web API, with deterministic data
+and configurable latency and faults. It can be run on its own::
+
+    $ python -m tests.mock_api_helpers --port 8080 --latency 0.05 \\
+        --error-rate 0.01 --rate-limit 100
+
+and used with ``NBPClient('eur', base_uri='http://localhost:8080/api')``.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
 import random
+import threading
+import time
 from datetime import datetime, timedelta
 from functools import wraps
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
 from nbpy import BASE_URI
-from nbpy.currencies import NBPCurrency
+from nbpy.currencies import NBPCurrency, currencies
+
+
+#: Weekdays without tables published (Polish public holidays) in years
+#: covered by tests, ``NBP_HOLIDAY_YEARS``. Listed by hand rather than taken
+#: from ``nbpy.business_days``, so tests against ``MockAPIServer`` can catch
+#: calendar bugs. In other years tables are published on every weekday.
+NBP_HOLIDAYS = frozenset(datetime(*day) for day in (
+    (2015, 1, 1), (2015, 1, 6), (2015, 4, 6), (2015, 5, 1), (2015, 6, 4),
+    (2015, 11, 11), (2015, 12, 25),
+    (2016, 1, 1), (2016, 1, 6), (2016, 3, 28), (2016, 5, 3), (2016, 5, 26),
+    (2016, 8, 15), (2016, 11, 1), (2016, 11, 11), (2016, 12, 26),
+    (2017, 1, 6), (2017, 4, 17), (2017, 5, 1), (2017, 5, 3), (2017, 6, 15),
+    (2017, 8, 15), (2017, 11, 1), (2017, 12, 25), (2017, 12, 26),
+    (2018, 1, 1), (2018, 4, 2), (2018, 5, 1), (2018, 5, 3), (2018, 5, 31),
+    (2018, 8, 15), (2018, 11, 1), (2018, 11, 12), (2018, 12, 25),
+    (2018, 12, 26),
+))
+
+#: Years with complete list of ``NBP_HOLIDAYS``.
+NBP_HOLIDAY_YEARS = (2015, 2016, 2017, 2018)
 
 
 class MockAPIHelperError(Exception):
@@ -162,4 +201,444 @@ class MockJSONData(MockAPIHelper):
         while date <= end_date:
             rates.append(self.exchange_rate(date))
             date += timedelta(days=1)
-        return rates
\ No newline at end of file
+        return rates
+
+
+class MockTableJSONData(object):
+    """Helper class for creating mock JSON data for table-level calls."""
+
+    def __init__(self, table, currencies):
+        self.table = table.upper()
+        self.currencies = [
+            currency for currency in currencies
+            if self.table in currency.tables
+        ]
+
+    def uri(self, resource):
+        """Returns URI for table `resource`."""
+        return "{b_uri}/exchangerates/tables/{table}/{resource}".format(
+            b_uri=BASE_URI,
+            table=self.table.lower(),
+            resource=resource.lower()
+        )
+
+    def range_uri(self, start_date, end_date):
+        """Returns URI for table date range."""
+        return self.uri("{start}/{end}".format(
+            start=start_date.strftime("%Y-%m-%d"),
+            end=end_date.strftime("%Y-%m-%d")
+        ))
+
+    def exchange_table(self, date):
+        """Random exchange table (workdays only)."""
+        rates = []
+        for currency in self.currencies:
+            rate = {'currency': currency.name, 'code': currency.code}
+            if self.table == 'C':
+                rate['bid'] = MockJSONData.rnd_value()
+                rate['ask'] = MockJSONData.rnd_value()
+            else:
+                rate['mid'] = MockJSONData.rnd_value()
+            rates.append(rate)
+
+        return {
+            'table': self.table,
+            'no': "{count:03d}/{table}/NBP/{year}".format(
+                count=date.timetuple().tm_yday,
+                table=self.table,
+                year=date.year
+            ),
+            'effectiveDate': date.strftime("%Y-%m-%d"),
+            'rates': rates,
+        }
+
+    def date_range(self, start_date, end_date):
+        """Mock data for tables from given date range (workdays only)."""
+        date = start_date
+        tables = []
+        while date <= end_date:
+            if date.weekday() < 5:
+                tables.append(self.exchange_table(date))
+            date += timedelta(days=1)
+        return tables
+
+
+class MockAPIServer(object):
+    """
+    Local stand-in for NBP Web API (``/exchangerates/rates``,
+    ``/exchangerates/tables`` and ``/cenyzlota`` endpoints).
+
+    Data is deterministic (depends only on ``seed``, table, currency and
+    date). Tables A and C are published on weekdays other than
+    ``NBP_HOLIDAYS``, table B on Wednesdays (or on the preceding day, if
+    Wednesday is a holiday); days without publication respond with 404 and
+    ranges longer than 93 days with 400, as the real API does. Responses
+    carry ``ETag`` (honouring ``If-None-Match`` with 304) and are gzipped if
+    client accepts it.
+    """
+
+    #: Max number of days in date range.
+    max_days = 93
+
+    #: Max number of days in date range of gold prices.
+    max_gold_days = 367
+
+    #: Max ``n`` for last/n calls.
+    max_last = 255
+
+    def __init__(self, host='127.0.0.1', port=0, seed=0, latency=0.0,
+                 jitter=0.0, error_rate=0.0, rate_limit=None,
+                 body_delay=0.0, today=None):
+        """
+        Initialize server (call ``start()`` to serve in background thread).
+
+        :param port: Port to listen on, ``0`` for any free port.
+        :param seed: Seed for generated data and injected faults.
+        :param latency: Delay (seconds) before every response.
+        :param jitter: Max random delay (seconds) added to ``latency``.
+        :param error_rate: Fraction of requests failing with 500.
+        :param rate_limit: Max requests per second, others get 429.
+        :param body_delay: Time (seconds) spent on sending every body.
+        :param today: Date treated as today (default: actual today).
+        """
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.body_delay = body_delay
+        self.today = today
+        self.requests = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)  # (second, requests in second)
+        self._table_numbers = {}
+        self._thread = None
+
+        handler = type('MockAPIHandler', (_MockAPIHandler,), {'api': self})
+        self._server = _ThreadingHTTPServer((host, port), handler)
+
+    @property
+    def base_uri(self):
+        """Base URI to pass to clients."""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}/api".format(host, port)
+
+    def start(self):
+        """Serve in background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def serve_forever(self):
+        """Serve in current thread."""
+        self._server.serve_forever()
+
+    # Data
+
+    def _today(self):
+        today = self.today or datetime.today()
+        return datetime(today.year, today.month, today.day)
+
+    @staticmethod
+    def is_published(table, date):
+        """True if ``table`` is published on ``date``."""
+        date = datetime(date.year, date.month, date.day)
+        if date.weekday() > 4 or date in NBP_HOLIDAYS:
+            return False
+        if table.upper() != 'B':
+            return True
+
+        day = date + timedelta(days=2 - date.weekday())
+        while day in NBP_HOLIDAYS:
+            day -= timedelta(days=1)
+        return date == day
+
+    def _value(self, *key):
+        rnd = random.Random('/'.join(str(part) for part in (self.seed,) + key))
+        return round(rnd.uniform(0.1, 5.0), 4)
+
+    def _table_no(self, table, date):
+        key = (table, date)
+        if key not in self._table_numbers:
+            self._table_numbers[key] = self._count_table_no(table, date)
+        return self._table_numbers[key]
+
+    def _count_table_no(self, table, date):
+        count = sum(
+            1 for day in range(date.timetuple().tm_yday)
+            if self.is_published(
+                table, datetime(date.year, 1, 1) + timedelta(days=day)
+            )
+        )
+        return "{:03d}/{}/NBP/{}".format(count, table, date.year)
+
+    def _rate(self, table, code, date):
+        if table == 'C':
+            mid = self._value(table, code, date.strftime('%Y-%m-%d'))
+            return {'bid': round(mid * 0.99, 4), 'ask': round(mid * 1.01, 4)}
+        return {'mid': self._value(table, code, date.strftime('%Y-%m-%d'))}
+
+    def _dates(self, table, tail, max_days=None, first_date=None):
+        """Return (status, publication dates) for resource ``tail``."""
+        today = self._today()
+        max_days = max_days or self.max_days
+        first_date = first_date or datetime(2002, 1, 2)
+
+        def last(n, until):
+            dates, date = [], until
+            while len(dates) < n and date >= first_date:
+                if self.is_published(table, date):
+                    dates.append(date)
+                date -= timedelta(days=1)
+            return 200, dates[::-1]
+
+        try:
+            if not tail:
+                return last(1, today)
+            if tail == ['today']:
+                start = end = today
+            elif tail[0] == 'last' and len(tail) == 2:
+                n = int(tail[1])
+                if not 0 < n <= self.max_last:
+                    return 400, []
+                return last(n, today)
+            elif len(tail) in (1, 2):
+                start = datetime.strptime(tail[0], '%Y-%m-%d')
+                end = datetime.strptime(tail[-1], '%Y-%m-%d')
+            else:
+                return 400, []
+        except ValueError:
+            return 400, []
+
+        if end < start or (end - start).days >= max_days:
+            return 400, []
+
+        dates = [
+            start + timedelta(days=day)
+            for day in range((end - start).days + 1)
+            if self.is_published(table, start + timedelta(days=day))
+            and first_date <= start + timedelta(days=day) <= today
+        ]
+        return (200, dates) if dates else (404, [])
+
+    def response(self, path):
+        """Return (status, JSON data) for request ``path``."""
+        path = path.split('?')[0]
+        parts = [part.lower() for part in path.split('/') if part]
+        if parts[:1] == ['api']:
+            parts = parts[1:]
+        if parts[:1] == ['cenyzlota']:
+            return self._gold_response(parts[1:])
+        if parts[:1] != ['exchangerates'] or len(parts) < 3:
+            return 404, None
+
+        resource, table = parts[1], parts[2].upper()
+        if table not in ('A', 'B', 'C'):
+            return 400, None
+
+        if resource == 'rates':
+            if len(parts) < 4:
+                return 400, None
+            code = parts[3].upper()
+            if code not in currencies or table not in currencies[code].tables:
+                return 404, None
+
+            status, dates = self._dates(table, parts[4:])
+            if status != 200:
+                return status, None
+            return 200, {
+                'table': table,
+                'currency': currencies[code].name,
+                'code': code,
+                'rates': [
+                    dict({'no': self._table_no(table, date),
+                          'effectiveDate': date.strftime('%Y-%m-%d')},
+                         **self._rate(table, code, date))
+                    for date in dates
+                ],
+            }
+
+        if resource == 'tables':
+            status, dates = self._dates(table, parts[3:])
+            if status != 200:
+                return status, None
+            codes = sorted(
+                code for code, currency in currencies.items()
+                if table in currency.tables
+            )
+            tables = []
+            for date in dates:
+                data = {
+                    'table': table,
+                    'no': self._table_no(table, date),
+                    'effectiveDate': date.strftime('%Y-%m-%d'),
+                    'rates': [
+                        dict({'currency': currencies[code].name,
+                              'code': code},
+                             **self._rate(table, code, date))
+                        for code in codes
+                    ],
+                }
+                if table == 'C':
+                    data['tradingDate'] = (
+                        date - timedelta(days=1)
+                    ).strftime('%Y-%m-%d')
+                tables.append(data)
+            return 200, tables
+
+        return 404, None
+
+    def _gold_response(self, tail):
+        """Return (status, JSON data) for gold prices resource ``tail``."""
+        status, dates = self._dates('A', tail, max_days=self.max_gold_days,
+                                    first_date=datetime(2013, 1, 2))
+        if status != 200:
+            return status, None
+        return 200, [
+            {'data': date.strftime('%Y-%m-%d'),
+             'cena': round(100 + 50 * self._value('gold', date.strftime(
+                 '%Y-%m-%d')), 2)}
+            for date in dates
+        ]
+
+    # Faults
+
+    def fault(self):
+        """Return status code of injected fault, or ``None``."""
+        with self._lock:
+            self.requests += 1
+
+            if self.rate_limit is not None:
+                second = int(time.time())
+                window_second, count = self._window
+                count = count + 1 if window_second == second else 1
+                self._window = (second, count)
+                if count > self.rate_limit:
+                    return 429
+
+            if self.error_rate and self._random.random() < self.error_rate:
+                return 500
+
+            delay = self.latency
+            if self.jitter:
+                delay += self._random.uniform(0, self.jitter)
+
+        if delay:
+            time.sleep(delay)
+        return None
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _MockAPIHandler(BaseHTTPRequestHandler):
+    """Request handler for ``MockAPIServer``."""
+
+    #: MockAPIServer object (set by MockAPIServer)
+    api = None
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = self.api.fault()
+        data = None
+        if status is None:
+            status, data = self.api.response(self.path)
+
+        headers = {}
+        if status == 200:
+            body = json.dumps(data).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+            headers['ETag'] = '"{}"'.format(
+                hashlib.sha1(body).hexdigest()[:16]
+            )
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                status, body = 304, b''
+        else:
+            body = "{} {}".format(
+                status, self.responses.get(status, ('',))[0]
+            ).encode('utf-8')
+            content_type = 'text/plain; charset=utf-8'
+
+        if body and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self._write_body(body)
+
+    def _write_body(self, body):
+        """Write body, spreading it over ``body_delay`` if set."""
+        if not self.api.body_delay:
+            self.wfile.write(body)
+            return
+
+        chunks = 10
+        size = len(body) // chunks + 1
+        for i in range(chunks):
+            self.wfile.write(body[i * size:(i + 1) * size])
+            self.wfile.flush()
+            time.sleep(self.api.body_delay / chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local NBP Web API stand-in.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="delay of every response (seconds)")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="max random delay added to latency (seconds)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="fraction of requests failing with 500")
+    parser.add_argument('--rate-limit', type=int, default=None,
+                        help="max requests per second (others get 429)")
+    parser.add_argument('--body-delay', type=float, default=0.0,
+                        help="time spent on sending every body (seconds)")
+    args = parser.parse_args(argv)
+
+    server = MockAPIServer(
+        host=args.host, port=args.port, seed=args.seed, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, body_delay=args.body_delay
+    )
+    print("Serving NBP Web API stand-in at {}".format(server.base_uri))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Tests for nbpy.aggregate submodule and NBPClient.aggregate()."""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.mark.parametrize('period,date,bounds', [
+    ('week', datetime(2017, 10, 4), ((2017, 10, 2), (2017, 10, 8))),
+    ('month', datetime(2017, 2, 14), ((2017, 2, 1), (2017, 2, 28))),
+    ('month', datetime(2017, 12, 31), ((2017, 12, 1), (2017, 12, 31))),
+    ('quarter', datetime(2017, 5, 5), ((2017, 4, 1), (2017, 6, 30))),
+    ('quarter', datetime(2017, 11, 5), ((2017, 10, 1), (2017, 12, 31))),
+    ('year', datetime(2016, 2, 29), ((2016, 1, 1), (2016, 12, 31))),
+])
+def test_period_bounds(period, date, bounds):
+    from nbpy.aggregate import period_bounds
+
+    assert period_bounds(date, period) == tuple(
+        datetime(*bound) for bound in bounds
+    )
+
+
+def test_aggregate():
+    from nbpy.aggregate import aggregate
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    rates = [
+        NBPExchangeRate('EUR', date, mid=Decimal(mid))
+        for date, mid in (('2017-09-28', '4.1'), ('2017-09-29', '4.2'),
+                          ('2017-10-02', '4.3'), ('2017-10-03', '4.0'),
+                          ('2017-10-04', '4.4'))
+    ]
+
+    result = list(aggregate(rates, 'month'))
+    assert [(r.start, r.end, r.count) for r in result] == [
+        (datetime(2017, 9, 1), datetime(2017, 9, 30), 2),
+        (datetime(2017, 10, 1), datetime(2017, 10, 31), 3),
+    ]
+    assert [r.value for r in result] == [Decimal('4.15'), Decimal('12.7') / 3]
+    assert [r.value for r in aggregate(rates, 'quarter', 'max')] == [
+        Decimal('4.2'), Decimal('4.4')
+    ]
+    assert [r.value for r in aggregate(rates, 'year', 'first')] == [
+        Decimal('4.1')
+    ]
+    assert list(aggregate([], 'month')) == []
+
+    # Partially covered periods are clamped to given range
+    result = list(aggregate(rates, 'month', 'count', start_date='2017-09-29',
+                            end_date=datetime(2017, 10, 3)))
+    assert result == [
+        (datetime(2017, 9, 29), datetime(2017, 9, 30), 1, 1),
+        (datetime(2017, 10, 1), datetime(2017, 10, 3), 2, 2),
+    ]
+
+    with pytest.raises(ValueError):
+        list(aggregate(rates, 'decade'))
+    with pytest.raises(ValueError):
+        list(aggregate(rates, 'month', 'median'))
+
+
+def test_client_aggregate():
+    from nbpy import NBPClient
+
+    with MockAPIServer(today=datetime(2017, 12, 31)) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri)
+        result = client.aggregate('2017-01-01', '2017-12-31', 'quarter')
+        # Fewest windows: 365 days in 4 windows
+        assert server.requests == 4
+
+        rates = client.iter_range('2017-01-01', '2017-12-31')
+        by_quarter = {}
+        for rate in rates:
+            by_quarter.setdefault((rate.date.month - 1) // 3, []).append(
+                rate.mid
+            )
+        assert [r.count for r in result] == [
+            len(mids) for _, mids in sorted(by_quarter.items())
+        ]
+        assert [r.value for r in result] == [
+            sum(mids) / len(mids) for _, mids in sorted(by_quarter.items())
+        ]
+
+        # Repeated report reuses cached windows
+        requests = server.requests
+        monthly = client.aggregate('2017-01-01', '2017-12-31', 'month',
+                                   how='last')
+        assert server.requests == requests
+        assert len(monthly) == 12
+
+        bid = client.aggregate('2017-10-01', '2017-10-31', field='bid')
+        assert bid[0].count == 22
+
+
+def test_aligned_windows():
+    from nbpy.utils import date_windows
+
+    assert list(date_windows('2017-02-15', '2017-07-10', align=True)) == [
+        (datetime(2017, 1, 1), datetime(2017, 3, 31)),
+        (datetime(2017, 4, 1), datetime(2017, 6, 30)),
+        (datetime(2017, 7, 1), datetime(2017, 9, 30)),
+    ]
+    assert list(date_windows('2017-11-15', '2018-01-10', 40, True)) == [
+        (datetime(2017, 11, 1), datetime(2017, 11, 30)),
+        (datetime(2017, 12, 1), datetime(2017, 12, 31)),
+        (datetime(2018, 1, 1), datetime(2018, 1, 31)),
+    ]
+
+
+def test_client_aggregate_overlapping():
+    from nbpy import NBPClient
+
+    with MockAPIServer(today=datetime(2017, 12, 31)) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri)
+        result = client.aggregate('2017-02-15', '2017-05-10', how='count')
+        assert server.requests == 2
+        assert (result[0].start, result[-1].end) == (
+            datetime(2017, 2, 15), datetime(2017, 5, 10)
+        )
+        assert [r.count for r in result] == [
+            len(list(client.iter_range(*bounds))) for bounds in (
+                ('2017-02-15', '2017-02-28'), ('2017-03-01', '2017-03-31'),
+                ('2017-04-01', '2017-04-30'), ('2017-05-01', '2017-05-10'),
+            )
+        ]
+
+        # Overlapping report reuses cached quarter windows
+        requests = server.requests
+        client.aggregate('2017-03-01', '2017-06-30', 'week')
+        assert server.requests == requests
@@ -0,0 +1,127 @@
+"""Tests for nbpy.archive submodule."""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+
+@pytest.fixture
+def rates():
+    """Exchange rates for a few currencies and days."""
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    start = datetime(2017, 10, 2)
+    rates = []
+    for day in range(30):
+        date = start + timedelta(days=day)
+        rates.append(NBPExchangeRate(
+            'EUR', date, mid=Decimal('4.{:04d}'.format(day))
+        ))
+        rates.append(NBPExchangeRate(
+            'EUR', date, bid=Decimal('4.1000'), ask=Decimal('4.3000')
+        ))
+        rates.append(NBPExchangeRate(
+            'IDR', date, mid=Decimal('0.000{:03d}'.format(day + 100))
+        ))
+    return rates
+
+
+@pytest.fixture
+def archive_path(tmpdir, rates):
+    """Path to archive with ``rates``."""
+    from nbpy.archive import write_archive
+
+    path = str(tmpdir.join('rates.nbpa'))
+    write_archive(path, rates)
+    return path
+
+
+def test_lookup(archive_path, rates):
+    from nbpy.archive import RateArchive
+
+    with RateArchive(archive_path) as archive:
+        assert len(archive) == len(rates)
+        assert archive.currency_codes == ['EUR', 'IDR']
+
+        rate = archive.lookup('eur', '2017-10-05')
+        assert rate.date == datetime(2017, 10, 5)
+        assert rate.mid == Decimal('4.0003')
+        assert str(rate.mid) == '4.0003'
+
+        rate = archive.lookup('EUR', '2017-10-05', bid_ask=True)
+        assert (rate.bid, rate.ask) == (Decimal('4.1'), Decimal('4.3'))
+
+        rate = archive.lookup('IDR', '2017-10-31', as_float=True)
+        assert rate.mid == pytest.approx(0.000129)
+
+        assert archive.lookup('EUR', '2017-11-30') is None
+        assert archive.lookup('USD', '2017-10-05') is None
+
+
+def test_range_and_last(archive_path):
+    from nbpy.archive import RateArchive
+
+    with RateArchive(archive_path) as archive:
+        result = archive.range('EUR', '2017-09-01', '2017-10-04')
+        assert [r.date.day for r in result] == [2, 3, 4]
+
+        result = archive.last('IDR', 2)
+        assert [r.date.day for r in result] == [30, 31]
+        assert len(archive.last('IDR', 100)) == 30
+
+
+def test_extend(archive_path):
+    from nbpy.archive import RateArchive, write_archive
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    write_archive(archive_path, [
+        NBPExchangeRate('EUR', '2017-10-02', mid=Decimal('5.0000')),
+        NBPExchangeRate('USD', '2017-10-02', mid=Decimal('3.6000')),
+    ], extend=True)
+
+    with RateArchive(archive_path) as archive:
+        assert archive.lookup('EUR', '2017-10-02').mid == Decimal('5.0000')
+        assert archive.lookup('EUR', '2017-10-03').mid == Decimal('4.0001')
+        assert archive.lookup('USD', '2017-10-02').mid == Decimal('3.6000')
+
+
+def test_invalid_archive(tmpdir):
+    from nbpy.archive import RateArchive
+    from nbpy.errors import ArchiveError
+
+    path = str(tmpdir.join('invalid.nbpa'))
+    with open(path, 'wb') as f:
+        f.write(b'not an archive')
+
+    with pytest.raises(ArchiveError):
+        RateArchive(path)
+
+    # Empty file can't be memory-mapped
+    open(path, 'wb').close()
+    with pytest.raises(ArchiveError):
+        RateArchive(path)
+
+
+def test_client_backend(archive_path):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+
+    client = NBPClient('EUR', archive=archive_path)
+    assert client.current().date == datetime(2017, 10, 31)
+    assert client.date('2017-10-10').mid == Decimal('4.0008')
+    assert len(client.last(5)) == 5
+    assert len(client.date_range('2017-10-01', '2017-10-10')) == 9
+    assert client.current(bid_ask=True).bid == Decimal('4.1')
+
+    with pytest.raises(APIError) as e:
+        client.date('2017-11-30')
+    assert e.value.status_code == 404
+
+    # Windows without archived rates are skipped, as for API
+    rates = list(client.iter_range('2017-07-01', '2017-10-10'))
+    assert [rate.date for rate in rates] == [
+        rate.date for rate in client.date_range('2017-10-01', '2017-10-10')
+    ]
+
+    client.suppress_errors = True
+    assert client.date('2017-11-30') is None
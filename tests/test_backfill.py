@@ -0,0 +1,243 @@
+"""Tests for nbpy.backfill submodule."""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+class ListSink(object):
+    """Sink keeping rows in memory, failing after ``fail_after`` writes."""
+
+    def __init__(self, fail_after=None):
+        self.rows = []
+        self.fail_after = fail_after
+
+    def write(self, table, rows):
+        if self.fail_after is not None and self.fail_after <= 0:
+            raise RuntimeError("Crash")
+        if self.fail_after is not None:
+            self.fail_after -= 1
+        self.rows.extend((table, no, rate) for no, rate in rows)
+        return len(rows)
+
+
+def test_plan():
+    from nbpy.backfill import plan
+    from nbpy.currencies import currencies
+
+    tasks = plan(['EUR', 'USD', 'usd'], tables=('A', 'C'),
+                 start_date='2017-01-01', end_date='2017-12-31')
+    # 365 days in 4 windows per table, both currencies in single call
+    assert [task.table for task in tasks] == ['A'] * 4 + ['C'] * 4
+    assert all(task.codes == ('EUR', 'USD') for task in tasks)
+    assert tasks[0].start == datetime(2017, 1, 1)
+    assert tasks[-1].end == datetime(2017, 12, 31)
+    assert all((task.end - task.start).days < 93 for task in tasks)
+
+    # Windows without publications are skipped
+    assert plan(['EUR'], tables=('A',), start_date='2001-01-01',
+                end_date='2002-01-01') == []
+    assert len(plan(['EUR'], tables=('A',), start_date='2017-12-24',
+                    end_date='2017-12-26')) == 0
+
+    # Currencies are planned only for their tables
+    b_code = next(code for code, currency in currencies.items()
+                  if list(currency.tables) == ['B'])
+    tasks = plan([b_code, 'EUR'], start_date='2017-10-02',
+                 end_date='2017-10-31')
+    assert [(task.table, task.codes) for task in tasks] == [
+        ('A', ('EUR',)), ('B', (b_code,)), ('C', ('EUR',))
+    ]
+
+
+def test_plan_unknown_code():
+    from nbpy.backfill import plan
+    from nbpy.errors import UnknownCurrencyCode
+
+    with pytest.raises(UnknownCurrencyCode):
+        plan(['EUR', 'XYZ'], start_date='2017-10-02', end_date='2017-10-31')
+
+
+def test_task_id():
+    from nbpy.backfill import Task, task_id
+
+    start, end = datetime(2017, 1, 1), datetime(2017, 3, 31)
+    assert task_id(Task('C', ('EUR',), start, end)) == \
+        'C/EUR/2017-01-01/2017-03-31'
+    table_id = task_id(Task('A', ('EUR', 'USD'), start, end))
+    assert table_id.startswith('A/') and table_id.endswith('/2017-03-31')
+    assert table_id != task_id(Task('A', ('EUR', 'GBP'), start, end))
+
+
+def test_run(server):
+    from nbpy.backfill import Backfill, plan
+
+    tasks = plan(['EUR', 'USD'], tables=('A', 'C'),
+                 start_date='2017-07-01', end_date='2017-10-31')
+    sink = ListSink()
+    requests = server.requests
+    stats = Backfill(sink, concurrency=3, rate_limit=None,
+                     base_uri=server.base_uri).run(tasks)
+    # Single table-level request per window
+    assert server.requests - requests == len(tasks) == 4
+    assert stats == {'tasks': 4, 'skipped': 0, 'rows': len(sink.rows)}
+
+    keys = [(table, rate.currency_code, rate.date)
+            for table, no, rate in sink.rows]
+    assert len(keys) == len(set(keys))
+    assert {key[:2] for key in keys} == {
+        ('A', 'EUR'), ('A', 'USD'), ('C', 'EUR'), ('C', 'USD')
+    }
+    # 86 business days from July to October 2017
+    assert len(keys) == 4 * 86
+    assert all(no is not None for table, no, rate in sink.rows)
+
+
+def test_per_currency(server):
+    from nbpy.backfill import Backfill, plan
+
+    sink = ListSink()
+    tasks = plan(['EUR'], tables=('C',), start_date='2017-10-01',
+                 end_date='2017-10-31')
+    stats = Backfill(sink, rate_limit=None, base_uri=server.base_uri).run(tasks)
+    assert stats['rows'] == 22
+    assert all(hasattr(rate, 'bid') for table, no, rate in sink.rows)
+    assert all(no == server._table_no('C', rate.date)
+               for table, no, rate in sink.rows)
+
+
+def test_resume(server, tmpdir):
+    from nbpy.backfill import Backfill, Checkpoint, plan
+
+    path = str(tmpdir.join('backfill.log'))
+    tasks = plan(['EUR', 'USD'], tables=('A', 'B', 'C'),
+                 start_date='2017-01-01', end_date='2017-10-31')
+    assert len(tasks) == 8
+
+    crashing = ListSink(fail_after=3)
+    with pytest.raises(RuntimeError):
+        Backfill(crashing, checkpoint=path, concurrency=1, rate_limit=None,
+                 base_uri=server.base_uri).run(tasks)
+    checkpoint = Checkpoint(path)
+    assert len(checkpoint.done) == 3
+    checkpoint.close()
+
+    # Partially written line (crash while checkpointing) is ignored
+    with open(path, 'a') as f:
+        f.write('A/EUR/2017')
+
+    sink = ListSink()
+    runner = Backfill(sink, checkpoint=path, concurrency=2, rate_limit=None,
+                      base_uri=server.base_uri)
+    stats = runner.run(tasks)
+    runner.checkpoint.close()
+    assert stats['tasks'] == 5
+    assert stats['skipped'] == 3
+
+    keys = {(table, rate.currency_code, rate.date)
+            for table, no, rate in crashing.rows + sink.rows}
+    assert len(keys) == len(crashing.rows) + len(sink.rows)
+
+    with Checkpoint(path) as checkpoint:
+        assert len(checkpoint.done) == 8
+        assert all(task in checkpoint for task in tasks)
+
+
+def test_retries():
+    from nbpy.backfill import Backfill, plan
+    from nbpy.errors import APIError
+
+    tasks = plan(['EUR', 'USD'], tables=('A',), start_date='2017-01-01',
+                 end_date='2017-10-31')
+    with MockAPIServer(today=datetime(2017, 10, 31), seed=1,
+                       error_rate=0.5) as server:
+        sink = ListSink()
+        stats = Backfill(sink, rate_limit=None, retries=10, backoff=0,
+                         base_uri=server.base_uri).run(tasks)
+        assert stats['tasks'] == len(tasks)
+        assert server.requests > len(tasks)
+
+        with pytest.raises(APIError) as e:
+            Backfill(ListSink(), rate_limit=None, retries=0, backoff=0,
+                     base_uri=server.base_uri).run(tasks * 4)
+        assert e.value.status_code == 500
+
+
+def test_rate_limiter():
+    import time
+    from nbpy.backfill import RateLimiter
+
+    limiter = RateLimiter(50)
+    start = time.monotonic()
+    for _ in range(11):
+        limiter.acquire()
+    # First request is sent at once, next ones every 20 ms
+    assert time.monotonic() - start >= 0.19
+
+
+def test_jsonl_sink(server, tmpdir):
+    from nbpy.backfill import Backfill, JSONLinesSink, plan
+
+    path = str(tmpdir.join('rates.jsonl'))
+    tasks = plan(['EUR', 'USD'], tables=('C',), start_date='2017-10-30',
+                 end_date='2017-10-31')
+    with JSONLinesSink(path) as sink:
+        Backfill(sink, rate_limit=None, base_uri=server.base_uri).run(tasks)
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 4
+    assert set(records[0]) == {'table', 'code', 'date', 'no', 'bid', 'ask'}
+    assert records[0]['table'] == 'C'
+    assert isinstance(records[0]['bid'], str)
+
+
+def test_store_sink(server, tmpdir):
+    from nbpy.backfill import Backfill, plan
+    from nbpy.store import RateStore
+
+    tasks = plan(['EUR', 'USD'], tables=('A',), start_date='2017-10-01',
+                 end_date='2017-10-31')
+    with RateStore(str(tmpdir.join('rates.db'))) as store:
+        Backfill(store, rate_limit=None, base_uri=server.base_uri).run(tasks)
+        assert len(store.rates('EUR', '2017-10-01', '2017-10-31')) == 22
+        assert store.last_date('USD', 'A') == datetime(2017, 10, 31)
+
+
+def test_cli(server, tmpdir):
+    from nbpy.__main__ import main
+    from nbpy.store import RateStore
+
+    path = str(tmpdir.join('rates.db'))
+    argv = ['backfill', '--store', path, '--currencies', 'EUR', 'USD',
+            '--tables', 'A', '--start', '2017-10-01', '--end', '2017-10-31',
+            '--checkpoint', str(tmpdir.join('backfill.log')),
+            '--upstream', server.base_uri]
+    assert main(argv) == 0
+    requests = server.requests
+    # Resumed backfill sends no requests
+    assert main(argv) == 0
+    assert server.requests == requests
+
+    with RateStore(path) as store:
+        assert len(store.rates('USD', '2017-10-01', '2017-10-31')) == 22
+
+
+def test_cli_unknown_code(tmpdir, capsys):
+    from nbpy.__main__ import main
+
+    path = tmpdir.join('rates.jsonl')
+    with pytest.raises(SystemExit) as e:
+        main(['backfill', '--jsonl', str(path), '--currencies', 'XYZ'])
+    assert e.value.code == 2
+    assert 'unknown currency code: XYZ' in capsys.readouterr().err
+    assert not path.check()
@@ -0,0 +1,55 @@
+"""Smoke tests of benchmarks."""
+
+import json
+
+
+def test_loadtest(tmpdir, capsys):
+    from benchmarks.loadtest import main
+
+    output = str(tmpdir.join('results.json'))
+    for mode in ('threads', 'asyncio'):
+        assert main(['--mode', mode, '--workers', '4', '--duration', '0.5',
+                     '--output', output]) == 0
+        with open(output) as f:
+            results = json.load(f)
+        assert results['mode'] == mode
+        assert results['requests'] > 0
+        # Only publication days are requested
+        assert results['errors'] == 0
+        assert results['latency_p50'] <= results['latency_p99']
+
+
+def test_benchmarks(tmpdir, capsys):
+    from benchmarks.run import BENCHMARKS, main
+
+    names = ['validate_date_datetime', 'pickle_10k_rates', 'series_10k_rates']
+    assert set(names) <= set(BENCHMARKS)
+    output = str(tmpdir.join('results.json'))
+    assert main(names + ['--output', output]) == 0
+    with open(output) as f:
+        results = json.load(f)
+    assert sorted(results['results']) == sorted(names)
+    assert all(result['value'] > 0 for result in results['results'].values())
+
+    # Timings vary between runs, only fail on severe regressions
+    assert main(names + ['--compare', output, '--threshold', '100']) == 0
+    assert 'series_10k_rates' in capsys.readouterr().out
+
+
+def test_compare(capsys):
+    from benchmarks.run import compare
+
+    baseline = {'results': {
+        'faster': {'value': 100.0, 'higher_is_better': True},
+        'slower': {'value': 100.0, 'higher_is_better': True},
+        'smaller': {'value': 100.0, 'higher_is_better': False},
+    }}
+    current = {'results': {
+        'faster': {'value': 150.0, 'higher_is_better': True},
+        'slower': {'value': 80.0, 'higher_is_better': True},
+        'smaller': {'value': 95.0, 'higher_is_better': False},
+        'new': {'value': 1.0, 'higher_is_better': True},
+    }}
+    assert compare(current, baseline, threshold=0.1) == ['slower']
+    assert compare(current, baseline, threshold=0.25) == []
+    assert 'new' not in capsys.readouterr().out
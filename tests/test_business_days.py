@@ -0,0 +1,139 @@
+"""Tests for nbpy.business_days submodule."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+import responses
+
+
+@pytest.mark.parametrize('year,easter', [
+    (2002, date(2002, 3, 31)),
+    (2011, date(2011, 4, 24)),
+    (2017, date(2017, 4, 16)),
+    (2019, date(2019, 4, 21)),
+    (2024, date(2024, 3, 31)),
+    (2038, date(2038, 4, 25)),
+])
+def test_easter(year, easter):
+    from nbpy import business_days
+
+    assert business_days.easter(year) == easter
+
+
+def test_holidays():
+    from nbpy.business_days import holidays, is_holiday
+
+    days = sorted(date.fromordinal(ordinal) for ordinal in holidays(2017))
+    assert days == [
+        date(2017, 1, 1), date(2017, 1, 6), date(2017, 4, 16),
+        date(2017, 4, 17), date(2017, 5, 1), date(2017, 5, 3),
+        date(2017, 6, 4), date(2017, 6, 15), date(2017, 8, 15),
+        date(2017, 11, 1), date(2017, 11, 11), date(2017, 12, 25),
+        date(2017, 12, 26),
+    ]
+    assert holidays(2017) is holidays(2017)
+
+    assert not is_holiday('2010-01-06')
+    assert is_holiday('2018-11-12')
+    assert not is_holiday('2024-12-24')
+    assert is_holiday(datetime(2025, 12, 24))
+
+
+def test_publication_days():
+    from nbpy.business_days import (
+        is_publication_day, publication_days, previous_publication_day
+    )
+
+    assert is_publication_day('2017-10-02')
+    assert not is_publication_day('2017-10-01')      # Sunday
+    assert not is_publication_day('2017-04-17')      # Easter Monday
+    assert not is_publication_day('2001-12-31')      # before first table
+    assert not is_publication_day('2017-10-02', 'B')
+    assert is_publication_day('2017-10-04', 'B')
+    # Wednesday holiday, table B is published day before
+    assert is_publication_day('2017-10-31', 'B')
+    assert not is_publication_day('2017-11-01', 'B')
+
+    assert list(publication_days('2017-10-28', '2017-11-03')) == [
+        date(2017, 10, 30), date(2017, 10, 31), date(2017, 11, 2),
+        date(2017, 11, 3),
+    ]
+    assert list(publication_days('2017-10-01', '2017-10-31', 'B')) == [
+        date(2017, 10, 4), date(2017, 10, 11), date(2017, 10, 18),
+        date(2017, 10, 25), date(2017, 10, 31),
+    ]
+
+    assert previous_publication_day('2017-11-01') == date(2017, 10, 31)
+    assert previous_publication_day('2017-10-30', 'B') == date(2017, 10, 25)
+    assert previous_publication_day('2002-01-01') is None
+
+
+def test_year_boundaries():
+    from nbpy.business_days import (
+        has_publication_day, publication_days, previous_publication_day
+    )
+
+    # New Year's Day on Wednesday, table B is published on New Year's Eve
+    assert list(publication_days('2013-12-28', '2014-01-10', 'B')) == [
+        date(2013, 12, 31), date(2014, 1, 8),
+    ]
+    assert previous_publication_day('2014-01-07', 'B') == date(2013, 12, 31)
+    assert previous_publication_day(datetime(2018, 1, 1)) == \
+        date(2017, 12, 29)
+
+    assert has_publication_day('2017-12-30', '2018-01-02')
+    assert not has_publication_day('2017-12-30', '2018-01-01')
+    assert has_publication_day('2017-12-28', '2018-01-09', 'B')
+    assert not has_publication_day('2017-10-05', '2017-10-10', 'B')
+    assert not has_publication_day('2001-01-01', '2002-01-01')
+    assert not has_publication_day('2017-10-03', '2017-10-02')
+
+
+@pytest.mark.parametrize('table', ('A', 'B', 'C'))
+def test_calendar_matches_api(table):
+    """Test calendar against hand-listed days without tables."""
+    from nbpy.business_days import publication_days
+    from .mock_api_helpers import MockAPIServer, NBP_HOLIDAY_YEARS
+
+    start = datetime(NBP_HOLIDAY_YEARS[0], 1, 1)
+    end = datetime(NBP_HOLIDAY_YEARS[-1], 12, 31)
+    expected = [
+        day.date() for day in (
+            start + timedelta(days=n) for n in range((end - start).days + 1)
+        )
+        if MockAPIServer.is_published(table, day)
+    ]
+    assert list(publication_days(start, end, table)) == expected
+
+
+@responses.activate
+def test_client_answers_locally():
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+    from nbpy.tables import NBPTableClient
+
+    client = NBPClient('EUR')
+    with pytest.raises(APIError) as e:
+        client.date('2017-10-01')
+    assert e.value.status_code == 404
+    with pytest.raises(APIError):
+        client.date_range('2017-10-28', '2017-10-29')
+    with pytest.raises(APIError):
+        NBPTableClient('B').date('2017-10-30')
+    assert NBPClient('EUR', suppress_errors=True).date('2017-10-01') is None
+    assert len(responses.calls) == 0
+    assert client.metrics.snapshot()['errors'] == {'APIError': 2}
+
+
+def test_as_of():
+    from nbpy import NBPClient
+    from .mock_api_helpers import MockAPIServer
+
+    with MockAPIServer(today=datetime(2017, 11, 30)) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri)
+        assert client.as_of('2017-11-01').date == datetime(2017, 10, 31)
+        assert client.as_of('2017-10-31').date == datetime(2017, 10, 31)
+
+        client = NBPClient('CUP', base_uri=server.base_uri)
+        assert client.as_of('2017-11-06').date == datetime(2017, 10, 31)
+        assert server.requests == 2
@@ -0,0 +1,151 @@
+"""Tests for nbpy.cache submodule."""
+
+import os
+import time
+import threading
+import pytest
+import responses
+from datetime import datetime
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockHTTPAddress, MockJSONData
+from .test_client import register_response
+
+
+@pytest.fixture
+def cache(tmpdir):
+    from nbpy.cache import SharedCache
+
+    cache = SharedCache(str(tmpdir.join('cache.db')))
+    yield cache
+    cache.close()
+
+
+def test_get_set(cache):
+    assert cache.get('key') is None
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+
+    cache.clear()
+    assert cache.get('key') is None
+
+
+def test_ttl(cache):
+    cache.set('key', 'value')
+    cache.ttl = 60
+    assert cache.get('key') == 'value'
+    cache.ttl = -1
+    assert cache.get('key') is None
+
+
+def test_lru_cache_ttl(monkeypatch):
+    """Volatile keys expire after ttl, others are kept."""
+    from nbpy import cache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    cache = cache_module.LRUCache(maxsize=2, ttl=10,
+                                  volatile=lambda key: key == 'current')
+    cache.set('current', 1)
+    cache.set('past', 2)
+    now[0] += 9
+    assert cache.get('current') == 1
+
+    now[0] += 2
+    assert cache.get('current') is None
+    assert cache.get('past') == 2
+    assert len(cache) == 1
+    assert cache.misses == 1
+
+
+def test_get_or_fetch_threads(cache):
+    """Missing key is fetched only once by concurrent threads."""
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_fetch('key', fetch))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+
+
+def test_get_or_fetch_error(cache):
+    """Errors aren't cached."""
+    def fetch():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        cache.get_or_fetch('key', fetch)
+    assert cache.get_or_fetch('key', lambda: 'value') == 'value'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork()')
+def test_fork(cache):
+    """Cache opened in parent is usable in forked children."""
+    cache.set('parent', 'value')
+
+    pids = []
+    for i in range(4):
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                value = cache.get_or_fetch('child', lambda: str(os.getpid()))
+                if cache.get('parent') == 'value' and value:
+                    status = 0
+            finally:
+                os._exit(status)
+        pids.append(pid)
+
+    for pid in pids:
+        assert os.waitpid(pid, 0)[1] == 0
+
+    # All children agreed on a single fetched value
+    assert cache.get('child') in [str(pid) for pid in pids]
+
+
+@responses.activate
+def test_client_cache(cache):
+    from nbpy import NBPClient
+
+    currency = currencies['EUR']
+    http_address = MockHTTPAddress(currency)
+    json_data = MockJSONData(currency)
+    date = datetime(2017, 10, 2)
+    register_response(http_address.date(date), 200, json_data.date(date))
+
+    first = NBPClient('EUR', cache=cache).date('2017-10-02')
+    second = NBPClient('EUR', cache=cache).date('2017-10-02')
+
+    assert len(responses.calls) == 1
+    assert first.mid == second.mid
+
+
+@responses.activate
+def test_client_cache_current(cache):
+    """Responses which can change aren't kept in shared cache."""
+    from nbpy import NBPClient
+
+    currency = currencies['EUR']
+    http_address = MockHTTPAddress(currency)
+    json_data = MockJSONData(currency)
+    register_response(http_address.current(), 200, json_data.current())
+
+    NBPClient('EUR', cache=cache).current()
+    NBPClient('EUR', cache=cache).current()
+
+    assert len(responses.calls) == 2
+    assert cache.get(http_address.current()) is None
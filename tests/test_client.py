@@ -4,7 +4,7 @@ import pytest
 import requests
 import responses
 import copy
-from collections import Sequence
+from collections.abc import Sequence
 from datetime import datetime
 from decimal import Decimal
 from nbpy.currencies import NBPCurrency, currencies
@@ -88,7 +88,7 @@ def test_calls(converter, bid_ask, status_code):
     # Values used in test
     request_data = {
         'n': 5,                              # for last()
-        'date': datetime(2017, 10, 15),      # for date()
+        'date': datetime(2017, 10, 18),      # for date() (all tables)
         'start_date': datetime(2017, 10, 1), # for date_range()
         'end_date': datetime(2017, 10, 14),  # for date_range()
     }
@@ -194,4 +194,111 @@ def _test_call_result(result, currency, json_data, **kwargs):
         else:
             assert isinstance(result.mid, rates_cls)
 
-            assert (result.mid - rates_cls(json_rate['mid'])) < 1e-5
\ No newline at end of file
+            assert (result.mid - rates_cls(json_rate['mid'])) < 1e-5
+
+
+@pytest.mark.parametrize('as_float', (False, True))
+@responses.activate
+def test_iter_range(as_float):
+    """Test iter_range() splitting long ranges into API-sized windows."""
+    from nbpy import NBPClient
+    from nbpy.utils import date_windows
+
+    currency = currencies['EUR']
+    http_address = MockHTTPAddress(currency)
+    json_data = MockJSONData(currency)
+
+    start_date = datetime(2017, 1, 1)
+    end_date = datetime(2017, 12, 31)
+
+    windows = list(date_windows(start_date, end_date))
+    assert len(windows) == 4
+
+    for window in windows:
+        assert (window[1] - window[0]).days < 93
+        register_response(http_address.date_range(*window), 200,
+                          json_data.date_range(*window))
+
+    converter = NBPClient('EUR', as_float=as_float)
+    result = converter.iter_range('2017-01-01', '2017-12-31')
+    assert not isinstance(result, Sequence)
+
+    result = list(result)
+    assert len(result) == 365
+    assert len(responses.calls) == 4
+    assert [r.date for r in result] == sorted(r.date for r in result)
+    assert result[0].date == start_date
+    assert result[-1].date == end_date
+
+
+@responses.activate
+def test_iter_ranges():
+    """Test iter_ranges() for many currencies."""
+    from nbpy import iter_ranges
+
+    start_date = datetime(2017, 1, 1)
+    end_date = datetime(2017, 6, 30)
+    codes = ('EUR', 'USD', 'CUP')
+
+    for code in codes:
+        currency = currencies[code]
+        http_address = MockHTTPAddress(currency)
+        json_data = MockJSONData(currency)
+        for window in (datetime(2017, 1, 1), datetime(2017, 4, 3)), \
+                      (datetime(2017, 4, 4), datetime(2017, 6, 30)):
+            register_response(http_address.date_range(*window), 200,
+                              json_data.date_range(*window))
+
+    result = list(iter_ranges(codes, start_date, end_date))
+    assert len(result) == 3 * 181
+    assert [r.currency_code for r in result[:93 * 3:93]] == list(codes)
+
+
+@responses.activate
+def test_iter_range_suppress_errors():
+    """Test iter_range() skipping failed windows with suppress_errors."""
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+
+    currency = currencies['EUR']
+    http_address = MockHTTPAddress(currency)
+    register_response(
+        http_address.date_range(datetime(2017, 1, 1), datetime(2017, 1, 31)),
+        500
+    )
+
+    converter = NBPClient('EUR')
+    with pytest.raises(APIError):
+        list(converter.iter_range('2017-01-01', '2017-01-31'))
+
+    converter.suppress_errors = True
+    assert list(converter.iter_range('2017-01-01', '2017-01-31')) == []
+
+
+@responses.activate
+def test_iter_ranges_missing():
+    """Test iter_ranges() skipping windows without rates (404)."""
+    from nbpy import NBPClient, iter_ranges
+    from nbpy.errors import APIError
+
+    windows = (datetime(2017, 1, 1), datetime(2017, 4, 3)), \
+              (datetime(2017, 4, 4), datetime(2017, 6, 30))
+    for code in ('EUR', 'USD'):
+        currency = currencies[code]
+        http_address = MockHTTPAddress(currency)
+        json_data = MockJSONData(currency)
+        for i, window in enumerate(windows):
+            if code == 'USD' and i == 1:
+                # Withdrawn
+                register_response(http_address.date_range(*window), 404)
+            else:
+                register_response(http_address.date_range(*window), 200,
+                                  json_data.date_range(*window))
+
+    result = list(iter_ranges(('EUR', 'USD'), '2017-01-01', '2017-06-30'))
+    assert len(result) == 181 + 93
+    assert [r.currency_code for r in result].count('USD') == 93
+
+    with pytest.raises(APIError):
+        list(NBPClient('USD').iter_range('2017-01-01', '2017-06-30',
+                                         skip_missing=False))
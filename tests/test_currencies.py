@@ -1,6 +1,9 @@
 """Tests for nbpy.currencies submodule."""
 
+import json
+
 import pytest
+import responses
 
 
 @pytest.fixture(scope='module')
@@ -12,18 +15,22 @@ def data():
         'tables': ('A', 'B', 'C', 'C')
     }
 
+
 @pytest.fixture(scope='module')
 def currency(data):
     """NBPCurrency object."""
     from nbpy.currencies import NBPCurrency
     return NBPCurrency(**data)
 
+
 def test_init_code(data, currency):
     assert currency.code == data['code']
 
+
 def test_init_name(data, currency):
     assert currency.name == data['name']
 
+
 def test_init_tables(data, currency):
     assert tuple(currency.tables) == tuple(set(data['tables']))
 
@@ -34,6 +41,7 @@ def currencies():
     from nbpy.currencies import currencies
     return currencies
 
+
 def test_currencies_types(currencies):
     from nbpy.currencies import NBPCurrency
 
@@ -41,15 +49,126 @@ def test_currencies_types(currencies):
         assert isinstance(code, str)
         assert isinstance(currency, NBPCurrency)
 
-def test_currencies_codes(currencies):
-    from nbpy.currencies import NBPCurrency
 
+def test_currencies_codes(currencies):
     for code, currency in currencies.items():
         assert code == currency.code
 
-def test_currencies_tables(currencies):
-    from nbpy.currencies import NBPCurrency
 
+def test_currencies_tables(currencies):
     for currency in currencies.values():
         for table in currency.tables:
-            assert table in ('A', 'B', 'C')
\ No newline at end of file
+            assert table in ('A', 'B', 'C')
+
+
+def test_registry_lazy():
+    """Test NBPCurrency objects built on first access."""
+    from nbpy.currencies import CurrencyRegistry, NBPCurrency
+
+    registry = CurrencyRegistry({'TST': {'name': 'Test currency',
+                                         'tables': ('A', 'C')}})
+    assert len(registry) == 1
+    assert 'TST' in registry
+    assert 'XYZ' not in registry
+    assert not registry._currencies
+
+    currency = registry['TST']
+    assert isinstance(currency, NBPCurrency)
+    assert registry['TST'] is currency
+    assert list(registry) == ['TST']
+
+
+def test_currency_table_membership():
+    """Test tables of mid and bid/ask rates of currency."""
+    from nbpy.currencies import NBPCurrency
+
+    assert NBPCurrency('TST', 'Test', ('A', 'C')).mid_table == 'A'
+    assert NBPCurrency('TST', 'Test', ('A', 'C')).has_bid_ask
+    assert NBPCurrency('TST', 'Test', ('B',)).mid_table == 'B'
+    assert not NBPCurrency('TST', 'Test', ('B',)).has_bid_ask
+    assert NBPCurrency('TST', 'Test', ('C',)).mid_table is None
+
+
+def _register_tables(currency_data):
+    """Register current tables A, B and C built from ``currency_data``."""
+    from nbpy import BASE_URI
+    from .test_client import register_response
+
+    for table in ('A', 'B', 'C'):
+        rates = [
+            {'currency': name, 'code': code, 'mid': 1.0}
+            for code, (name, tables) in sorted(currency_data.items())
+            if table in tables
+        ]
+        register_response(
+            "{}/exchangerates/tables/{}/".format(BASE_URI, table.lower()),
+            200,
+            [{'table': table, 'no': '001/{}/NBP/2017'.format(table),
+              'effectiveDate': '2017-10-02', 'rates': rates}]
+        )
+
+
+@responses.activate
+def test_registry_refresh(tmpdir):
+    """Test refreshing registry from API and cache."""
+    from nbpy.currencies import CurrencyRegistry
+
+    registry = CurrencyRegistry({'EUR': {'name': 'Euro', 'tables': ('A',)}})
+    _register_tables({
+        'EUR': ('euro', 'AC'),
+        'XYZ': ('nowa waluta', 'B'),
+    })
+    cache_path = str(tmpdir.join('currencies.json'))
+
+    assert registry.refresh(cache_path=cache_path) == 'api'
+    assert sorted(registry) == ['EUR', 'XYZ']
+    # Known names are kept
+    assert registry['EUR'].name == 'Euro'
+    assert registry['EUR'].tables == {'A', 'C'}
+    assert registry['XYZ'].mid_table == 'B'
+    assert len(responses.calls) == 3
+
+    # Fresh cache is used instead of API
+    other = CurrencyRegistry({})
+    assert other.refresh(cache_path=cache_path) == 'cache'
+    assert sorted(other) == ['EUR', 'XYZ']
+    assert len(responses.calls) == 3
+
+    assert other.refresh(cache_path=cache_path, force=True) == 'api'
+    assert len(responses.calls) == 6
+
+    # Withdrawn currencies are kept
+    withdrawn = CurrencyRegistry({'HRK': {'name': 'Croatian kuna',
+                                          'tables': ('A',)}})
+    assert withdrawn.refresh(cache_path=cache_path) == 'cache'
+    assert sorted(withdrawn) == ['EUR', 'HRK', 'XYZ']
+    assert withdrawn['HRK'].mid_table == 'A'
+
+
+@responses.activate
+def test_registry_refresh_offline(tmpdir):
+    """Test refreshing registry with API unavailable."""
+    from nbpy.currencies import CurrencyRegistry
+    from .test_client import register_response
+    from nbpy import BASE_URI
+
+    bundled = {'EUR': {'name': 'Euro', 'tables': ('A', 'C')}}
+    cache_path = str(tmpdir.join('currencies.json'))
+    for table in ('a', 'b', 'c'):
+        register_response(
+            "{}/exchangerates/tables/{}/".format(BASE_URI, table), 500
+        )
+
+    # No cache: bundled data is kept
+    registry = CurrencyRegistry(bundled)
+    assert registry.refresh(cache_path=cache_path) is None
+    assert list(registry) == ['EUR']
+
+    # Stale cache is better than nothing
+    with open(cache_path, 'w') as f:
+        json.dump({'fetched': 0, 'currencies': {
+            'USD': {'name': 'US dollar', 'tables': ['A']}
+        }}, f)
+    assert registry.refresh(cache_path=cache_path) == 'stale cache'
+    assert sorted(registry) == ['EUR', 'USD']
+    assert registry['USD'].tables == {'A'}
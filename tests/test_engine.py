@@ -0,0 +1,119 @@
+"""Tests for nbpy.engine submodule."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+def test_views(server):
+    from nbpy import NBPClient
+    from nbpy.engine import NBPEngine, NBPClientView
+    from nbpy.errors import UnknownCurrencyCode
+
+    engine = NBPEngine(base_uri=server.base_uri, as_float=True)
+    eur = engine['eur']
+    assert isinstance(eur, NBPClientView)
+    assert isinstance(eur, NBPClient)
+    assert eur is engine['EUR'] is engine['Eur']
+    assert eur.currency_code == 'EUR'
+    assert eur.engine is engine
+    assert eur.as_float is True
+    assert eur.transport is engine.transport
+    assert eur.metrics is engine.metrics
+    assert repr(eur).startswith('NBPClientView(EUR, as_float=True')
+
+    with pytest.raises(UnknownCurrencyCode):
+        engine['XYZ']
+
+
+def test_immutable(server):
+    from nbpy.engine import NBPEngine
+
+    eur = NBPEngine(base_uri=server.base_uri)['EUR']
+    with pytest.raises(AttributeError):
+        eur.currency_code = 'USD'
+    with pytest.raises(AttributeError):
+        eur.as_float = True
+    with pytest.raises(AttributeError):
+        del eur.currency_code
+    assert eur.currency_code == 'EUR'
+
+
+def test_calls(server):
+    from nbpy import NBPClient
+    from nbpy.engine import NBPEngine
+
+    engine = NBPEngine(base_uri=server.base_uri)
+    client = NBPClient('USD', base_uri=server.base_uri)
+    usd = engine['USD']
+    assert usd.date('2017-10-02').mid == client.date('2017-10-02').mid
+    assert usd.current().date == datetime(2017, 10, 31)
+    assert len(usd.last(3)) == 3
+    assert len(usd.date_range('2017-10-02', '2017-10-06')) == 5
+    assert usd.as_of('2017-10-01').date == datetime(2017, 9, 29)
+    assert engine['EUR'](bid_ask=True).bid < engine['EUR'](bid_ask=True).ask
+
+    requests = server.requests
+    rates = list(usd.iter_range('2017-01-01', '2017-10-31'))
+    assert server.requests - requests == 4
+    # Streamed windows bypass cache
+    assert len(engine._get_response_data.cache) == 6
+
+    aggregates = usd.aggregate('2017-01-01', '2017-10-31')
+    assert len(aggregates) == 10
+    assert sum(a.count for a in aggregates) == len(rates)
+
+
+def test_shared_cache(server):
+    from nbpy.engine import NBPEngine
+
+    engine = NBPEngine(base_uri=server.base_uri)
+    requests = server.requests
+    first = engine['EUR'].date('2017-10-02')
+    assert engine['eur'].date('2017-10-02') is first
+    assert server.requests - requests == 1
+
+    # Cache is keyed by currency
+    assert engine['USD'].date('2017-10-02') is not first
+    assert server.requests - requests == 2
+    assert engine.metrics.snapshot()['cache']['hit'] == 1
+
+
+def test_threads(server):
+    from nbpy.engine import NBPEngine
+
+    engine = NBPEngine(base_uri=server.base_uri)
+    engine['CHF'].date('2017-10-02')
+    requests = server.requests
+    results = []
+    errors = []
+
+    def worker(code):
+        try:
+            for _ in range(50):
+                view = engine[code]
+                results.append((view.currency_code,
+                                view.date('2017-10-02').mid))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(code,))
+               for code in ('chf', 'CHF') * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(results) == 400
+    assert len(set(results)) == 1
+    assert server.requests == requests
@@ -0,0 +1,143 @@
+"""Tests for nbpy.export submodule."""
+
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+def test_columns():
+    from nbpy.export import columns
+
+    assert columns('a') == ('table', 'code', 'date', 'no', 'mid')
+    assert columns('C') == ('table', 'code', 'date', 'no', 'bid', 'ask')
+
+
+def test_iter_rows(server):
+    from nbpy import NBPClient
+    from nbpy.export import iter_rows
+
+    requests = server.requests
+    rows = list(iter_rows(['EUR', 'USD'], '2017-01-01', '2017-10-31',
+                          concurrency=2, base_uri=server.base_uri))
+    # Table-level calls in 4 windows
+    assert server.requests - requests == 4
+    assert all(isinstance(row, tuple) and len(row) == 5 for row in rows)
+    assert {row[1] for row in rows} == {'EUR', 'USD'}
+    # Windows are streamed in order
+    dates = [row[2] for row in rows]
+    assert dates == sorted(dates)
+    assert dates[0] == '2017-01-02' and dates[-1] == '2017-10-31'
+
+    eur = NBPClient('eur', base_uri=server.base_uri)
+    expected = eur.date_range('2017-10-02', '2017-10-31')
+    exported = [row for row in rows
+                if row[1] == 'EUR' and row[2] >= '2017-10-02']
+    assert [row[4] for row in exported] == [rate.mid for rate in expected]
+    assert all(isinstance(row[4], Decimal) for row in exported)
+
+
+def test_iter_rows_per_currency(server):
+    from nbpy.export import iter_rows
+
+    rows = list(iter_rows(['EUR'], '2017-10-01', '2017-10-31', table='c',
+                          base_uri=server.base_uri))
+    assert len(rows) == 22
+    table, code, date, no, bid, ask = rows[0]
+    assert (table, code, date) == ('C', 'EUR', '2017-10-02')
+    assert '/C/NBP/2017' in no
+    assert bid < ask
+
+
+def test_export_csv(server, tmpdir):
+    from nbpy.export import export
+
+    path = str(tmpdir.join('rates.csv'))
+    count = export(['EUR', 'USD'], '2017-10-01', '2017-10-31', path,
+                   base_uri=server.base_uri)
+    assert count == 44
+
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['table', 'code', 'date', 'no', 'mid']
+    assert len(rows) == 45
+    Decimal(rows[1][4])
+
+
+def test_export_jsonl(server, tmpdir):
+    from nbpy.export import export
+
+    path = str(tmpdir.join('rates.jsonl'))
+    assert export(['EUR'], '2017-10-01', '2017-10-31', path, table='C',
+                  base_uri=server.base_uri) == 22
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 22
+    assert set(records[0]) == {'table', 'code', 'date', 'no', 'bid', 'ask'}
+    assert isinstance(records[0]['bid'], str)
+
+
+def test_export_parquet(server, tmpdir):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet
+    from nbpy.export import export
+
+    path = str(tmpdir.join('rates.parquet'))
+    assert export(['EUR', 'USD'], '2017-10-01', '2017-10-31', path,
+                  base_uri=server.base_uri) == 44
+    table = pyarrow.parquet.read_table(path)
+    assert table.column_names == ['table', 'code', 'date', 'no', 'mid']
+    assert table.num_rows == 44
+
+
+def test_export_errors(tmpdir):
+    from nbpy.export import export
+
+    with pytest.raises(ValueError):
+        export(['EUR'], '2017-10-01', '2017-10-31', 'rates.xml', fmt='xml')
+    with pytest.raises(ValueError):
+        export(['EUR'], '2017-10-01', '2017-10-31', '-', fmt='parquet')
+
+
+def test_cli(server, tmpdir, capsys):
+    from nbpy.__main__ import main
+
+    assert main(['export', '--currencies', 'EUR', '--start', '2017-10-30',
+                 '--end', '2017-10-31', '--format', 'jsonl',
+                 '--upstream', server.base_uri]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['date'] for line in lines] == \
+        ['2017-10-30', '2017-10-31']
+
+    path = str(tmpdir.join('rates.csv'))
+    assert main(['export', '--table', 'B', '--start', '2017-10-25',
+                 '--end', '2017-10-25', '--output', path,
+                 '--upstream', server.base_uri]) == 0
+    assert 'Exported' in capsys.readouterr().out
+    with open(path) as f:
+        rows = list(csv.reader(f))
+    assert len(rows) > 2
+    assert {row[0] for row in rows[1:]} == {'B'}
+
+
+def test_cli_unknown_code(tmpdir, capsys):
+    from nbpy.__main__ import main
+
+    path = tmpdir.join('rates.csv')
+    with pytest.raises(SystemExit) as e:
+        main(['export', '--currencies', 'EUR', 'XYZ', '--start', '2017-10-02',
+              '--end', '2017-10-31', '--output', str(path)])
+    assert e.value.code == 2
+    assert 'unknown currency code: XYZ' in capsys.readouterr().err
+    assert not path.check()
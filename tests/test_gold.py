@@ -0,0 +1,87 @@
+"""Tests for nbpy.gold submodule."""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import responses
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+def test_gold_price():
+    from nbpy.gold import NBPGoldPrice
+
+    price = NBPGoldPrice('2017-10-02', Decimal('145.39'))
+    assert price.date == datetime(2017, 10, 2)
+    assert price(10) == Decimal('1453.90')
+    assert 2 * price == price * 2 == Decimal('290.78')
+    assert repr(price) == 'NBPGoldPrice(2017-10-02, price=145.39)'
+
+
+def test_calls(server):
+    from nbpy.gold import NBPGoldClient, NBPGoldPrice
+
+    client = NBPGoldClient(base_uri=server.base_uri)
+    current = client.current()
+    assert isinstance(current, NBPGoldPrice)
+    assert isinstance(current.price, Decimal)
+    assert current.date == datetime(2017, 10, 31)
+    assert client() is current
+    assert client.today().date == datetime(2017, 10, 31)
+    assert [p.date.day for p in client.last(3)] == [27, 30, 31]
+    assert client.date('2017-10-02').price == \
+        client.date_range('2017-10-02', '2017-10-03')[0].price
+
+    float_client = NBPGoldClient(base_uri=server.base_uri, as_float=True)
+    assert isinstance(float_client.current().price, float)
+
+
+def test_windowing(server):
+    from nbpy.gold import NBPGoldClient
+
+    client = NBPGoldClient(base_uri=server.base_uri)
+    requests = server.requests
+    prices = client.date_range('2015-01-01', '2017-10-31')
+    # 1035 days in 3 windows
+    assert server.requests - requests == 3
+    dates = [price.date for price in prices]
+    assert dates == sorted(set(dates))
+    assert dates[0] == datetime(2015, 1, 2)
+    assert dates[-1] == datetime(2017, 10, 31)
+
+    # Repeated call served from cache
+    assert client.date_range('2015-01-01', '2017-10-31') == prices
+    assert server.requests - requests == 3
+
+    streamed = list(client.iter_range('2012-01-01', '2017-10-31'))
+    assert streamed[0].date == datetime(2013, 1, 2)
+    assert [p.date for p in streamed[-len(prices):]] == dates
+
+
+@responses.activate
+def test_errors():
+    from nbpy.gold import NBPGoldClient
+    from nbpy.errors import APIError
+
+    client = NBPGoldClient()
+    with pytest.raises(APIError):
+        client.date('2017-10-01')
+    with pytest.raises(APIError):
+        client.date('2012-10-01')
+    assert NBPGoldClient(suppress_errors=True).date('2017-10-01') is None
+    assert len(responses.calls) == 0
+
+
+def test_metrics(server):
+    from nbpy.gold import NBPGoldClient
+
+    client = NBPGoldClient(base_uri=server.base_uri)
+    client.last(5)
+    assert client.metrics.snapshot()['requests'] == {'cenyzlota/last': 1}
@@ -0,0 +1,127 @@
+"""Tests for nbpy.hooks submodule."""
+
+import json
+import pytest
+from datetime import datetime
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockJSONData
+from .test_transport import StaticTransport
+
+
+@pytest.fixture
+def client():
+    from nbpy import NBPClient
+    from nbpy.transport import TransportResponse
+
+    json_data = MockJSONData(currencies['EUR']).last(3)
+    transport = StaticTransport(
+        TransportResponse(200, {}, json.dumps(json_data))
+    )
+    return NBPClient('EUR', transport=transport)
+
+
+def test_events(client):
+    events = []
+    client.hooks.register(lambda event, context: events.append(
+        (event, context)
+    ))
+
+    client.last(3)
+    client.last(3)
+
+    # Miss is emitted after the call, with its duration
+    assert [event for event, _ in events] == [
+        'before_request', 'after_response', 'after_parse',
+        'after_construct', 'cache_miss', 'cache_hit',
+    ]
+    for _, context in events:
+        assert context['client'] is client
+        assert context['currency'] == 'EUR'
+        assert context['table'] == 'A'
+        assert context['uri_tail'] == 'last/3'
+
+    contexts = dict(events)
+    assert contexts['cache_miss']['key'] == ('last/3', False)
+    assert contexts['cache_miss']['duration'] >= \
+        contexts['after_response']['duration']
+    assert 'duration' not in contexts['cache_hit']
+    assert contexts['before_request']['endpoint'] == 'exchangerates/rates/last'
+    assert contexts['after_response']['status_code'] == 200
+    assert contexts['after_response']['duration'] >= 0
+    assert contexts['after_parse']['duration'] >= 0
+    assert contexts['after_construct']['rows'] == 3
+
+
+def test_global_hooks(client):
+    from nbpy.hooks import global_hooks, StageProfiler
+
+    assert not client.hooks.enabled
+
+    profiler = StageProfiler(global_hooks)
+    try:
+        assert client.hooks.enabled
+        client.last(3)
+    finally:
+        profiler.stop()
+
+    assert not client.hooks.enabled
+    report = profiler.report()
+    assert report['after_response']['count'] == 1
+    assert report['after_construct']['total'] >= 0
+    assert report['cache_miss']['count'] == 1
+    assert report['cache_miss']['total'] >= report['after_parse']['total']
+
+
+def test_register_selected_events(client):
+    from nbpy.hooks import Hooks
+
+    hooks = Hooks()
+    events = []
+
+    def callback(event, context):
+        events.append(event)
+
+    hooks.register(callback, 'after_parse')
+    hooks.emit('after_parse')
+    hooks.emit('after_response')
+    hooks.unregister(callback)
+    hooks.emit('after_parse')
+
+    assert events == ['after_parse']
+    assert not hooks.enabled
+
+    with pytest.raises(ValueError):
+        hooks.register(callback, 'unknown')
+
+
+def test_events_context():
+    from nbpy.engine import NBPEngine
+    from nbpy.tables import NBPTableClient
+    from .mock_api_helpers import MockAPIServer
+
+    events = []
+
+    def callback(event, context):
+        events.append((event, context))
+
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        tables = NBPTableClient('c', base_uri=server.base_uri)
+        tables.hooks.register(callback, ('before_request', 'cache_miss'))
+        tables.date('2017-10-02')
+
+        engine = NBPEngine(base_uri=server.base_uri)
+        engine.hooks.register(callback, ('after_parse', 'cache_miss',
+                                         'cache_hit'))
+        engine['usd'].date('2017-10-02', bid_ask=True)
+        engine['usd'].date('2017-10-02', bid_ask=True)
+
+    assert [(event, context['currency'], context['table'],
+             context['uri_tail']) for event, context in events] == [
+        ('before_request', None, 'C', '2017-10-02'),
+        ('cache_miss', None, 'C', '2017-10-02'),
+        ('after_parse', 'USD', 'C', '2017-10-02'),
+        ('cache_miss', 'USD', 'C', '2017-10-02'),
+        ('cache_hit', 'USD', 'C', '2017-10-02'),
+    ]
+    assert all(context['duration'] >= 0 for event, context in events
+               if event == 'cache_miss')
@@ -0,0 +1,16 @@
+"""Tests for import cost of nbpy."""
+
+import subprocess
+import sys
+
+
+def test_lazy_imports():
+    """Importing nbpy defers HTTP stack and building currency registry."""
+    code = (
+        "import sys, nbpy; "
+        "print(sorted(set(sys.modules) & "
+        "{'requests', 'urllib3', 'sqlite3', 'concurrent.futures'})); "
+        "print(len(nbpy.currencies._currencies))"
+    )
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode().split() == ['[]', '0']
@@ -0,0 +1,103 @@
+"""Tests for nbpy.metrics submodule."""
+
+import json
+import pytest
+from datetime import datetime
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockJSONData
+from .test_transport import StaticTransport
+
+
+@pytest.mark.parametrize('uri,endpoint', [
+    ('http://api.nbp.pl/api/exchangerates/rates/a/eur/',
+     'exchangerates/rates/current'),
+    ('http://api.nbp.pl/api/exchangerates/rates/a/eur/today',
+     'exchangerates/rates/today'),
+    ('http://api.nbp.pl/api/exchangerates/rates/c/eur/last/10',
+     'exchangerates/rates/last'),
+    ('http://api.nbp.pl/api/exchangerates/rates/a/eur/2017-10-02',
+     'exchangerates/rates/date'),
+    ('http://localhost:8080/api/exchangerates/tables/a/2017-10-02/2017-10-31/',
+     'exchangerates/tables/date_range'),
+])
+def test_endpoint_name(uri, endpoint):
+    from nbpy.metrics import endpoint_name
+    assert endpoint_name(uri) == endpoint
+
+
+def test_histogram():
+    from nbpy.metrics import Histogram
+
+    histogram = Histogram(buckets=(1, 2))
+    for value in (0.5, 1.5, 1.7, 3):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {1: 1, 2: 3, float('inf'): 4}
+    assert snapshot['count'] == 4
+    assert snapshot['sum'] == pytest.approx(6.7)
+
+
+def test_client_metrics():
+    from nbpy import NBPClient
+    from nbpy.errors import APIError, BidAskUnavailable
+    from nbpy.metrics import Metrics
+    from nbpy.transport import TransportResponse
+
+    json_data = MockJSONData(currencies['CUP']).date(datetime(2017, 10, 2))
+    body = json.dumps(json_data)
+    transport = StaticTransport(TransportResponse(200, {}, body))
+
+    parent = Metrics()
+    metrics = Metrics(parent=parent)
+    # Table B rates served every day, so no calls are answered locally
+    client = NBPClient('CUP', transport=transport, cache_size=1,
+                       metrics=metrics, calendar=False)
+
+    client.date('2017-10-02')
+    client.date('2017-10-02')
+    client.date('2017-10-03')
+    with pytest.raises(BidAskUnavailable):
+        client.current(bid_ask=True)
+
+    transport.response = TransportResponse(404, {}, '')
+    with pytest.raises(APIError):
+        client.date('2017-10-04')
+
+    for snapshot in (metrics.snapshot(), parent.snapshot()):
+        assert snapshot['requests'] == {'exchangerates/rates/date': 3}
+        assert snapshot['latency']['exchangerates/rates/date']['count'] == 3
+        assert snapshot['response_bytes'] == {
+            'exchangerates/rates/date': 2 * len(body)
+        }
+        assert snapshot['parse_time']['count'] == 2
+        # Parse time has sub-millisecond buckets
+        assert min(snapshot['parse_time']['buckets']) < 0.0001
+        assert snapshot['cache'] == {'hit': 1, 'miss': 4, 'eviction': 1}
+        assert snapshot['errors'] == {'APIError': 1, 'BidAskUnavailable': 1}
+
+    assert metrics.cache_hit_ratio == pytest.approx(0.2)
+
+    text = metrics.to_prometheus()
+    assert '# TYPE nbpy_requests_total counter' in text
+    assert 'nbpy_requests_total{endpoint="exchangerates/rates/date"} 3' in text
+    assert ('nbpy_request_duration_seconds_bucket'
+            '{endpoint="exchangerates/rates/date",le="+Inf"} 3') in text
+    assert 'nbpy_errors_total{error="APIError"} 1' in text
+
+
+def test_lru_cache():
+    from nbpy.cache import LRUCache
+
+    calls = []
+    cache = LRUCache(maxsize=2)
+
+    @cache
+    def double(value):
+        calls.append(value)
+        return 2 * value
+
+    assert [double(v) for v in (1, 2, 1, 3, 2)] == [2, 4, 2, 6, 4]
+    assert calls == [1, 2, 3, 2]
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 4, 2)
+    assert double.__wrapped__(5) == 10
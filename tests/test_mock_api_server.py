@@ -0,0 +1,70 @@
+"""Tests for NBPClient against local API stand-in (MockAPIServer)."""
+
+import pytest
+from datetime import datetime
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+def test_rates(server):
+    from nbpy import NBPClient
+
+    client = NBPClient('EUR', base_uri=server.base_uri)
+    assert client.current().date == datetime(2017, 10, 31)
+    assert client.today().date == datetime(2017, 10, 31)
+    assert [rate.date.day for rate in client.last(3)] == [27, 30, 31]
+    assert len(client.date_range('2017-10-01', '2017-10-31')) == 22
+
+    # Data is deterministic
+    other = NBPClient('EUR', base_uri=server.base_uri + '/')
+    assert other.date('2017-10-02').mid == client.date('2017-10-02').mid
+
+    rate = client.date('2017-10-02', bid_ask=True)
+    assert rate.bid < rate.ask
+
+
+def test_tables(server):
+    from nbpy.tables import NBPTableClient
+
+    client = NBPTableClient('B', base_uri=server.base_uri)
+    tables = client.date_range('2017-10-01', '2017-10-31')
+    # 2017-11-01 (Wednesday) is a holiday, table is published on Tuesday
+    assert [table.date.weekday() for table in tables] == [2] * 4 + [1]
+    assert tables[0].no == '040/B/NBP/2017'
+
+
+def test_api_errors(server):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+
+    client = NBPClient('EUR', base_uri=server.base_uri)
+    for call, args, status_code in (
+            (client.date, ('2017-10-01',), 404),
+            (client.date_range, ('2017-01-01', '2017-06-01'), 400),
+            (client.last, (300,), 400)):
+        with pytest.raises(APIError) as excinfo:
+            call(*args)
+        assert excinfo.value.status_code == status_code
+
+
+def test_faults():
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+
+    with MockAPIServer(error_rate=1.0) as server:
+        with pytest.raises(APIError) as excinfo:
+            NBPClient('EUR', base_uri=server.base_uri).current()
+        assert excinfo.value.status_code == 500
+
+    with MockAPIServer(rate_limit=1, latency=0.01) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri, cache_size=0)
+        with pytest.raises(APIError) as excinfo:
+            for _ in range(3):
+                client.current()
+        assert excinfo.value.status_code == 429
+        assert server.requests >= 2
@@ -0,0 +1,127 @@
+"""Tests for nbpy.scheduler submodule."""
+
+from datetime import datetime, time
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture
+def server():
+    # Table of 2017-10-31 (Tuesday) not published yet
+    with MockAPIServer(today=datetime(2017, 10, 30)) as server:
+        yield server
+
+
+class Clock(object):
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_is_due():
+    from nbpy.scheduler import PrefetchScheduler
+
+    scheduler = PrefetchScheduler()
+    assert scheduler.is_due('A', datetime(2017, 10, 31, 12, 0))
+    assert not scheduler.is_due('A', datetime(2017, 10, 31, 11, 0))
+    assert not scheduler.is_due('A', datetime(2017, 10, 31, 18, 0))
+    # Weekend
+    assert not scheduler.is_due('A', datetime(2017, 10, 28, 12, 0))
+    # Table B is published on Wednesdays
+    assert not scheduler.is_due('B', datetime(2017, 10, 30, 12, 0))
+    assert scheduler.is_due('B', datetime(2017, 11, 8, 12, 0))
+    # Holiday
+    assert not scheduler.is_due('A', datetime(2017, 11, 1, 12, 0))
+    assert scheduler.is_due('C', datetime(2017, 10, 31, 8, 0))
+
+    scheduler.last_dates['A'] = datetime(2017, 10, 31)
+    assert not scheduler.is_due('A', datetime(2017, 10, 31, 12, 0))
+
+
+def test_next_poll():
+    from nbpy.scheduler import PrefetchScheduler
+    from nbpy import NBPClient
+
+    clock = Clock(datetime(2017, 10, 31, 11, 0))
+    scheduler = PrefetchScheduler([NBPClient('EUR')], poll_interval=30,
+                                  now=clock)
+    assert scheduler.next_poll() == 45 * 60
+
+    clock.now = datetime(2017, 10, 31, 12, 0)
+    assert scheduler.next_poll() == 30
+
+    # Friday evening, next poll on Monday
+    clock.now = datetime(2017, 11, 3, 18, 0)
+    assert scheduler.next_poll() == (2 * 24 + 17.75) * 3600
+
+
+def test_warm_up_and_poll(server):
+    from nbpy import NBPClient
+    from nbpy.tables import NBPTableClient
+    from nbpy.scheduler import PrefetchScheduler
+
+    eur = NBPClient('EUR', base_uri=server.base_uri)
+    usd = NBPClient('USD', base_uri=server.base_uri)
+    table = NBPTableClient('A', base_uri=server.base_uri)
+    clock = Clock(datetime(2017, 10, 31, 12, 0))
+    scheduler = PrefetchScheduler([eur, usd, table], now=clock)
+    assert scheduler.tables == ['A']
+
+    scheduler.warm_up()
+    assert server.requests == 3
+    assert scheduler.last_dates == {'A': datetime(2017, 10, 30)}
+    assert eur.current().date == datetime(2017, 10, 30)
+    assert table.current().date == datetime(2017, 10, 30)
+    assert server.requests == 3
+
+    # Not published yet: single cheap check
+    assert scheduler.poll() == []
+    assert server.requests == 4
+
+    server.today = datetime(2017, 10, 31)
+    assert scheduler.poll() == ['A']
+    assert server.requests == 7
+    assert scheduler.last_dates == {'A': datetime(2017, 10, 31)}
+
+    # All served from cache
+    assert eur.current().date == datetime(2017, 10, 31)
+    assert eur.today().date == datetime(2017, 10, 31)
+    assert usd.current().date == datetime(2017, 10, 31)
+    assert table.today().date == datetime(2017, 10, 31)
+    assert server.requests == 7
+
+    # Nothing to do until next day
+    assert scheduler.poll() == []
+    assert server.requests == 7
+    assert scheduler.errors == 0
+
+
+def test_poll_errors(server):
+    """Test errors not stopping scheduler."""
+    from nbpy import NBPClient
+    from nbpy.scheduler import PrefetchScheduler
+
+    # No bid/ask rates for CUP
+    cup = NBPClient('CUP', base_uri=server.base_uri)
+    scheduler = PrefetchScheduler([cup], bid_ask=True,
+                                  now=Clock(datetime(2017, 10, 31, 8, 0)))
+    scheduler.warm_up()
+    assert scheduler.poll() == []
+    assert scheduler.errors == 2
+
+
+def test_background_thread(server):
+    from nbpy import NBPClient
+    from nbpy.scheduler import PrefetchScheduler
+
+    client = NBPClient('EUR', base_uri=server.base_uri)
+    clock = Clock(datetime(2017, 10, 31, 12, 0))
+    with PrefetchScheduler([client], now=clock,
+                           publication_times={'A': time(11, 0)}):
+        pass
+    assert server.requests >= 1
+    assert client.current().date == datetime(2017, 10, 30)
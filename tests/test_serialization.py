@@ -0,0 +1,122 @@
+"""Tests for compact serialization of exchange rates."""
+
+import pickle
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+
+def _series(count=100, bid_ask=False, as_float=False, code='EUR'):
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    start = datetime(2017, 1, 2)
+    rates = []
+    for i in range(count):
+        value = Decimal('4.{:04d}'.format(i))
+        if as_float:
+            value = float(value)
+        if bid_ask:
+            kwargs = {'bid': value, 'ask': value + 1}
+        else:
+            kwargs = {'mid': value}
+        rates.append(NBPExchangeRate(code, start + timedelta(days=i),
+                                     **kwargs))
+    return rates
+
+
+def _same(first, second):
+    return all(
+        a.currency_code == b.currency_code and a.date == b.date and
+        a.__dict__ == b.__dict__ and
+        all(type(a.__dict__[key]) is type(b.__dict__[key])
+            for key in a.__dict__)
+        for a, b in zip(first, second)
+    ) and len(first) == len(second)
+
+
+@pytest.mark.parametrize('bid_ask', (False, True))
+@pytest.mark.parametrize('as_float', (False, True))
+def test_pickle(bid_ask, as_float):
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    rates = _series(10, bid_ask=bid_ask, as_float=as_float)
+    restored = pickle.loads(pickle.dumps(rates))
+    assert _same(rates, restored)
+    assert all(isinstance(rate, NBPExchangeRate) for rate in restored)
+    # Converting still works
+    assert restored[0](10) == rates[0](10)
+
+    # Date with time of day is kept
+    rate = NBPExchangeRate('USD', datetime(2017, 10, 2, 12, 30), mid=3.5)
+    assert pickle.loads(pickle.dumps(rate)).date == rate.date
+
+    # So is table number
+    rate = NBPExchangeRate('USD', '2017-10-02', mid=3.5, no='190/A/NBP/2017')
+    assert pickle.loads(pickle.dumps(rate)).no == '190/A/NBP/2017'
+
+
+def test_pickle_is_compact():
+    rates = _series(1000)
+    state = [(rate.__class__, rate.__dict__) for rate in rates]
+    assert len(pickle.dumps(rates)) < len(pickle.dumps(state))
+
+
+@pytest.mark.parametrize('bid_ask', (False, True))
+@pytest.mark.parametrize('as_float', (False, True))
+def test_round_trip(bid_ask, as_float):
+    from nbpy.serialization import dumps, loads
+
+    rates = _series(bid_ask=bid_ask, as_float=as_float)
+    data = dumps(rates)
+    assert isinstance(data, bytes)
+    assert _same(loads(data), rates)
+    # Header, 4-byte ordinals and 4-byte values
+    assert len(data) == 14 + 100 * (4 + 4 * (2 if bid_ask else 1))
+    assert len(data) * 3 < len(pickle.dumps(rates))
+
+
+def test_round_trip_values():
+    from nbpy.exchange_rate import NBPExchangeRate
+    from nbpy.serialization import dumps, loads
+
+    values = [Decimal('4.32'), Decimal('0.00012345'), Decimal('123456789.5'),
+              Decimal('3')]
+    rates = [NBPExchangeRate('HUF', datetime(2017, 10, i + 2), mid=value)
+             for i, value in enumerate(values)]
+    restored = loads(dumps(rates))
+    # Common scale, exact values (64-bit)
+    assert [rate.mid for rate in restored] == values
+    assert str(restored[0].mid) == '4.32000000'
+
+    floats = [0.1, 1e-8, 4.3208, 12345.6789]
+    rates = [NBPExchangeRate('HUF', datetime(2017, 10, i + 2), mid=value)
+             for i, value in enumerate(floats)]
+    assert [rate.mid for rate in loads(dumps(rates))] == floats
+
+    assert loads(dumps([])) == []
+
+
+def test_errors():
+    from nbpy.exchange_rate import NBPExchangeRate
+    from nbpy.serialization import dumps, loads
+
+    mixed = [NBPExchangeRate('EUR', '2017-10-02', mid=Decimal('4.3')),
+             NBPExchangeRate('USD', '2017-10-02', mid=Decimal('3.6'))]
+    with pytest.raises(ValueError):
+        dumps(mixed)
+    kinds = [NBPExchangeRate('EUR', '2017-10-02', mid=Decimal('4.3')),
+             NBPExchangeRate('EUR', '2017-10-03', bid=Decimal('4.2'),
+                             ask=Decimal('4.4'))]
+    with pytest.raises(ValueError):
+        dumps(kinds)
+    with pytest.raises(ValueError):
+        dumps([NBPExchangeRate('EUR', '2017-10-02', mid=Decimal('NaN'))])
+
+    data = dumps(_series(10))
+    with pytest.raises(ValueError):
+        loads(data[:-1])
+    with pytest.raises(ValueError):
+        loads(b'XXXX' + data[4:])
+    with pytest.raises(ValueError):
+        loads(data[:3])
@@ -0,0 +1,179 @@
+"""Tests for nbpy.server (caching proxy of NBP Web API)."""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture
+def upstream():
+    with MockAPIServer(today=datetime(2017, 10, 31), latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def proxy_server(upstream):
+    from nbpy.server import CachingProxy, ProxyServer
+
+    proxy = CachingProxy(upstream=upstream.base_uri, ttl=60.0)
+    with ProxyServer(proxy, port=0, quiet=True) as server:
+        yield server
+
+
+def test_is_final():
+    from datetime import date
+    from nbpy.server import CachingProxy
+
+    today = date(2017, 10, 31)
+    assert CachingProxy.is_final('/exchangerates/rates/a/eur/2017-10-02/',
+                                 today)
+    assert not CachingProxy.is_final(
+        '/exchangerates/rates/a/eur/2017-10-02/2017-10-31/', today
+    )
+    assert not CachingProxy.is_final('/exchangerates/rates/a/eur/', today)
+    assert not CachingProxy.is_final('/exchangerates/rates/a/eur/last/5/',
+                                     today)
+
+
+def test_client_through_proxy(upstream, proxy_server):
+    from nbpy import NBPClient
+
+    direct = NBPClient('EUR', base_uri=upstream.base_uri, cache_size=0)
+    client = NBPClient('EUR', base_uri=proxy_server.base_uri, cache_size=0)
+
+    assert client.date('2017-10-02').mid == direct.date('2017-10-02').mid
+    assert client.current().date == datetime(2017, 10, 31)
+
+    requests = upstream.requests
+    client.date('2017-10-02')
+    client.current()
+    assert upstream.requests == requests
+
+
+def test_errors(upstream, proxy_server):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+
+    client = NBPClient('EUR', base_uri=proxy_server.base_uri, cache_size=0,
+                       calendar=False)
+    for _ in range(2):
+        with pytest.raises(APIError) as e:
+            client.date('2017-10-01')   # Sunday
+        assert e.value.status_code == 404
+    # 404 is cached as well
+    assert upstream.requests == 1
+
+
+def test_coalescing(upstream):
+    from nbpy.server import CachingProxy
+
+    proxy = CachingProxy(upstream=upstream.base_uri)
+    path = '/exchangerates/rates/a/eur/2017-10-02/'
+    results = []
+
+    def worker():
+        results.append(proxy.get(path))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert upstream.requests == 1
+    assert len({body for _, body, _ in results}) == 1
+    assert sorted(cached for _, _, cached in results) == [False] + [True] * 9
+
+
+def test_ttl(upstream, monkeypatch):
+    from nbpy import server as server_module
+
+    proxy = server_module.CachingProxy(upstream=upstream.base_uri, ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr(server_module.time, 'monotonic', lambda: now[0])
+
+    assert proxy.get('/exchangerates/rates/a/eur/')[2] is False
+    assert proxy.get('/exchangerates/rates/a/eur/')[2] is True
+    assert proxy.get('/exchangerates/rates/a/eur/2017-10-02/')[2] is False
+
+    now[0] += 11
+    assert proxy.get('/exchangerates/rates/a/eur/')[2] is False
+    # Past dates never expire
+    assert proxy.get('/exchangerates/rates/a/eur/2017-10-02/')[2] is True
+
+
+def test_shared_cache(upstream, tmpdir):
+    from nbpy.cache import SharedCache
+    from nbpy.server import CachingProxy
+
+    path = '/exchangerates/rates/a/eur/2017-10-02/'
+    cache_path = str(tmpdir.join('cache.db'))
+    body = CachingProxy(upstream=upstream.base_uri,
+                        cache=SharedCache(cache_path)).get(path)[1]
+
+    # New proxy (e.g. after restart) uses shared cache
+    proxy = CachingProxy(upstream=upstream.base_uri,
+                         cache=SharedCache(cache_path))
+    assert proxy.get(path)[1] == body
+    assert upstream.requests == 1
+
+
+def test_unknown_paths_and_metrics(proxy_server):
+    import requests
+
+    response = requests.get(proxy_server.base_uri + '/unknown/')
+    assert response.status_code == 404
+
+    uri = proxy_server.base_uri + '/exchangerates/rates/a/eur/'
+    assert requests.get(uri).headers['X-Cache'] == 'MISS'
+    response = requests.get(uri)
+    assert response.headers['X-Cache'] == 'HIT'
+
+    response = requests.get(proxy_server.base_uri.rsplit('/', 1)[0] +
+                            '/metrics')
+    assert response.status_code == 200
+    assert 'nbpy_requests_total{endpoint="exchangerates/rates/current"} 1' \
+        in response.text
+
+
+def test_coalesced_failure(upstream, monkeypatch):
+    import time
+    from nbpy.server import CachingProxy
+
+    proxy = CachingProxy(upstream=upstream.base_uri)
+
+    def fetch(uri):
+        time.sleep(0.1)
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(proxy.client, '_fetch', fetch)
+    path = '/exchangerates/rates/a/eur/'
+    errors = []
+
+    def worker():
+        try:
+            proxy.get(path)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Waiters fail with error of the leader
+    assert len(errors) == 5
+    assert len({id(e) for e in errors}) < 5
+
+
+def test_query_rejected(proxy_server):
+    import requests
+
+    uri = proxy_server.base_uri + '/exchangerates/rates/a/eur/'
+    response = requests.get(uri + '?format=xml')
+    assert response.status_code == 400
+    assert requests.get(uri).status_code == 200
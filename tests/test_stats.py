@@ -0,0 +1,104 @@
+"""Tests for nbpy.stats submodule."""
+
+import random
+import statistics
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+
+def _rates(values, field='mid', start=datetime(2017, 10, 2)):
+    from nbpy.exchange_rate import NBPExchangeRate
+
+    rates = []
+    for i, value in enumerate(values):
+        kwargs = {field: value} if field == 'mid' else \
+            {'bid': value, 'ask': value + Decimal('0.1')}
+        rates.append(NBPExchangeRate('EUR', start + timedelta(days=i),
+                                     **kwargs))
+    return rates
+
+
+@pytest.mark.parametrize('size', (1, 2, 5, 20))
+def test_rolling_window(size):
+    from nbpy.stats import RollingWindow
+
+    rnd = random.Random(size)
+    values = [Decimal(rnd.randint(10000, 50000)) / 10000 for _ in range(100)]
+    window = RollingWindow(size)
+
+    for i, value in enumerate(values):
+        window.append(value)
+        expected = values[max(i - size + 1, 0):i + 1]
+        assert len(window) == len(expected)
+        assert window.mean == statistics.mean(expected)
+        assert window.min == min(expected)
+        assert window.max == max(expected)
+        assert window.pct_change == (expected[-1] / expected[0] - 1) * 100
+        if len(expected) > 1:
+            assert abs(window.std - statistics.stdev(expected)) < \
+                Decimal('1e-20')
+        else:
+            assert window.std is None
+
+
+def test_rolling_window_floats():
+    from nbpy.stats import RollingWindow
+
+    window = RollingWindow(3)
+    assert window.mean is None and window.min is None
+    window.extend([4.0, 4.0, 4.5, 3.5])
+    assert window.mean == pytest.approx(4.0)
+    assert window.std == pytest.approx(0.5)
+    assert (window.min, window.max) == (3.5, 4.5)
+    assert window.full
+
+    with pytest.raises(ValueError):
+        RollingWindow(0)
+
+
+def test_rolling_stats():
+    from nbpy.stats import RollingStats
+
+    rates = _rates([Decimal(value) for value in ('4.1', '4.2', '4.3', '4.0')],
+                   field='bid')
+    stats = RollingStats(3)
+
+    assert stats.extend(rates[:3]) == 3
+    assert stats.fields == ('bid', 'ask')
+    assert stats['bid'].mean == Decimal('4.2')
+    # Refresh overlapping already seen rates
+    assert stats.extend(rates[1:]) == 1
+    assert stats.extend(None) == 0
+    assert stats.last_date == rates[-1].date
+
+    snapshot = stats.snapshot()
+    assert snapshot['bid']['min'] == Decimal('4.0')
+    assert snapshot['ask']['max'] == Decimal('4.4')
+    assert snapshot['bid']['pct_change'] == (Decimal('4.0') / Decimal('4.2')
+                                             - 1) * 100
+
+
+@pytest.mark.parametrize('use_numpy', (False, True))
+def test_rolling_series(use_numpy):
+    from nbpy.stats import rolling_series, RollingWindow
+
+    if use_numpy:
+        pytest.importorskip('numpy')
+
+    rnd = random.Random(0)
+    values = [round(rnd.uniform(3.5, 4.5), 4) for _ in range(50)]
+    rates = _rates(values)
+    random.Random(1).shuffle(rates)
+
+    series = rolling_series(rates, 10, use_numpy=use_numpy)
+    assert len(series['date']) == 41
+    assert series['date'][0] == datetime(2017, 10, 11)
+
+    window = RollingWindow(10)
+    window.extend(values)
+    for name in ('mean', 'std', 'min', 'max', 'pct_change'):
+        assert series[name][-1] == pytest.approx(getattr(window, name))
+
+    assert rolling_series(rates[:5], 10, use_numpy=use_numpy)['mean'] == []
@@ -0,0 +1,107 @@
+"""Tests for nbpy.store submodule."""
+
+import pytest
+import responses
+from datetime import datetime
+from decimal import Decimal
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockHTTPAddress, MockJSONData, MockTableJSONData
+from .test_client import register_response
+
+
+@pytest.fixture
+def store(tmpdir):
+    from nbpy.store import RateStore
+
+    with RateStore(str(tmpdir.join('rates.db'))) as store:
+        yield store
+
+
+@responses.activate
+def test_sync_tables(store):
+    """Many currencies are synced with table-level calls, then only deltas."""
+    json_data = MockTableJSONData('A', [currencies['EUR'], currencies['USD']])
+    first = (datetime(2017, 10, 2), datetime(2017, 10, 13))
+    second = (datetime(2017, 10, 14), datetime(2017, 10, 20))
+    for window in (first, second):
+        register_response(json_data.range_uri(*window), 200,
+                          json_data.date_range(*window))
+
+    written = store.sync(['EUR', 'USD'], tables=('A',),
+                         start_date='2017-10-02', end_date='2017-10-13')
+    assert written == 2 * 10
+    assert store.last_date('EUR', 'A') == datetime(2017, 10, 13)
+    assert len(responses.calls) == 1
+
+    # Nothing new to sync
+    assert store.sync(['EUR', 'USD'], tables=('A',), start_date='2017-10-02',
+                      end_date='2017-10-13') == 0
+    assert len(responses.calls) == 1
+
+    written = store.sync(['EUR', 'USD'], tables=('A',), end_date='2017-10-20')
+    assert written == 2 * 5
+    assert len(responses.calls) == 2
+    assert responses.calls[-1].request.url == json_data.range_uri(*second)
+
+    rates = store.rates('usd', '2017-10-01', '2017-10-31')
+    assert len(rates) == 15
+    assert all(isinstance(rate.mid, Decimal) for rate in rates)
+
+
+@responses.activate
+def test_sync_currency(store):
+    """Single currency is synced with per-currency calls."""
+    currency = currencies['EUR']
+    http_address = MockHTTPAddress(currency, bid_ask=True)
+    json_data = MockJSONData(currency, bid_ask=True)
+    window = (datetime(2017, 10, 2), datetime(2017, 10, 4))
+    data = json_data.date_range(*window)
+    register_response(http_address.date_range(*window), 200, data)
+
+    assert store.sync(['EUR'], tables=('C',), start_date='2017-10-02',
+                      end_date='2017-10-04') == 3
+
+    rates = store.rates('EUR', '2017-10-01', '2017-10-31', bid_ask=True)
+    assert [rate.bid for rate in rates] == [
+        Decimal(str(rate['bid'])) for rate in data['rates']
+    ]
+    # Table numbers are kept
+    assert [rate.no for rate in rates] == [
+        rate['no'] for rate in data['rates']
+    ]
+    assert None not in [
+        row[0] for row in store._connection.execute("SELECT no FROM rates")
+    ]
+
+
+@responses.activate
+def test_sync_withdrawn(store):
+    """Currencies missing from tables don't hold back later syncs."""
+    # GBP is in tables A, but not in these ones
+    json_data = MockTableJSONData('A', [currencies['EUR'], currencies['USD']])
+    first = (datetime(2017, 10, 2), datetime(2017, 10, 13))
+    second = (datetime(2017, 10, 14), datetime(2017, 10, 20))
+    for window in (first, second):
+        register_response(json_data.range_uri(*window), 200,
+                          json_data.date_range(*window))
+
+    assert store.sync(['EUR', 'USD', 'GBP'], tables=('A',),
+                      start_date='2017-10-02', end_date='2017-10-13') == 20
+    assert store.last_date('GBP', 'A') == datetime(2017, 10, 13)
+    assert store.rates('GBP', '2017-10-01', '2017-10-31') == []
+
+    assert store.sync(['EUR', 'USD', 'GBP'], tables=('A',),
+                      end_date='2017-10-20') == 10
+    assert responses.calls[-1].request.url == json_data.range_uri(*second)
+
+
+@responses.activate
+def test_sync_no_data(store):
+    """404 (no tables published) doesn't break sync."""
+    json_data = MockTableJSONData('A', currencies.values())
+    window = (datetime(2017, 10, 14), datetime(2017, 10, 15))
+    register_response(json_data.range_uri(*window), 404)
+
+    assert store.sync(['EUR', 'USD'], tables=('A',), start_date=window[0],
+                      end_date=window[1]) == 0
+    assert store.last_date('EUR', 'A') is None
@@ -0,0 +1,203 @@
+"""Tests for nbpy.table_index submodule."""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        yield server
+
+
+def test_parse_table_number():
+    from nbpy.table_index import parse_table_number, estimate_date, \
+        search_window
+
+    assert parse_table_number('211/A/NBP/2017') == ('A', 2017, 211)
+    assert parse_table_number(' 001/c/nbp/2017') == ('C', 2017, 1)
+    for no in ('211/D/NBP/2017', '211/A/2017', 'A', ''):
+        with pytest.raises(ValueError):
+            parse_table_number(no)
+
+    assert estimate_date('001/A/NBP/2017') == datetime(2017, 1, 2)
+    # Tables B are published on Wednesdays
+    assert estimate_date('002/B/NBP/2017') == datetime(2017, 1, 11)
+    assert estimate_date('300/A/NBP/2017') is None
+    assert search_window('001/A/NBP/2017') == (datetime(2017, 1, 1),
+                                               datetime(2017, 1, 9))
+    assert search_window('300/A/NBP/2017') == (datetime(2017, 12, 24),
+                                               datetime(2017, 12, 31))
+
+
+def test_index():
+    from nbpy.exchange_rate import NBPExchangeRate
+    from nbpy.table_index import TableIndex
+    from nbpy.tables import NBPExchangeTable
+
+    index = TableIndex(max_rates=2)
+    eur = NBPExchangeRate('EUR', '2017-10-02', mid=Decimal('4.3'),
+                          no='190/A/NBP/2017')
+    usd = NBPExchangeRate('USD', '2017-10-02', mid=Decimal('3.6'))
+
+    index.add_rates('A', [eur, usd])
+    assert '190/A/NBP/2017' in index
+    assert len(index) == 1
+    assert index.rates == 1
+    # Partial table is returned only for its currencies
+    assert index.get('190/A/NBP/2017') is None
+    assert index.get('190/A/NBP/2017', 'USD') is None
+    partial = index.get('190/A/NBP/2017', 'eur')
+    assert partial.date == datetime(2017, 10, 2)
+    assert partial['EUR'] is eur
+    assert not index.is_complete('190/A/NBP/2017')
+
+    table = NBPExchangeTable('A', '190/A/NBP/2017', '2017-10-02', [eur, usd])
+    index.add_table(table)
+    assert index.get('190/A/NBP/2017') is table
+    assert index.is_complete('190/A/NBP/2017')
+    assert index.rates == 2
+    # Partial rates don't modify complete tables
+    index.add_rates('A', [eur])
+    assert index['190/A/NBP/2017'] is table
+    assert index.rates == 2
+
+    # Tables are indexed within scopes
+    assert index.get('190/A/NBP/2017', scope='other') is None
+    index.add_table(table, scope='other')
+    assert index.get('190/A/NBP/2017', scope='other') is table
+    # Size is limited by number of rates
+    assert len(index) == 1
+    assert index.get('190/A/NBP/2017') is None
+    assert not index.is_complete('190/A/NBP/2017')
+    # Lookups by number search all scopes
+    assert '190/A/NBP/2017' in index
+    assert index['190/A/NBP/2017'] is table
+    with pytest.raises(KeyError):
+        index['191/A/NBP/2017']
+
+    index.add_table(NBPExchangeTable('A', '191/A/NBP/2017', '2017-10-03',
+                                     [eur]))
+    assert len(index) == 1
+    assert repr(index) == 'TableIndex(max_rates=2, tables=1, rates=1)'
+
+    index.clear()
+    assert len(index) == 0
+    assert index.rates == 0
+
+
+def test_indexing(server):
+    from nbpy import NBPClient
+    from nbpy.table_index import TableIndex
+    from nbpy.tables import NBPTableClient
+
+    index = TableIndex()
+    scope = (server.base_uri, False)
+    tables = NBPTableClient('A', base_uri=server.base_uri, table_index=index)
+    exchange_table = tables.date('2017-10-02')
+    assert index.get(exchange_table.no, scope=scope) is exchange_table
+    assert exchange_table.no in index
+    assert index[exchange_table.no] is exchange_table
+
+    eur = NBPClient('EUR', base_uri=server.base_uri, table_index=index)
+    rates = eur.date_range('2017-10-09', '2017-10-13', bid_ask=True)
+    assert len(index) == 6
+    no = server._table_no('C', datetime(2017, 10, 9))
+    assert index.get(no, 'EUR', scope=scope)['EUR'] is rates[0]
+    assert no in index
+    assert index[no]['EUR'] is rates[0]
+
+    # Clients with other settings don't share indexed tables
+    floats = NBPClient('EUR', base_uri=server.base_uri, as_float=True,
+                       table_index=index)
+    assert isinstance(floats.by_table_number(no).bid, float)
+    assert isinstance(eur.by_table_number(no).bid, Decimal)
+
+    # Windows of iter_range() are indexed only if requested
+    index.clear()
+    assert len(list(eur.iter_range('2017-01-02', '2017-06-30'))) > 100
+    assert len(index) == 0
+
+    from nbpy.api import iter_windows
+    rates = list(iter_windows([eur], '2017-10-02', '2017-10-06', index=True))
+    assert len(index) == 5
+    assert index.get(rates[0].no, 'EUR', scope=scope)['EUR'] is rates[0]
+
+
+def test_no_index(server):
+    from nbpy import NBPClient
+    from nbpy.table_index import global_index
+
+    eur = NBPClient('EUR', base_uri=server.base_uri)
+    assert eur.table_index is None
+    eur.date_range('2017-10-02', '2017-10-06')
+    assert len(global_index) == 0
+
+    no = server._table_no('A', datetime(2017, 10, 2))
+    requests = server.requests
+    assert eur.by_table_number(no).date == datetime(2017, 10, 2)
+    assert eur.by_table_number(no).date == datetime(2017, 10, 2)
+    # Tables around it are fetched once, into private index
+    assert eur.by_table_number(
+        server._table_no('A', datetime(2017, 10, 4))
+    ).date == datetime(2017, 10, 4)
+    assert server.requests - requests == 1
+    assert len(global_index) == 0
+
+
+def test_by_table_number(server):
+    from nbpy import NBPClient
+    from nbpy.table_index import TableIndex
+
+    index = TableIndex()
+    eur = NBPClient('EUR', base_uri=server.base_uri, table_index=index)
+    no = server._table_no('A', datetime(2017, 10, 2))
+
+    requests = server.requests
+    rate = eur.by_table_number(no)
+    assert rate.date == datetime(2017, 10, 2)
+    assert rate.mid == eur.date('2017-10-02').mid
+    assert server.requests - requests == 2
+    assert index.is_complete(no, scope=(server.base_uri, False))
+
+    # Answered from index, for any currency of table
+    usd = NBPClient('USD', base_uri=server.base_uri, table_index=index)
+    assert usd.by_table_number(no).date == datetime(2017, 10, 2)
+    assert eur.by_table_number(no.lstrip('0').lower()).mid == rate.mid
+    assert server.requests - requests == 2
+
+    # Rates fetched by NBPClient are indexed as well
+    index.clear()
+    expected = eur.date('2017-10-03')
+    requests = server.requests
+    assert eur.by_table_number(
+        server._table_no('A', datetime(2017, 10, 3))
+    ) is expected
+    assert server.requests == requests
+
+    bid_ask = eur.by_table_number(server._table_no('C', datetime(2017, 10, 4)))
+    assert bid_ask.bid < bid_ask.ask
+
+
+def test_by_table_number_errors(server):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+    from nbpy.table_index import TableIndex
+
+    eur = NBPClient('EUR', base_uri=server.base_uri, table_index=TableIndex())
+    with pytest.raises(ValueError):
+        eur.by_table_number('A/2017')
+    with pytest.raises(APIError) as e:
+        eur.by_table_number('300/A/NBP/2017')
+    assert e.value.status_code == 404
+    # EUR isn't in tables B
+    with pytest.raises(APIError):
+        eur.by_table_number(server._table_no('B', datetime(2017, 10, 4)))
+
+    quiet = NBPClient('EUR', base_uri=server.base_uri, suppress_errors=True,
+                      table_index=TableIndex())
+    assert quiet.by_table_number('250/A/NBP/2017') is None
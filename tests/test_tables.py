@@ -0,0 +1,57 @@
+"""Tests for nbpy.tables submodule."""
+
+import pytest
+import responses
+from datetime import datetime
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockTableJSONData
+from .test_client import register_response
+
+
+@pytest.mark.parametrize('table', ('A', 'B', 'C'))
+@responses.activate
+def test_date_range(table):
+    from nbpy.tables import NBPTableClient, NBPExchangeTable
+
+    start_date, end_date = datetime(2017, 10, 2), datetime(2017, 10, 15)
+    json_data = MockTableJSONData(table, currencies.values())
+    data = json_data.date_range(start_date, end_date)
+    register_response(json_data.range_uri(start_date, end_date), 200, data)
+
+    client = NBPTableClient(table.lower())
+    result = client.date_range(start_date, '2017-10-15')
+
+    assert len(result) == 10
+    for exchange_table, table_data in zip(result, data):
+        assert isinstance(exchange_table, NBPExchangeTable)
+        assert exchange_table.table == table
+        assert exchange_table.no == table_data['no']
+        assert len(exchange_table) == len(json_data.currencies)
+
+        for rate in exchange_table:
+            assert rate.date == exchange_table.date
+            assert table in currencies[rate.currency_code].tables
+            if table == 'C':
+                assert rate.bid is not None and rate.ask is not None
+            else:
+                assert rate.mid is not None
+
+
+@responses.activate
+def test_errors():
+    from nbpy.tables import NBPTableClient
+    from nbpy.errors import APIError
+
+    json_data = MockTableJSONData('A', currencies.values())
+    register_response(json_data.uri('2017-10-01'), 404)
+
+    client = NBPTableClient('A')
+    with pytest.raises(APIError) as excinfo:
+        client.date('2017-10-01')
+    assert excinfo.value.status_code == 404
+
+    client.suppress_errors = True
+    assert client.date('2017-10-01') is None
+
+    with pytest.raises(ValueError):
+        NBPTableClient('D')
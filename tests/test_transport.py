@@ -0,0 +1,216 @@
+"""Tests for nbpy.transport submodule."""
+
+import pytest
+import responses
+from datetime import datetime
+from nbpy.currencies import currencies
+from .mock_api_helpers import MockHTTPAddress, MockJSONData
+from .test_client import register_response
+
+
+class StaticTransport(object):
+    """Transport returning the same response for every call."""
+
+    def __init__(self, response):
+        self.response = response
+        self.uris = []
+
+    def get(self, uri, headers=None):
+        self.uris.append(uri)
+        return self.response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def json_data():
+    return MockJSONData(currencies['EUR']).date(datetime(2017, 10, 2))
+
+
+def test_custom_transport(json_data):
+    import json
+    from nbpy import NBPClient
+    from nbpy.transport import TransportResponse
+
+    transport = StaticTransport(
+        TransportResponse(200, {}, json.dumps(json_data))
+    )
+    client = NBPClient('EUR', transport=transport)
+    rate = client.date('2017-10-02')
+
+    assert transport.uris == [
+        MockHTTPAddress(currencies['EUR']).date(datetime(2017, 10, 2))
+    ]
+    assert rate.date == datetime(2017, 10, 2)
+
+
+def test_http_error():
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+    from nbpy.transport import TransportResponse
+
+    transport = StaticTransport(TransportResponse(404, {}, 'Not Found'))
+    client = NBPClient('EUR', transport=transport)
+
+    with pytest.raises(APIError) as excinfo:
+        client.date('2017-10-01')
+    assert excinfo.value.status_code == 404
+
+
+@responses.activate
+def test_record_and_replay(tmpdir, json_data):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+    from nbpy.transport import (RequestsTransport, RecordingTransport,
+                                ReplayTransport)
+
+    directory = str(tmpdir.join('recordings'))
+    uri = MockHTTPAddress(currencies['EUR']).date(datetime(2017, 10, 2))
+    register_response(uri, 200, json_data)
+
+    recorder = RecordingTransport(RequestsTransport(), directory)
+    recorded = NBPClient('EUR', transport=recorder).date('2017-10-02')
+    assert len(responses.calls) == 1
+
+    replayer = ReplayTransport(directory)
+    replayed = NBPClient('EUR', transport=replayer).date('2017-10-02')
+    assert len(responses.calls) == 1
+    assert replayed.mid == recorded.mid
+
+    with pytest.raises(APIError):
+        NBPClient('EUR', transport=replayer).date('2017-10-03')
+
+
+def test_record_revalidated(tmpdir):
+    from nbpy import NBPClient
+    from nbpy.errors import APIError
+    from nbpy.transport import (RequestsTransport, RecordingTransport,
+                                ReplayTransport, TransportResponse)
+    from .mock_api_helpers import MockAPIServer
+
+    directory = str(tmpdir.join('recordings'))
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        recorder = RecordingTransport(RequestsTransport(), directory)
+        client = NBPClient('EUR', base_uri=server.base_uri, cache_size=0,
+                           transport=recorder)
+        recorded = client.current()
+        # Revalidated with 304, which isn't recorded
+        assert client.current().mid == recorded.mid
+        assert client.metrics.snapshot()['not_modified'] == {
+            'exchangerates/rates/current': 1
+        }
+
+    replayer = ReplayTransport(directory)
+    replayed = NBPClient('EUR', base_uri=server.base_uri,
+                         transport=replayer).current()
+    assert replayed.mid == recorded.mid
+
+    # 304 to unconditional request is an error
+    transport = StaticTransport(TransportResponse(304, {}, ''))
+    with pytest.raises(APIError) as excinfo:
+        NBPClient('EUR', transport=transport).date('2017-10-02')
+    assert excinfo.value.status_code == 304
+
+
+class ValidatingTransport(StaticTransport):
+    """Transport answering conditional requests with 304."""
+
+    def __init__(self, response):
+        super().__init__(response)
+        self.headers = []
+
+    def get(self, uri, headers=None):
+        from nbpy.transport import TransportResponse
+
+        self.headers.append(headers)
+        if headers.get('If-Modified-Since') == \
+                self.response.headers['Last-Modified']:
+            return TransportResponse(304, {}, '')
+        return super().get(uri, headers)
+
+
+def test_conditional_requests(json_data):
+    import json
+    from nbpy import NBPClient
+    from nbpy.transport import TransportResponse
+
+    body = json.dumps(json_data)
+    last_modified = 'Mon, 02 Oct 2017 11:45:00 GMT'
+    transport = ValidatingTransport(
+        TransportResponse(200, {'Last-Modified': last_modified}, body)
+    )
+    client = NBPClient('EUR', transport=transport, cache_size=0)
+    parsed = []
+    client.hooks.register(lambda event, context: parsed.append(event),
+                          'after_parse')
+
+    rates = [client.date('2017-10-02') for _ in range(3)]
+    assert [rate.mid for rate in rates] == [rates[0].mid] * 3
+    assert 'If-Modified-Since' not in transport.headers[0]
+    assert transport.headers[1]['If-Modified-Since'] == last_modified
+    assert transport.headers[0]['Accept-Encoding'] == 'gzip'
+    # 304s aren't parsed again
+    assert len(parsed) == 1
+
+    snapshot = client.metrics.snapshot()
+    assert snapshot['not_modified'] == {'exchangerates/rates/date': 2}
+    assert snapshot['bytes_saved']['not_modified'] == 2 * len(body)
+
+    # Past responses to calls bypassing LRU cache aren't kept for
+    # revalidation, current ones (e.g. polls) are
+    client = NBPClient('EUR', transport=transport)
+    client._get_response_data.__wrapped__('2017-10-02')
+    assert len(client._validators) == 0
+    client.date('2017-10-02')
+    assert len(client._validators) == 1
+    client._get_response_data.__wrapped__('today')
+    assert len(client._validators) == 2
+
+    # Revalidation can be disabled
+    client = NBPClient('EUR', transport=transport, cache_size=0, revalidate=0)
+    client.date('2017-10-02')
+    client.date('2017-10-02')
+    assert 'If-Modified-Since' not in transport.headers[-1]
+
+
+def test_revalidate_cached(monkeypatch):
+    """Test cached current results expiring and being revalidated."""
+    from nbpy import NBPClient
+    from nbpy import cache as cache_module
+    from .mock_api_helpers import MockAPIServer
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri, ttl=10)
+        current = client.current()
+        past = client.date('2017-10-02')
+        assert client.current() is current
+        assert server.requests == 2
+
+        now[0] += 11
+        assert client.current().date == current.date
+        assert client.date('2017-10-02') is past
+        assert server.requests == 3
+
+    assert client.metrics.snapshot()['not_modified'] == {
+        'exchangerates/rates/current': 1
+    }
+
+
+def test_etag_and_gzip():
+    from nbpy import NBPClient
+    from .mock_api_helpers import MockAPIServer
+
+    with MockAPIServer(today=datetime(2017, 10, 31)) as server:
+        client = NBPClient('EUR', base_uri=server.base_uri, cache_size=0)
+        first, second = client.current(), client.current()
+        assert first.mid == second.mid
+
+    snapshot = client.metrics.snapshot()
+    assert snapshot['not_modified'] == {'exchangerates/rates/current': 1}
+    assert snapshot['bytes_saved']['compression'] > 0
+    endpoint = 'exchangerates/rates/current'
+    assert snapshot['wire_bytes'][endpoint] < \
+        snapshot['response_bytes'][endpoint]
@@ -0,0 +1,145 @@
+"""Tests for nbpy.watcher submodule."""
+
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+from .mock_api_helpers import MockAPIServer
+
+
+@pytest.fixture
+def server():
+    # Table of 2017-10-31 (Tuesday) not published yet
+    with MockAPIServer(today=datetime(2017, 10, 30)) as server:
+        yield server
+
+
+def test_init():
+    from nbpy.currencies import currencies
+    from nbpy.errors import BidAskUnavailable, UnknownCurrencyCode
+    from nbpy.watcher import RateWatcher
+
+    b_code = next(code for code, currency in currencies.items()
+                  if list(currency.tables) == ['B'])
+    watcher = RateWatcher(['eur', 'USD', 'EUR', b_code])
+    assert watcher.tables == ['A', 'B']
+    assert watcher.currency_codes == {'A': ['EUR', 'USD'], 'B': [b_code]}
+    assert RateWatcher(['EUR'], bid_ask=True).tables == ['C']
+
+    with pytest.raises(UnknownCurrencyCode):
+        RateWatcher(['XYZ'])
+    with pytest.raises(BidAskUnavailable):
+        RateWatcher([b_code], bid_ask=True)
+
+
+def test_poll(server):
+    from nbpy.watcher import RateWatcher, TableUpdate
+
+    watcher = RateWatcher(['EUR', 'USD'], base_uri=server.base_uri)
+    received = []
+    watcher.subscribe(received.append)
+
+    first = watcher.poll(notify=False)
+    assert [update.date for update in first] == [datetime(2017, 10, 30)]
+    assert received == []
+    assert watcher.last_seen['A'][0] == datetime(2017, 10, 30)
+
+    # Unchanged table is revalidated (304) and not emitted
+    assert watcher.poll() == []
+    assert watcher.metrics.snapshot()['not_modified'] == {
+        'exchangerates/tables/current': 1
+    }
+
+    server.today = datetime(2017, 10, 31)
+    updates = watcher.poll()
+    assert updates == received
+    update, = updates
+    assert isinstance(update, TableUpdate)
+    assert update.table == 'A'
+    assert update.date == datetime(2017, 10, 31)
+    assert update.no == watcher.last_seen['A'][1]
+    assert update.no != first[0].no
+    assert [rate.currency_code for rate in update.rates] == ['EUR', 'USD']
+    assert all(rate.date == update.date for rate in update.rates)
+
+    assert watcher.poll() == []
+    assert len(received) == 1
+
+
+def test_subscribers(server):
+    from nbpy.watcher import RateWatcher
+
+    watcher = RateWatcher(['EUR'], bid_ask=True, base_uri=server.base_uri)
+    watcher.poll(notify=False)
+    first, second = [], []
+
+    @watcher.subscribe
+    def failing(update):
+        raise RuntimeError("Subscriber error")
+
+    watcher.subscribe(first.append)
+    watcher.subscribe(second.append)
+    watcher.unsubscribe(second.append)
+
+    server.today = datetime(2017, 10, 31)
+    watcher.poll()
+    assert len(first) == 1
+    assert second == []
+    assert first[0].table == 'C'
+    assert hasattr(first[0].rates[0], 'bid')
+    assert watcher.metrics.snapshot()['errors']['RuntimeError'] == 1
+
+
+def test_errors():
+    from nbpy.watcher import RateWatcher
+
+    # Nothing listens there
+    watcher = RateWatcher(['EUR'], base_uri='http://127.0.0.1:1/api')
+    assert watcher.poll() == []
+    assert watcher.last_seen == {}
+
+
+def test_thread(server):
+    from nbpy.watcher import RateWatcher
+
+    received = threading.Event()
+    updates = []
+
+    def on_update(update):
+        updates.append(update)
+        received.set()
+
+    watcher = RateWatcher(['EUR'], poll_interval=0.01,
+                          base_uri=server.base_uri)
+    watcher.subscribe(on_update)
+    watcher.poll(notify=False)
+    with watcher:
+        server.today = datetime(2017, 10, 31)
+        assert received.wait(5)
+    assert len(updates) == 1
+    assert updates[0].date == datetime(2017, 10, 31)
+
+
+def test_async_iterator(server):
+    from nbpy.watcher import RateWatcher
+
+    watcher = RateWatcher(['EUR', 'USD'], base_uri=server.base_uri)
+    watcher.poll(notify=False)
+
+    async def consume():
+        loop = asyncio.get_event_loop()
+        first, second = watcher.updates(), watcher.updates()
+        server.today = datetime(2017, 10, 31)
+        await loop.run_in_executor(None, watcher.poll)
+        await loop.run_in_executor(None, watcher.stop)
+        results = []
+        for stream in (first, second):
+            results.append([update async for update in stream])
+        return results
+
+    first, second = asyncio.run(consume())
+    assert first == second
+    assert [update.date for update in first] == [datetime(2017, 10, 31)]
+    assert watcher._subscribers == []